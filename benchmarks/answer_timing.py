@@ -0,0 +1,207 @@
+"""
+Answer timing load test: recorded answer times while the bot is saturated.
+
+Runs the real button callback and `answer_quiz_type` against a throwaway
+database, with fake Discord interactions and messages whose snowflake IDs
+encode when each user clicked and answered. Answers are handled on an event
+loop kept busy by blocking work, so later than they were sent, and the
+recorded answer times are compared with the expected ones. Exits with status 1 if any recorded time is
+off by more than a millisecond.
+
+python -m benchmarks.answer_timing
+python -m benchmarks.answer_timing --users 200 --block-ms 20
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Discord
+from discord.utils import snowflake_time, time_snowflake
+
+# enough configuration for poyuta.main to be importable
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+# recorded times are rounded to the millisecond
+TOLERANCE_SECONDS = 0.001
+
+
+def fake_user(user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=user_id,
+        name=f"user{user_id}",
+        mention=f"<@{user_id}>",
+        avatar=SimpleNamespace(
+            url=f"https://cdn.discordapp.com/avatars/{user_id}/pfp{user_id}.png"
+        ),
+    )
+
+
+def fake_interaction(user: SimpleNamespace, created_at: datetime):
+    """A button click received by Discord at `created_at`."""
+
+    async def send_message(*args, **kwargs):
+        pass
+
+    interaction_id = time_snowflake(created_at)
+    return SimpleNamespace(
+        id=interaction_id,
+        created_at=snowflake_time(interaction_id),
+        user=user,
+        response=SimpleNamespace(send_message=send_message),
+    )
+
+
+def fake_context(user: SimpleNamespace, created_at: datetime, lags: list):
+    """A message received by Discord at `created_at`.
+
+    The delay between its creation and its reply is appended to `lags`.
+    """
+
+    message_id = time_snowflake(created_at)
+    message = SimpleNamespace(id=message_id, created_at=snowflake_time(message_id))
+
+    async def send(*args, **kwargs):
+        lags.append(datetime.now(timezone.utc) - message.created_at)
+
+    return SimpleNamespace(author=user, message=message, send=send)
+
+
+async def block_event_loop(block_seconds: float, stop: asyncio.Event):
+    """Keep the event loop busy with blocking work, like a slow query would."""
+
+    while not stop.is_set():
+        time.sleep(block_seconds)
+        await asyncio.sleep(0)
+
+
+async def run(nb_users: int, block_seconds: float) -> dict:
+    # imported here, once the working directory and environment are set
+    import poyuta.main as poyuta_main
+    from poyuta.cache import reference_data
+    from poyuta.database import Answer, Quiz
+    from poyuta.utils import get_current_quiz_date
+
+    bot = poyuta_main.bot
+
+    async def sync():
+        return []
+
+    # no connection to Discord
+    bot.tree.sync = sync
+    await bot.setup_hook()
+    bot.scheduler.shutdown(wait=False)
+    bot.flush_user_cache.cancel()
+
+    quiz_type = reference_data.quiz_types[0]
+    with bot.session as session:
+        session.add(
+            Quiz(
+                id_type=quiz_type.id,
+                creator_id=int(DUMMY_ENVIRONMENT["DEFAULT_ADMIN_ID"]),
+                clip="https://clip",
+                answer="Kamiya Hiroshi",
+                date=get_current_quiz_date(poyuta_main.DAILY_QUIZ_RESET_TIME),
+            )
+        )
+        session.commit()
+
+    button = poyuta_main.NewQuizButton(quiz_type)
+    users = [fake_user(user_id) for user_id in range(1000, 1000 + nb_users)]
+
+    # everyone clicks now, and answers after a random delay
+    started_at = datetime.now(timezone.utc)
+    expected_times = {user.id: random.randint(100, 2000) / 1000 for user in users}
+
+    for user in users:
+        await button.callback(fake_interaction(user, started_at))
+
+    lags = []
+    stop = asyncio.Event()
+    blocker = asyncio.create_task(block_event_loop(block_seconds, stop))
+
+    async def answer(user: SimpleNamespace):
+        # the message reaches Discord on time, the busy bot handles it late
+        answered_at = started_at + timedelta(seconds=expected_times[user.id])
+        await asyncio.sleep((answered_at - datetime.now(timezone.utc)).total_seconds())
+        await poyuta_main.answer_quiz_type(
+            ctx=fake_context(user, answered_at, lags),
+            quiz_type_id=quiz_type.id,
+            quiz_type_name=quiz_type.type,
+            answer="Kamiya Hiroshi",
+        )
+
+    await asyncio.gather(*(answer(user) for user in users))
+
+    stop.set()
+    await blocker
+
+    with bot.session as session:
+        recorded_times = dict(
+            session.query(Answer.user_id, Answer.answer_time).filter(Answer.is_correct)
+        )
+
+    return {
+        "expected": expected_times,
+        "recorded": recorded_times,
+        "lags": [lag.total_seconds() for lag in lags],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100, help="number of players")
+    parser.add_argument(
+        "--block-ms",
+        type=float,
+        default=10,
+        help="how long the event loop is blocked between two handler steps",
+    )
+    args = parser.parse_args()
+
+    os.environ.update(DUMMY_ENVIRONMENT)
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        os.chdir(working_directory)
+        outcome = asyncio.run(run(args.users, args.block_ms / 1000))
+
+    expected, recorded, lags = outcome["expected"], outcome["recorded"], outcome["lags"]
+    errors = [
+        abs(recorded[user_id] - expected_time)
+        for user_id, expected_time in expected.items()
+        if user_id in recorded
+    ]
+    missing = len(expected) - len(errors)
+
+    print(f"{len(expected)} answer(s) handled with the event loop saturated")
+    print(
+        f"  handling delay: median {statistics.median(lags) * 1000:.0f}ms, "
+        f"max {max(lags) * 1000:.0f}ms"
+    )
+    print(f"  recorded time error: max {max(errors, default=0) * 1000:.1f}ms")
+
+    failed = False
+
+    if missing:
+        print(f"FAIL: {missing} answer(s) not recorded")
+        failed = True
+
+    if max(errors, default=0) > TOLERANCE_SECONDS:
+        print(f"FAIL: recorded times off by more than {TOLERANCE_SECONDS * 1000:.0f}ms")
+        failed = True
+    else:
+        print("OK: recorded times don't include the handling delay")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Command benchmarks: how the data path of each command scales with the data.
+
+For each scale tier, generates a synthetic database with
+`benchmarks.generate_database`, then runs the commands below against it in a
+fresh interpreter, with fake Discord contexts, and reports their wall time,
+database time, and number of statements and rows, from the bot's own
+command metrics. Paginators get no buttons, so they don't wait for clicks.
+
+- lb, slb, topspeed: the leaderboards, ranking every user
+- mystats: the stats of the most active user
+- /queue: the planned quizzes
+- reset: the results of yesterday's quizzes, as posted at the reset
+
+python -m benchmarks.commands
+python -m benchmarks.commands --tiers small medium large --repeat 5
+python -m benchmarks.commands --directory /path/to/copy/of/production
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Benchmarks
+from benchmarks.answer_timing import fake_user
+from benchmarks.generate_database import TIERS, generate
+from benchmarks.startup import DUMMY_ENVIRONMENT, REPOSITORY_PATH
+
+COMMANDS = ["lb", "slb", "topspeed", "mystats", "/queue", "reset"]
+
+
+def fake_message() -> SimpleNamespace:
+    async def edit(*args, **kwargs):
+        pass
+
+    async def delete(*args, **kwargs):
+        pass
+
+    return SimpleNamespace(id=1, edit=edit, delete=delete)
+
+
+async def send(*args, **kwargs) -> SimpleNamespace:
+    # without buttons to click, paginators stop right away
+    view = kwargs.get("view")
+    if view is not None:
+        view.stop()
+    return fake_message()
+
+
+def fake_context(user: SimpleNamespace) -> SimpleNamespace:
+    return SimpleNamespace(author=user, send=send, message=fake_message())
+
+
+def fake_interaction(user: SimpleNamespace) -> SimpleNamespace:
+    async def defer(*args, **kwargs):
+        pass
+
+    return SimpleNamespace(
+        user=user,
+        response=SimpleNamespace(defer=defer, send_message=send),
+        followup=SimpleNamespace(send=send),
+    )
+
+
+async def run(nb_runs: int) -> dict:
+    """Run each command against the database of the working directory."""
+
+    # imported here, once the working directory and environment are set
+    import poyuta.main as poyuta_main
+    from sqlalchemy import func
+    from poyuta.database import Answer
+    from poyuta.metrics import command_metrics
+    from poyuta.querycache import query_cache
+
+    bot = poyuta_main.bot
+
+    # every run queries the database, benchmarks.query_cache measures the cache
+    query_cache.max_bytes = 0
+
+    async def sync():
+        return []
+
+    # no connection to Discord
+    bot.tree.sync = sync
+    await bot.setup_hook()
+    bot.scheduler.shutdown(wait=False)
+    bot.flush_user_cache.cancel()
+    bot.loop_lag_monitor.stop()
+
+    with bot.session as session:
+        most_active_user_id = (
+            session.query(Answer.user_id)
+            .group_by(Answer.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+            .scalar()
+        )
+    user = fake_user(most_active_user_id)
+
+    async def leaderboard(callback):
+        # the leaderboards can only be shown every two hours
+        bot.last_leaderboard_update = None
+        await callback(fake_context(user))
+
+    async def reset():
+        # nothing precomputed, everything is computed at the reset
+        bot.precomputed_quiz_results = None
+        await poyuta_main.post_yesterdays_quiz_results()
+
+    commands = {
+        "lb": lambda: leaderboard(poyuta_main.leaderboard.callback),
+        "slb": lambda: leaderboard(poyuta_main.seiyuuleaderboard.callback),
+        "topspeed": lambda: poyuta_main.topspeed.callback(fake_context(user)),
+        "mystats": lambda: poyuta_main.my_stats.callback(fake_context(user)),
+        "/queue": lambda: poyuta_main.queue.callback(fake_interaction(user)),
+        "reset": reset,
+    }
+
+    for name in COMMANDS:
+        for _ in range(nb_runs):
+            poyuta_main.start_instrumentation(name)
+            try:
+                await commands[name]()
+            finally:
+                poyuta_main.finish_instrumentation()
+
+    results = {}
+    for name in COMMANDS:
+        metrics = command_metrics.commands[name]
+        results[name] = {
+            "wall_ms": metrics.wall_time.percentile(50) * 1000,
+            "max_ms": metrics.wall_time.percentile(100) * 1000,
+            "db_ms": metrics.db_time.percentile(50) * 1000,
+            "statements": metrics.nb_statements.percentile(50),
+            "rows": metrics.nb_rows.percentile(50),
+        }
+    return results
+
+
+def run_tier(directory: Path, nb_runs: int) -> dict:
+    """Run the commands against a database, in a fresh interpreter."""
+
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.commands",
+            "--directory",
+            str(directory),
+            "--repeat",
+            str(nb_runs),
+            "--json",
+        ],
+        cwd=REPOSITORY_PATH,
+        env={**os.environ, **DUMMY_ENVIRONMENT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # the bot prints while it sets up, the results come last
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def print_results(results_by_tier: dict):
+    tiers = list(results_by_tier)
+    print(f"{'command':<10}" + "".join(f"{tier:>34}" for tier in tiers))
+    print(
+        f"{'':<10}"
+        + "".join(f"{'p50 ms':>10}{'db ms':>8}{'stmts':>8}{'rows':>8}" for _ in tiers)
+    )
+    for name in COMMANDS:
+        line = f"{name:<10}"
+        for tier in tiers:
+            result = results_by_tier[tier][name]
+            line += (
+                f"{result['wall_ms']:>10.0f}{result['db_ms']:>8.0f}"
+                f"{result['statements']:>8}{result['rows']:>8}"
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--tiers",
+        nargs="+",
+        choices=TIERS,
+        default=["small", "medium"],
+        help="scale tiers to generate and benchmark",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="number of runs of each command"
+    )
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        help="benchmark the database in DIRECTORY/database/poyuta.db instead",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="with --directory, print the results as JSON",
+    )
+    args = parser.parse_args()
+
+    if args.directory:
+        os.environ.update(DUMMY_ENVIRONMENT)
+        os.chdir(args.directory)
+        results = asyncio.run(run(args.repeat))
+        if args.json:
+            print(json.dumps(results))
+        else:
+            print_results({args.directory.name: results})
+        return
+
+    results_by_tier = {}
+    for tier in args.tiers:
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"generating and benchmarking the {tier} tier")
+            generate(Path(directory), TIERS[tier]["users"], TIERS[tier]["years"])
+            results_by_tier[tier] = run_tier(Path(directory), args.repeat)
+
+    print_results(results_by_tier)
+
+
+if __name__ == "__main__":
+    main()
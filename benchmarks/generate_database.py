@@ -0,0 +1,359 @@
+"""
+Synthetic database generator: a `poyuta.db` at production scale, or beyond.
+
+Creates users, a quiz of each of the `INITIAL_QUIZ_TYPES` for every day of
+the past years and the planned days ahead, and the players' answers:
+
+- how often each user plays follows a long tail, a few play every day and
+  most only now and then
+- each answer is right with a probability depending on the quiz type, and a
+  user gives up after `MAX_ATTEMPTS` wrong answers
+- answer times follow a log-normal distribution, each wrong answer adding
+  to the time of the next one
+- a share of the users who found the answer go for the bonus answer, when
+  the quiz has one
+
+The database is written to DIRECTORY/database/poyuta.db, where the bot
+expects it when run from DIRECTORY.
+
+python -m benchmarks.generate_database --tier medium --directory /tmp/poyuta
+python -m benchmarks.generate_database --users 5000 --years 5 --directory .
+"""
+
+# Standard library imports
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Database
+from sqlalchemy import create_engine, event, insert
+
+# enough configuration for poyuta.main to be importable
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+# scale tiers: number of users and years of daily quizzes
+TIERS = {
+    "small": {"users": 100, "years": 1},
+    "medium": {"users": 500, "years": 2},
+    "large": {"users": 2000, "years": 4},
+}
+
+# probability that an answer is right, by quiz type
+ACCURACY = {
+    "Male Seiyuu": 0.35,
+    "Female Seiyuu": 0.3,
+    "Male Image": 0.5,
+    "Female Image": 0.5,
+    "Song": 0.4,
+}
+
+# a user gives up after this many wrong answers
+MAX_ATTEMPTS = 10
+MAX_BONUS_ATTEMPTS = 5
+
+# generated users after the default admin get snowflake-like IDs from there
+FIRST_USER_ID = 100_000_000_000_000_001
+
+# rows inserted at once
+BATCH_SIZE = 50_000
+
+
+def user_activities(nb_users: int, rng: random.Random) -> list:
+    """Probability that each user plays a given quiz, mean around 0.1."""
+
+    return [rng.betavariate(0.4, 3.5) for _ in range(nb_users)]
+
+
+def attempt_times(nb_attempts: int, median_seconds: float, rng: random.Random):
+    """Times of consecutive answers, in seconds since the quiz started."""
+
+    elapsed = 0.0
+    for _ in range(nb_attempts):
+        elapsed += rng.lognormvariate(0, 1) * median_seconds
+        yield round(elapsed, 3)
+
+
+def generate(
+    directory: Path,
+    nb_users: int,
+    nb_years: float,
+    planned_days: int = 14,
+    bonus_rate: float = 0.6,
+    median_answer_seconds: float = 25,
+    seed: int = 0,
+) -> dict:
+    """Generate a database in DIRECTORY/database/poyuta.db.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory the bot would run from.
+
+    nb_users : int
+        Number of users, the default admin included.
+
+    nb_years : float
+        Years of daily quizzes before today.
+
+    planned_days : int, optional
+        Days of quizzes planned after today, by default 14.
+
+    bonus_rate : float, optional
+        Share of the users who found the answer who go for the bonus answer,
+        by default 0.6.
+
+    median_answer_seconds : float, optional
+        Median time of a first answer, by default 25 seconds.
+
+    seed : int, optional
+        Seed of the random generator, by default 0.
+
+    Returns
+    -------
+    dict
+        Number of rows by table.
+    """
+
+    # imported here, poyuta.database creates its engine on import
+    from poyuta.database import (
+        INITIAL_QUIZ_TYPES,
+        Answer,
+        Base,
+        Quiz,
+        QuizType,
+        User,
+        UserStartQuizTimestamp,
+    )
+    from poyuta.results import BONUS_ANSWER
+    from poyuta.utils import get_current_quiz_date
+
+    rng = random.Random(seed)
+
+    path = Path(directory) / "database" / "poyuta.db"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def fast_writes(dbapi_connection, connection_record):
+        # a throwaway database, no need to survive a crash while it's written
+        dbapi_connection.execute("PRAGMA journal_mode = OFF")
+        dbapi_connection.execute("PRAGMA synchronous = OFF")
+
+    Base.metadata.create_all(engine)
+    nb_rows = {}
+
+    reset_time = datetime.strptime(
+        DUMMY_ENVIRONMENT["DAILY_QUIZ_RESET_TIME"], "%H:%M:%S"
+    ).time()
+    today = get_current_quiz_date(reset_time)
+    first_day = today - timedelta(days=int(nb_years * 365))
+    days = [
+        first_day + timedelta(days=offset)
+        for offset in range((today - first_day).days + planned_days + 1)
+    ]
+
+    with engine.begin() as connection:
+        # the default admin first, players get snowflake-like IDs
+        admin_id = int(DUMMY_ENVIRONMENT["DEFAULT_ADMIN_ID"])
+        user_ids = [admin_id] + [FIRST_USER_ID + index for index in range(nb_users - 1)]
+        connection.execute(
+            insert(User),
+            [
+                {"id": user_id, "name": f"user{index}", "is_admin": index == 0}
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+        nb_rows["users"] = len(user_ids)
+
+        quiz_types = [
+            {"id": index, **quiz_type}
+            for index, quiz_type in enumerate(INITIAL_QUIZ_TYPES, start=1)
+        ]
+        connection.execute(insert(QuizType), quiz_types)
+
+        quizzes = []
+        for day in days:
+            for quiz_type in quiz_types:
+                quizzes.append(
+                    {
+                        "id": len(quizzes) + 1,
+                        "creator_id": rng.choice(user_ids),
+                        "clip": f"https://example.com/clips/{len(quizzes) + 1}.mp3",
+                        "answer": f"Seiyuu {rng.randrange(2000)}",
+                        "bonus_answer": (
+                            f"Character {rng.randrange(5000)}"
+                            if rng.random() < 0.8
+                            else None
+                        ),
+                        "date": day,
+                        "id_type": quiz_type["id"],
+                    }
+                )
+        connection.execute(insert(Quiz), quizzes)
+        nb_rows["quizzes"] = len(quizzes)
+
+        activities = user_activities(len(user_ids), rng)
+        quiz_type_names = {
+            quiz_type["id"]: quiz_type["type"] for quiz_type in quiz_types
+        }
+
+        answers, timestamps = [], []
+        nb_rows["answers"] = nb_rows["user_start_quiz_timestamp"] = 0
+
+        def flush():
+            if answers:
+                connection.execute(insert(Answer), answers)
+            if timestamps:
+                connection.execute(insert(UserStartQuizTimestamp), timestamps)
+            nb_rows["answers"] += len(answers)
+            nb_rows["user_start_quiz_timestamp"] += len(timestamps)
+            answers.clear()
+            timestamps.clear()
+
+        for quiz in quizzes:
+            # planned quizzes haven't been played yet
+            if quiz["date"] > today:
+                continue
+
+            accuracy = ACCURACY.get(quiz_type_names[quiz["id_type"]], 0.4)
+            opened = datetime.combine(quiz["date"], reset_time)
+
+            for user_id, activity in zip(user_ids, activities):
+                if rng.random() >= activity:
+                    continue
+
+                timestamps.append(
+                    {
+                        "user_id": user_id,
+                        "quiz_id": quiz["id"],
+                        "timestamp": opened + timedelta(seconds=rng.uniform(0, 86_000)),
+                    }
+                )
+
+                nb_wrong = 0
+                while nb_wrong < MAX_ATTEMPTS and rng.random() >= accuracy:
+                    nb_wrong += 1
+                is_found = nb_wrong < MAX_ATTEMPTS
+
+                times = list(
+                    attempt_times(nb_wrong + is_found, median_answer_seconds, rng)
+                )
+                for attempt, answer_time in enumerate(times):
+                    is_correct = attempt == nb_wrong
+                    answers.append(
+                        {
+                            "quiz_id": quiz["id"],
+                            "user_id": user_id,
+                            "answer": (
+                                quiz["answer"]
+                                if is_correct
+                                else f"Seiyuu {rng.randrange(2000)}"
+                            ),
+                            "is_correct": is_correct,
+                            "bonus_answer": None,
+                            "is_bonus_point": False,
+                            "answer_time": answer_time,
+                        }
+                    )
+
+                if not is_found or not quiz["bonus_answer"]:
+                    continue
+                if rng.random() >= bonus_rate:
+                    continue
+
+                nb_bonus_attempts = 1
+                while nb_bonus_attempts < MAX_BONUS_ATTEMPTS and rng.random() < 0.5:
+                    nb_bonus_attempts += 1
+                is_bonus_found = rng.random() < 0.7
+
+                for attempt, answer_time in enumerate(
+                    attempt_times(nb_bonus_attempts, median_answer_seconds, rng)
+                ):
+                    is_bonus_point = is_bonus_found and attempt == nb_bonus_attempts - 1
+                    answers.append(
+                        {
+                            "quiz_id": quiz["id"],
+                            "user_id": user_id,
+                            "answer": BONUS_ANSWER,
+                            "is_correct": False,
+                            "bonus_answer": (
+                                quiz["bonus_answer"]
+                                if is_bonus_point
+                                else f"Character {rng.randrange(5000)}"
+                            ),
+                            "is_bonus_point": is_bonus_point,
+                            "answer_time": times[-1] + answer_time,
+                        }
+                    )
+
+            if len(answers) >= BATCH_SIZE:
+                flush()
+
+        flush()
+
+    engine.dispose()
+    return nb_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        required=True,
+        help="the database is written to DIRECTORY/database/poyuta.db",
+    )
+    parser.add_argument(
+        "--tier",
+        choices=TIERS,
+        default="small",
+        help="preset number of users and years",
+    )
+    parser.add_argument("--users", type=int, help="number of users")
+    parser.add_argument("--years", type=float, help="years of daily quizzes")
+    parser.add_argument(
+        "--planned-days", type=int, default=14, help="days of quizzes planned ahead"
+    )
+    parser.add_argument(
+        "--bonus-rate",
+        type=float,
+        default=0.6,
+        help="share of the players who found the answer going for the bonus",
+    )
+    parser.add_argument(
+        "--median-answer-seconds",
+        type=float,
+        default=25,
+        help="median time of a first answer",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    nb_users = args.users or TIERS[args.tier]["users"]
+    nb_years = args.years or TIERS[args.tier]["years"]
+
+    started = time.perf_counter()
+    nb_rows = generate(
+        args.directory,
+        nb_users,
+        nb_years,
+        planned_days=args.planned_days,
+        bonus_rate=args.bonus_rate,
+        median_answer_seconds=args.median_answer_seconds,
+        seed=args.seed,
+    )
+
+    print(
+        f"generated {args.directory / 'database' / 'poyuta.db'} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    for table, count in nb_rows.items():
+        print(f"  {table}: {count}")
+
+
+if __name__ == "__main__":
+    main()
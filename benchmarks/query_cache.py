@@ -0,0 +1,274 @@
+"""
+Query cache benchmark: analytics commands repeated between writes.
+
+Against a synthetic database, a seeded sequence of operations mixes the read
+model queries of `!mystats`, `/history`, `!ct`, `!topspeed` and `/queue`, run
+by a few active users, with the writes the bot does meanwhile: answers to
+today's quizzes through the prebuilt statements, and edits of planned quizzes
+through the ORM. The sequence runs once with `query_cache` disabled, then once
+with it, and the median and p95 latency of each command and the hit rate of
+each query are reported.
+
+In the second pass, each cached result is checked against the query run
+without the cache; the command exits with status 1 if one is stale.
+
+python -m benchmarks.query_cache
+python -m benchmarks.query_cache --operations 5000 --write-rate 0.2
+"""
+
+# Standard library imports
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Tuple
+
+# Database
+from sqlalchemy import func
+
+# Benchmarks
+from benchmarks.generate_database import TIERS, generate
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+COMMANDS = ["mystats", "/history", "ct", "topspeed", "/queue"]
+
+
+def as_rows(value):
+    """A result as comparable rows, records as the tuple of their slots."""
+
+    if isinstance(value, list):
+        return [as_rows(item) for item in value]
+    if hasattr(value, "__slots__"):
+        return tuple(getattr(value, slot) for slot in value.__slots__)
+    return value
+
+
+def command_queries(user_id: int, today) -> dict:
+    """(query, arguments) of each command, as the bot runs them."""
+
+    from poyuta import readmodel
+
+    return {
+        "mystats": [
+            query
+            for quiz_type_id in range(1, 6)
+            for query in (
+                (readmodel.nb_played_quizzes, (user_id, quiz_type_id), {}),
+                (readmodel.user_answers, (user_id, quiz_type_id), {}),
+                (
+                    readmodel.fastest_guesses,
+                    (),
+                    {
+                        "before": today,
+                        "user_id": user_id,
+                        "quiz_type_id": quiz_type_id,
+                        "limit": 3,
+                    },
+                ),
+            )
+        ],
+        "/history": [
+            (readmodel.user_answers, (user_id, quiz_type_id), {"quiz_date": today})
+            for quiz_type_id in range(1, 6)
+        ],
+        "ct": [(readmodel.guesses_of_day, (today,), {})],
+        "topspeed": [
+            (readmodel.has_answers, (), {}),
+            (readmodel.fastest_guesses, (), {"before": today}),
+        ],
+        "/queue": [(readmodel.planned_quizzes, (today,), {})],
+    }
+
+
+def run_pass(operations: list, user_ids: list, today, check: bool) -> Tuple[dict, int]:
+    """Run the operations, return the command latencies and the stale results."""
+
+    from poyuta import statements
+    from poyuta.database import Quiz, SessionFactory
+
+    latencies = defaultdict(list)
+    nb_stale = 0
+
+    for kind, user_index, quiz_type_id in operations:
+        user_id = user_ids[user_index]
+
+        with SessionFactory() as session:
+            if kind == "answer":
+                quiz_id = session.execute(
+                    statements.QUIZ_OF_DAY,
+                    {"quiz_type_id": quiz_type_id, "quiz_date": today},
+                ).scalar()
+                parameters = {"user_id": user_id, "quiz_id": quiz_id}
+                session.execute(
+                    statements.START_QUIZ, {**parameters, "timestamp": datetime.now()}
+                )
+                is_correct = random.random() < 0.3
+                session.execute(
+                    statements.SUBMIT_ANSWER,
+                    {
+                        **parameters,
+                        "answer": "benchmark",
+                        "bonus_answer": None,
+                        "is_correct": is_correct,
+                        "is_bonus_point": False,
+                        "answer_time": datetime.now(),
+                    },
+                )
+                session.commit()
+                continue
+
+            if kind == "queue quiz":
+                quiz = (
+                    session.query(Quiz)
+                    .filter(Quiz.date > today, Quiz.id_type == quiz_type_id)
+                    .order_by(Quiz.date)
+                    .first()
+                )
+                quiz.clip = f"https://example.com/{random.getrandbits(32)}"
+                session.commit()
+                continue
+
+            queries = command_queries(user_id, today)[kind]
+            started = time.perf_counter()
+            results = [
+                query(session, *args, **kwargs) for query, args, kwargs in queries
+            ]
+            latencies[kind].append(time.perf_counter() - started)
+
+            if check:
+                for (query, args, kwargs), result in zip(queries, results):
+                    if as_rows(result) != as_rows(
+                        query.__wrapped__(session, *args, **kwargs)
+                    ):
+                        nb_stale += 1
+                        print(f"stale result of {query.__name__}{args}{kwargs}")
+
+    return latencies, nb_stale
+
+
+def run(nb_operations: int, write_rate: float, nb_users: int, seed: int) -> dict:
+    """Run the sequence without the cache, then with it, on the working directory."""
+
+    # imported here, once the working directory is set
+    from poyuta.database import Answer, SessionFactory
+    from poyuta.querycache import query_cache
+    from poyuta.utils import get_current_quiz_date
+
+    reset_time = datetime.strptime(
+        DUMMY_ENVIRONMENT["DAILY_QUIZ_RESET_TIME"], "%H:%M:%S"
+    ).time()
+    today = get_current_quiz_date(reset_time)
+
+    with SessionFactory() as session:
+        user_ids = [
+            user_id
+            for (user_id,) in session.query(Answer.user_id)
+            .group_by(Answer.user_id)
+            .order_by(func.count().desc())
+            .limit(nb_users)
+        ]
+
+    # the same operations in both passes: mostly reads, answers more often
+    # than quiz edits
+    generator = random.Random(seed)
+    operations = []
+    for _ in range(nb_operations):
+        if generator.random() < write_rate:
+            kind = "answer" if generator.random() < 0.9 else "queue quiz"
+        else:
+            kind = generator.choice(COMMANDS)
+        operations.append(
+            (kind, generator.randrange(len(user_ids)), generator.randint(1, 5))
+        )
+
+    max_bytes = query_cache.max_bytes
+    query_cache.max_bytes = 0
+    random.seed(seed)
+    uncached, _ = run_pass(operations, user_ids, today, check=False)
+
+    query_cache.max_bytes = max_bytes
+    random.seed(seed)
+    cached, nb_stale = run_pass(operations, user_ids, today, check=True)
+
+    return {
+        "latencies": {"uncached": uncached, "cached": cached},
+        "hit_rates": {
+            name: query_cache.hit_rate(name)
+            for name in sorted(set(query_cache.hits) | set(query_cache.misses))
+        },
+        "hit_rate": query_cache.hit_rate(),
+        "nb_stale": nb_stale,
+        "summary": query_cache.summary(),
+    }
+
+
+def percentile(values: list, fraction: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def print_results(results: dict):
+    latencies = results["latencies"]
+    print(f"{'command':<10}{'p50 ms':>18}{'p95 ms':>18}")
+    print(f"{'':<10}{'uncached':>9}{'cached':>9}{'uncached':>9}{'cached':>9}")
+    for name in COMMANDS:
+        uncached, cached = latencies["uncached"][name], latencies["cached"][name]
+        if not cached:
+            continue
+        print(
+            f"{name:<10}"
+            f"{statistics.median(uncached) * 1000:>9.2f}"
+            f"{statistics.median(cached) * 1000:>9.2f}"
+            f"{percentile(uncached, 0.95) * 1000:>9.2f}"
+            f"{percentile(cached, 0.95) * 1000:>9.2f}"
+        )
+
+    print(f"\nhit rate: {results['hit_rate']:.0%}")
+    for name, hit_rate in results["hit_rates"].items():
+        print(f"  {name}: {hit_rate:.0%}")
+    print(results["summary"])
+    print(f"stale results: {results['nb_stale']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--operations", type=int, default=1000, help="number of reads and writes"
+    )
+    parser.add_argument(
+        "--write-rate",
+        type=float,
+        default=0.05,
+        help="share of the operations that write",
+    )
+    parser.add_argument(
+        "--users", type=int, default=20, help="number of users running the commands"
+    )
+    parser.add_argument(
+        "--tier",
+        choices=TIERS,
+        default="small",
+        help="scale tier of the synthetic database",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    os.environ.update(DUMMY_ENVIRONMENT)
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        # first, SQLAlchemy resolves the database's relative path on import
+        os.chdir(working_directory)
+        generate(Path("."), TIERS[args.tier]["users"], TIERS[args.tier]["years"])
+        results = run(args.operations, args.write_rate, args.users, args.seed)
+
+    print_results(results)
+    sys.exit(1 if results["nb_stale"] else 0)
+
+
+if __name__ == "__main__":
+    main()
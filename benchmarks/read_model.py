@@ -0,0 +1,329 @@
+"""
+Read model benchmark: ORM instances against `poyuta.readmodel` records.
+
+Against a synthetic database, runs the queries of each analytics command both
+ways: as they were written with `session.query` of whole ORM instances, with
+the lazy loads the commands triggered, and with the read model. For each
+path, reports the median wall time, the memory allocated at peak and the
+number of memory blocks still alive when the command holds its results (from
+`tracemalloc`), the number of statements and the number of ORM instances
+loaded. The leaderboards' scores are computed the same way by both paths,
+only the users they rank are compared.
+
+python -m benchmarks.read_model
+python -m benchmarks.read_model --tier medium --repeat 10
+"""
+
+# Standard library imports
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Database
+from sqlalchemy import event, func
+
+# Benchmarks
+from benchmarks.generate_database import TIERS, generate
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+COMMANDS = ["lb", "topspeed", "ct", "mystats", "/history", "/queue"]
+
+
+def orm_paths(user_id: int, today) -> dict:
+    """The queries of each command with ORM instances, as they were."""
+
+    from poyuta.database import Answer, Quiz, QuizType, User, UserStartQuizTimestamp
+    from poyuta.results import BONUS_ANSWER
+
+    def lb(session):
+        return session.query(User).all()
+
+    def topspeed(session):
+        session.query(Answer).all()
+        return (
+            session.query(Answer)
+            .join(Quiz)
+            .filter(Answer.is_correct, Quiz.date < today, Answer.answer != BONUS_ANSWER)
+            .order_by(Answer.answer_time)
+            .all()
+        )
+
+    def ct(session):
+        answers = (
+            session.query(Answer, QuizType)
+            .join(Quiz, Answer.quiz_id == Quiz.id)
+            .join(QuizType, Quiz.id_type == QuizType.id)
+            .filter(
+                Answer.is_correct,
+                Quiz.date >= today,
+                Quiz.date < today + timedelta(days=1),
+                Answer.answer != BONUS_ANSWER,
+            )
+            .order_by(QuizType.id, Answer.answer_time)
+            .all()
+        )
+        return [(answer.user.id, answer.answer_time) for answer, _ in answers]
+
+    def mystats(session):
+        results = []
+        for quiz_type_id in range(1, 6):
+            played_quizzes = (
+                session.query(Quiz)
+                .join(UserStartQuizTimestamp)
+                .filter(
+                    Quiz.id_type == quiz_type_id,
+                    UserStartQuizTimestamp.user_id == user_id,
+                )
+                .all()
+            )
+            correct_quizzes = (
+                session.query(Quiz)
+                .join(Answer)
+                .filter(
+                    Quiz.id_type == quiz_type_id,
+                    Answer.user_id == user_id,
+                    Answer.is_correct,
+                )
+                .all()
+            )
+            answers = (
+                session.query(Answer)
+                .join(Quiz)
+                .filter(Answer.user_id == user_id, Quiz.id_type == quiz_type_id)
+                .all()
+            )
+            fastest_answers = (
+                session.query(Answer)
+                .join(Quiz)
+                .filter(
+                    Answer.user_id == user_id,
+                    Quiz.id_type == quiz_type_id,
+                    Quiz.date < today,
+                    Answer.is_correct,
+                )
+                .order_by(Answer.answer_time)
+                .limit(3)
+                .all()
+            )
+            nb_attempts = [
+                session.query(Answer)
+                .filter(
+                    Answer.user_id == answer.user_id,
+                    Answer.quiz_id == answer.quiz_id,
+                    Answer.answer != BONUS_ANSWER,
+                )
+                .count()
+                for answer in fastest_answers
+            ]
+            dates = [answer.quiz.date for answer in fastest_answers]
+            results.append(
+                (played_quizzes, correct_quizzes, answers, nb_attempts, dates)
+            )
+        return results
+
+    def history(session):
+        return [
+            session.query(Answer)
+            .join(Quiz)
+            .filter(
+                Answer.user_id == user_id,
+                Quiz.id_type == quiz_type_id,
+                Quiz.date == today,
+            )
+            .all()
+            for quiz_type_id in range(1, 6)
+        ]
+
+    def queue(session):
+        dates = session.query(Quiz.date).filter(Quiz.date >= today).distinct().all()
+        return [
+            session.query(Quiz)
+            .filter(
+                Quiz.id_type == quiz_type_id, Quiz.date == quiz_date, Quiz.creator_id
+            )
+            .first()
+            for (quiz_date,) in dates
+            for quiz_type_id in range(1, 6)
+        ]
+
+    return {
+        "lb": lb,
+        "topspeed": topspeed,
+        "ct": ct,
+        "mystats": mystats,
+        "/history": history,
+        "/queue": queue,
+    }
+
+
+def read_model_paths(user_id: int, today) -> dict:
+    """The queries of each command with the read model."""
+
+    from poyuta import readmodel
+
+    def mystats(session):
+        return [
+            (
+                readmodel.nb_played_quizzes(session, user_id, quiz_type_id),
+                readmodel.user_answers(session, user_id, quiz_type_id),
+                readmodel.fastest_guesses(
+                    session,
+                    before=today,
+                    user_id=user_id,
+                    quiz_type_id=quiz_type_id,
+                    limit=3,
+                ),
+            )
+            for quiz_type_id in range(1, 6)
+        ]
+
+    return {
+        "lb": readmodel.user_ids,
+        "topspeed": lambda session: (
+            readmodel.has_answers(session),
+            readmodel.fastest_guesses(session, before=today),
+        ),
+        "ct": lambda session: readmodel.guesses_of_day(session, today),
+        "mystats": mystats,
+        "/history": lambda session: [
+            readmodel.user_answers(session, user_id, quiz_type_id, quiz_date=today)
+            for quiz_type_id in range(1, 6)
+        ],
+        "/queue": lambda session: readmodel.planned_quizzes(session, today),
+    }
+
+
+def measure(path, nb_runs: int) -> dict:
+    """Run a path in a new session each time, then once more under tracemalloc."""
+
+    from poyuta.database import SessionFactory, engine
+
+    nb_statements = nb_instances = 0
+
+    def count_statement(*args):
+        nonlocal nb_statements
+        nb_statements += 1
+
+    def count_instance(*args):
+        nonlocal nb_instances
+        nb_instances += 1
+
+    wall_times = []
+    for _ in range(nb_runs):
+        with SessionFactory() as session:
+            started = time.perf_counter()
+            path(session)
+            wall_times.append(time.perf_counter() - started)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    event.listen(SessionFactory, "loaded_as_persistent", count_instance)
+    tracemalloc.start()
+    try:
+        with SessionFactory() as session:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            started_size, _ = tracemalloc.get_traced_memory()
+            results = path(session)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            # blocks allocated by the path and still alive while the command
+            # holds its results
+            nb_blocks = sum(
+                stat.count_diff for stat in after.compare_to(before, "filename")
+            )
+            del results
+    finally:
+        tracemalloc.stop()
+        event.remove(engine, "before_cursor_execute", count_statement)
+        event.remove(SessionFactory, "loaded_as_persistent", count_instance)
+
+    return {
+        "wall_ms": statistics.median(wall_times) * 1000,
+        "peak_kb": (peak - started_size) / 1024,
+        "blocks": nb_blocks,
+        "statements": nb_statements,
+        "instances": nb_instances,
+    }
+
+
+def run(nb_runs: int) -> dict:
+    """Measure both paths of each command against the working directory's database."""
+
+    # imported here, once the working directory is set
+    from poyuta.database import Answer, SessionFactory
+    from poyuta.querycache import query_cache
+    from poyuta.utils import get_current_quiz_date
+
+    # every run queries the database, benchmarks.query_cache measures the cache
+    query_cache.max_bytes = 0
+
+    reset_time = datetime.strptime(
+        DUMMY_ENVIRONMENT["DAILY_QUIZ_RESET_TIME"], "%H:%M:%S"
+    ).time()
+    today = get_current_quiz_date(reset_time)
+
+    with SessionFactory() as session:
+        most_active_user_id = (
+            session.query(Answer.user_id)
+            .group_by(Answer.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+            .scalar()
+        )
+
+    paths = {
+        "orm": orm_paths(most_active_user_id, today),
+        "read model": read_model_paths(most_active_user_id, today),
+    }
+
+    return {
+        name: {kind: measure(paths[kind][name], nb_runs) for kind in paths}
+        for name in COMMANDS
+    }
+
+
+def print_results(results: dict):
+    print(
+        f"{'command':<10}{'path':<12}{'p50 ms':>9}{'peak KiB':>10}"
+        f"{'blocks':>9}{'stmts':>7}{'loaded':>8}"
+    )
+    for name, by_kind in results.items():
+        for kind, result in by_kind.items():
+            print(
+                f"{name:<10}{kind:<12}{result['wall_ms']:>9.1f}"
+                f"{result['peak_kb']:>10.0f}{result['blocks']:>9}"
+                f"{result['statements']:>7}{result['instances']:>8}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--tier",
+        choices=TIERS,
+        default="small",
+        help="scale tier of the synthetic database",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed runs of each path"
+    )
+    args = parser.parse_args()
+
+    os.environ.update(DUMMY_ENVIRONMENT)
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        # first, SQLAlchemy resolves the database's relative path on import
+        os.chdir(working_directory)
+        generate(Path("."), TIERS[args.tier]["users"], TIERS[args.tier]["years"])
+        results = run(args.repeat)
+
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
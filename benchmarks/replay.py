@@ -0,0 +1,299 @@
+"""
+Traffic replay: a day captured with TRAFFIC_CAPTURE_DIRECTORY, run again.
+
+Replays the prefix commands, slash commands and quiz button clicks of a
+capture file in order, against a copy of the database, at the original pace
+or faster. Prefix commands go through `PoyutaBot.invoke` like real ones, with
+their checks, rate limits and priorities. Discord is replaced by fake
+messages, interactions and channels, created at the time they are replayed,
+so answer times are the original ones divided by the speed.
+
+The copy's quizzes of the captured day are moved to today, so that the
+answers are checked against them: copy the database as it was before that
+day's reset, since the replay adds the day's answers to it.
+
+Reports how many commands were replayed, refused by a check and failed, and
+the latency percentiles of each command from the bot's command metrics.
+Exits with status 1 if any command failed. With `--speed 0`, commands run
+one at a time as fast as possible, for a deterministic replay.
+
+python -m benchmarks.replay traffic-2024-05-01.jsonl --directory /tmp/copy
+python -m benchmarks.replay traffic-2024-05-01.jsonl --directory /tmp/copy --speed 10
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# Discord
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+from discord.utils import snowflake_time, time_snowflake
+
+# Benchmarks
+from benchmarks.answer_timing import fake_user
+from benchmarks.commands import fake_message, send
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+# Capture
+from poyuta.capture import BUTTON, PREFIX, SLASH
+
+
+class ReplayContext(commands.Context):
+    """Context whose messages are dropped, and paginators stop right away."""
+
+    async def send(self, content=None, **kwargs):
+        return await send(content, **kwargs)
+
+    async def reply(self, content=None, **kwargs):
+        return await send(content, **kwargs)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, *args, **kwargs):
+        return await send(*args, **kwargs)
+
+
+def load_records(path: Path) -> list:
+    """Captured commands, in the order Discord received them."""
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda record: record["at"])
+
+
+def fake_message_at(record: dict, content: str, created_at: datetime):
+    message_id = time_snowflake(created_at)
+    guild = SimpleNamespace(id=record["guild"]) if record["guild"] else None
+    return SimpleNamespace(
+        id=message_id,
+        created_at=snowflake_time(message_id),
+        content=content,
+        author=fake_user(record["user"]),
+        guild=guild,
+        channel=FakeChannel(1),
+        attachments=[],
+        delete=fake_message().delete,
+        _state=None,
+    )
+
+
+def fake_interaction_at(record: dict, command, created_at: datetime):
+    interaction_id = time_snowflake(created_at)
+
+    async def defer(*args, **kwargs):
+        pass
+
+    return SimpleNamespace(
+        id=interaction_id,
+        created_at=snowflake_time(interaction_id),
+        user=fake_user(record["user"]),
+        guild_id=record["guild"],
+        guild=SimpleNamespace(id=record["guild"]) if record["guild"] else None,
+        channel=FakeChannel(1),
+        command=command,
+        data={"custom_id": record["name"]},
+        response=SimpleNamespace(defer=defer, send_message=send, is_done=lambda: False),
+        followup=SimpleNamespace(send=send),
+    )
+
+
+def move_captured_quizzes_to_today(records: list, reset_time):
+    """Make the quizzes of the captured day the ones answered today."""
+
+    # imported here, once the working directory is set
+    from poyuta.database import SessionFactory, Quiz
+    from poyuta.utils import get_current_quiz_date
+
+    captured_date = get_current_quiz_date(
+        reset_time, now=datetime.fromtimestamp(records[0]["at"] / 1000)
+    )
+    today = get_current_quiz_date(reset_time)
+    if captured_date == today:
+        return
+
+    with SessionFactory() as session:
+        # out of the way first, a day has one quiz of each type
+        session.query(Quiz).filter(Quiz.date == today).update(
+            {Quiz.date: today - timedelta(days=36500)}
+        )
+        session.query(Quiz).filter(Quiz.date == captured_date).update(
+            {Quiz.date: today}
+        )
+        session.commit()
+
+    print(f"quizzes of {captured_date} moved to {today}")
+
+
+async def run(records: list, speed: float) -> dict:
+    # imported here, once the working directory and environment are set
+    import poyuta.main as poyuta_main
+    from poyuta.metrics import command_metrics
+
+    bot = poyuta_main.bot
+
+    async def sync():
+        return []
+
+    # no connection to Discord
+    bot.tree.sync = sync
+    await bot.setup_hook()
+    bot.scheduler.shutdown(wait=False)
+    bot.flush_user_cache.cancel()
+
+    nb_replayed = Counter()
+    refused = Counter()
+    errors = Counter()
+
+    # no gateway to dispatch events to, only command errors are of interest
+    def dispatch(event_name, *args, **kwargs):
+        if event_name != "command_error":
+            return
+        ctx, error = args
+        if isinstance(error, commands.CheckFailure):
+            refused[ctx.command.qualified_name] += 1
+        else:
+            errors[f"{ctx.command.qualified_name}: {error}"] += 1
+
+    bot.dispatch = dispatch
+
+    buttons = {
+        button.custom_id: button for button in poyuta_main.NewQuizView().children
+    }
+
+    async def replay(record: dict):
+        created_at = datetime.now(timezone.utc)
+        kind, name = record["kind"], record["name"]
+
+        try:
+            if kind == PREFIX and bot.get_command(name):
+                prefix = poyuta_main.config["COMMAND_PREFIX"]
+                message = fake_message_at(
+                    record, f"{prefix}{name} {record['args']}".strip(), created_at
+                )
+                ctx = ReplayContext(
+                    message=message,
+                    bot=bot,
+                    view=StringView(record["args"]),
+                    prefix=prefix,
+                    invoked_with=name,
+                    command=bot.get_command(name),
+                )
+                await bot.invoke(ctx)
+
+            elif kind == SLASH and bot.tree.get_command(name):
+                command = bot.tree.get_command(name)
+                interaction = fake_interaction_at(record, command, created_at)
+                if await bot.tree.interaction_check(interaction):
+                    try:
+                        await command.callback(interaction, **record["args"])
+                    finally:
+                        poyuta_main.finish_instrumentation()
+
+            elif kind == BUTTON and name in buttons:
+                await buttons[name].callback(
+                    fake_interaction_at(record, None, created_at)
+                )
+
+            else:
+                return
+        except Exception as error:
+            errors[f"{name}: {error!r}"] += 1
+
+        nb_replayed[kind] += 1
+
+    started = time.perf_counter()
+    if speed:
+        first_at = records[0]["at"]
+
+        async def replay_at(record: dict):
+            await asyncio.sleep((record["at"] - first_at) / 1000 / speed)
+            await replay(record)
+
+        await asyncio.gather(*(replay_at(record) for record in records))
+    else:
+        for record in records:
+            await replay(record)
+    elapsed = time.perf_counter() - started
+
+    bot.loop_lag_monitor.stop()
+
+    return {
+        "elapsed": elapsed,
+        "replayed": nb_replayed,
+        "refused": refused,
+        "errors": errors,
+        "latencies": {
+            name: metrics.wall_time.summary()
+            for name, metrics in sorted(command_metrics.commands.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("capture", type=Path, help="capture file of a day")
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        required=True,
+        help="replay against the copy of the database in DIRECTORY/database/poyuta.db",
+    )
+    parser.add_argument(
+        "--reset-time",
+        default=DUMMY_ENVIRONMENT["DAILY_QUIZ_RESET_TIME"],
+        help="daily quiz reset time of the bot that captured the traffic, HH:MM:SS",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1,
+        help="how many times faster than the original, 0 for one at a time",
+    )
+    args = parser.parse_args()
+
+    records = load_records(args.capture)
+    if not records:
+        print(f"nothing to replay in {args.capture}")
+        return
+
+    os.environ.update(DUMMY_ENVIRONMENT, DAILY_QUIZ_RESET_TIME=args.reset_time)
+    # first, SQLAlchemy resolves the database's relative path on import
+    os.chdir(args.directory)
+
+    reset_time = datetime.strptime(args.reset_time, "%H:%M:%S").time()
+    move_captured_quizzes_to_today(records, reset_time)
+
+    outcome = asyncio.run(run(records, args.speed))
+
+    replayed = ", ".join(
+        f"{count} {kind}" for kind, count in outcome["replayed"].items()
+    )
+    print(
+        f"{sum(outcome['replayed'].values())} of {len(records)} command(s) "
+        f"replayed in {outcome['elapsed']:.1f}s: {replayed}"
+    )
+    print(f"  refused by a check: {sum(outcome['refused'].values())}")
+    for name, latency in outcome["latencies"].items():
+        print(f"  {name:<20} {latency}")
+
+    for error, count in outcome["errors"].most_common(10):
+        print(f"FAIL: {count} x {error}")
+
+    sys.exit(1 if outcome["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+Reset burst load test: the bot under the rush of players at the daily reset.
+
+Against a synthetic database, simulated users click the `NewQuizButton` of a
+few quiz types right after the reset, most of them in the first seconds, then
+send wrong and right guesses through `answer_quiz_type` and bonus guesses
+through `answer_bonus_quiz`, while a few others run `!lb` and `!mystats`
+through the analytical command queue. Discord is replaced by lightweight
+fake interactions, contexts and channels, whose snowflake IDs encode when
+each user acted.
+
+The paginators of `!lb` and `!mystats` wait for clicks, which never come,
+as they would for a user who reads the first page and leaves: they are
+stopped once every analyst got their first page.
+
+Reports the throughput, the latency of each kind of operation from when
+the user acted to when the bot replied, the "database is locked" errors, and
+the skew between the recorded answer times and the ones the users took.
+Exits with status 1 if any operation failed, any analytical command never
+replied or blocked the event loop, the p95 latency of the answers is above
+`--max-answer-p95-ms` or any answer time is off by more than a millisecond.
+
+python -m benchmarks.reset_burst
+python -m benchmarks.reset_burst --users 500 --window 5 --tier medium
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# Discord
+from discord.utils import snowflake_time, time_snowflake
+
+# Database
+from sqlalchemy.exc import OperationalError
+
+# Benchmarks
+from benchmarks.answer_timing import TOLERANCE_SECONDS, fake_user
+from benchmarks.commands import fake_message
+from benchmarks.generate_database import FIRST_USER_ID, TIERS, generate
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+# simulated players get IDs of their own, apart from the generated users
+FIRST_PLAYER_ID = 1_000
+
+# quiz types played by each player, and how long they think before a guess
+MAX_QUIZ_TYPES_PLAYED = 3
+THINK_SECONDS = (0.5, 4.0)
+
+# how long after the players are done the analysts must have their pages
+ANALYST_REPLY_SECONDS = 60
+
+# slowest p95 latency of the answers, while the analytical commands run
+MAX_ANSWER_P95_MS = 3000
+
+
+class Recorder:
+    """Latency of each kind of operation, and the errors they raised."""
+
+    def __init__(self):
+        # imported here, once the working directory and environment are set
+        from poyuta.metrics import LatencyHistogram
+
+        self.latencies = defaultdict(lambda: LatencyHistogram(size=100_000))
+        self.errors = Counter()
+        self.nb_lock_errors = 0
+        self.last_reply = None
+
+    def replied(self, kind: str, sent_at: datetime):
+        latency = datetime.now(timezone.utc) - sent_at
+        self.latencies[kind].add(latency.total_seconds())
+        self.last_reply = time.perf_counter()
+
+    async def run(self, kind: str, operation):
+        try:
+            await operation
+        except OperationalError as error:
+            if "database is locked" in str(error):
+                self.nb_lock_errors += 1
+            else:
+                self.errors[f"{kind}: {error}"] += 1
+        except Exception as error:
+            self.errors[f"{kind}: {error!r}"] += 1
+
+
+class FakeChannel:
+    """A text channel, only counting what is sent to it."""
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+        self.nb_messages = 0
+
+    async def send(self, *args, **kwargs):
+        self.nb_messages += 1
+        return fake_message()
+
+
+def fake_interaction(user, created_at: datetime, kind: str, recorder: Recorder):
+    """A button click received by Discord at `created_at`."""
+
+    async def send_message(*args, **kwargs):
+        recorder.replied(kind, interaction.created_at)
+
+    interaction_id = time_snowflake(created_at)
+    interaction = SimpleNamespace(
+        id=interaction_id,
+        created_at=snowflake_time(interaction_id),
+        user=user,
+        response=SimpleNamespace(send_message=send_message),
+    )
+    return interaction
+
+
+def fake_context(user, channel, created_at: datetime, kind: str, recorder: Recorder):
+    """A command message received by Discord at `created_at`.
+
+    Only its first reply counts for the latency.
+    """
+
+    replies = []
+
+    async def send(*args, **kwargs):
+        if not replies:
+            recorder.replied(kind, message.created_at)
+        replies.append(kwargs)
+        return fake_message()
+
+    message_id = time_snowflake(created_at)
+    message = SimpleNamespace(
+        id=message_id,
+        created_at=snowflake_time(message_id),
+        delete=fake_message().delete,
+    )
+    return SimpleNamespace(
+        author=user,
+        channel=channel,
+        message=message,
+        send=send,
+        reply=send,
+        replies=replies,
+    )
+
+
+def discord_time(moment: datetime) -> datetime:
+    """A moment to the millisecond, as encoded in a snowflake ID."""
+
+    return snowflake_time(time_snowflake(moment))
+
+
+async def sleep_until(moment: datetime):
+    await asyncio.sleep((moment - datetime.now(timezone.utc)).total_seconds())
+
+
+async def run(nb_players: int, nb_analysts: int, window: float, seed: int) -> dict:
+    # imported here, once the working directory and environment are set
+    import poyuta.main as poyuta_main
+    from poyuta.cache import reference_data
+    from poyuta.database import Answer
+    from poyuta.priority import ANALYTICAL
+
+    bot = poyuta_main.bot
+    rng = random.Random(seed)
+
+    async def sync():
+        return []
+
+    # no connection to Discord
+    bot.tree.sync = sync
+    await bot.setup_hook()
+    bot.scheduler.shutdown(wait=False)
+    bot.flush_user_cache.cancel()
+
+    recorder = Recorder()
+    channel = FakeChannel(1)
+    quiz_types = reference_data.quiz_types
+    quiz_date = poyuta_main.get_current_quiz_date(poyuta_main.DAILY_QUIZ_RESET_TIME)
+    quizzes = {
+        quiz_type.id: bot.get_quiz(quiz_type.id, quiz_date) for quiz_type in quiz_types
+    }
+    buttons = {
+        quiz_type.id: poyuta_main.NewQuizButton(quiz_type) for quiz_type in quiz_types
+    }
+
+    # answer times each player should get, by (user ID, quiz ID)
+    expected_times = {}
+    expected_bonus_times = {}
+
+    reset_at = datetime.now(timezone.utc) + timedelta(seconds=0.5)
+
+    async def play(user, quiz_type):
+        quiz = quizzes[quiz_type.id]
+
+        # most players click in the first seconds after the reset
+        clicked_at = discord_time(
+            reset_at + timedelta(seconds=min(rng.expovariate(4 / window), window))
+        )
+        await sleep_until(clicked_at)
+        await recorder.run(
+            "click",
+            buttons[quiz_type.id].callback(
+                fake_interaction(user, clicked_at, "click", recorder)
+            ),
+        )
+
+        # a few wrong guesses, then the right one unless they give up
+        guesses = ["Nobody"] * rng.randint(0, 3)
+        if rng.random() < 0.8:
+            guesses.append(quiz.answer.split("|")[0])
+
+        sent_at = clicked_at
+        for guess in guesses:
+            sent_at = discord_time(
+                sent_at + timedelta(seconds=rng.uniform(*THINK_SECONDS))
+            )
+            await sleep_until(sent_at)
+            await recorder.run(
+                "answer",
+                poyuta_main.answer_quiz_type(
+                    ctx=fake_context(user, channel, sent_at, "answer", recorder),
+                    quiz_type_id=quiz_type.id,
+                    quiz_type_name=quiz_type.type,
+                    answer=guess,
+                ),
+            )
+        if guesses and guesses[-1] != "Nobody":
+            expected_times[(user.id, quiz.id)] = (sent_at - clicked_at).total_seconds()
+
+        if not quiz.bonus_answer or (user.id, quiz.id) not in expected_times:
+            return
+        if rng.random() >= 0.6:
+            return
+
+        bonus_guesses = ["Nobody"] * rng.randint(0, 2)
+        if rng.random() < 0.7:
+            bonus_guesses.append(quiz.bonus_answer.split("|")[0])
+
+        for guess in bonus_guesses:
+            sent_at = discord_time(
+                sent_at + timedelta(seconds=rng.uniform(*THINK_SECONDS))
+            )
+            await sleep_until(sent_at)
+            await recorder.run(
+                "bonus",
+                poyuta_main.answer_bonus_quiz(
+                    ctx=fake_context(user, channel, sent_at, "bonus", recorder),
+                    quiz_type_id=quiz_type.id,
+                    quiz_type_name=quiz_type.type,
+                    answer=guess,
+                ),
+            )
+        if bonus_guesses and bonus_guesses[-1] != "Nobody":
+            expected_bonus_times[(user.id, quiz.id)] = (
+                sent_at - clicked_at
+            ).total_seconds()
+
+    async def analyze(user, name: str, callback):
+        sent_at = reset_at + timedelta(seconds=rng.uniform(0, window))
+        await sleep_until(sent_at)
+
+        ctx = fake_context(user, channel, sent_at, name, recorder)
+        analyst_contexts[(user.id, name)] = ctx
+
+        # the way PoyutaBot.invoke runs analytical commands
+        async def invoke():
+            async with bot.command_scheduler.slot(ANALYTICAL) as slot:
+                ctx.command_slot = slot
+                poyuta_main.start_instrumentation(name)
+                try:
+                    await callback(ctx)
+                finally:
+                    poyuta_main.finish_instrumentation()
+
+        await recorder.run(name, invoke())
+
+    tasks = []
+    for index in range(nb_players):
+        user = fake_user(FIRST_PLAYER_ID + index)
+        played = rng.sample(quiz_types, rng.randint(1, MAX_QUIZ_TYPES_PLAYED))
+        tasks.extend(play(user, quiz_type) for quiz_type in played)
+
+    # analysts look at the stats of generated users, who have some
+    analyst_contexts = {}
+    analyses = {}
+    for index in range(nb_analysts):
+        user = fake_user(FIRST_USER_ID + index)
+        for name, command in (
+            ("mystats", poyuta_main.my_stats),
+            ("lb", poyuta_main.leaderboard),
+        ):
+            analyses[(user.id, name)] = asyncio.create_task(
+                analyze(user, name, command.callback)
+            )
+
+    def has_replied(key) -> bool:
+        ctx = analyst_contexts.get(key)
+        return analyses[key].done() or bool(ctx and ctx.replies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+
+    # as for real users, the paginators wait for clicks until their timeout:
+    # once every analyst got their first page, stop waiting for the clicks.
+    # Paginators holding an analytical slot would keep the others from ever
+    # replying, hence the deadline
+    deadline = time.perf_counter() + window + ANALYST_REPLY_SECONDS
+    while not all(map(has_replied, analyses)) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = recorder.last_reply - started
+    nb_unanswered = sum(not has_replied(key) for key in analyses)
+    nb_waiting_paginators = sum(not task.done() for task in analyses.values())
+    queue = bot.command_scheduler.summary()
+    for task in analyses.values():
+        task.cancel()
+    await asyncio.gather(*analyses.values(), return_exceptions=True)
+
+    bot.loop_lag_monitor.stop()
+    # blocks of the event loop caught in the code of an analytical command
+    analytical_lags = Counter(
+        event.command
+        for event in bot.loop_lag_monitor.events
+        if event.command in poyuta_main.ANALYTICAL_COMMANDS
+    )
+
+    with bot.session as session:
+        quiz_ids = [quiz.id for quiz in quizzes.values()]
+        rows = (
+            session.query(
+                Answer.user_id,
+                Answer.quiz_id,
+                Answer.answer_time,
+                Answer.is_correct,
+                Answer.is_bonus_point,
+            )
+            .filter(
+                Answer.quiz_id.in_(quiz_ids),
+                Answer.user_id >= FIRST_PLAYER_ID,
+                Answer.user_id < FIRST_PLAYER_ID + nb_players,
+                Answer.is_correct | Answer.is_bonus_point,
+            )
+            .all()
+        )
+
+    recorded_times = {
+        (user_id, quiz_id): answer_time
+        for user_id, quiz_id, answer_time, is_correct, _ in rows
+        if is_correct
+    }
+    recorded_bonus_times = {
+        (user_id, quiz_id): answer_time
+        for user_id, quiz_id, answer_time, _, is_bonus_point in rows
+        if is_bonus_point
+    }
+
+    skews, nb_missing = [], 0
+    for expected, recorded in (
+        (expected_times, recorded_times),
+        (expected_bonus_times, recorded_bonus_times),
+    ):
+        for key, expected_time in expected.items():
+            if key in recorded:
+                skews.append(abs(recorded[key] - expected_time))
+            else:
+                nb_missing += 1
+
+    return {
+        "elapsed": elapsed,
+        "recorder": recorder,
+        "skews": skews,
+        "nb_missing": nb_missing,
+        "queue": queue,
+        "nb_waiting_paginators": nb_waiting_paginators,
+        "nb_unanswered": nb_unanswered,
+        "analytical_lags": analytical_lags,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--users", type=int, default=200, help="number of simulated players"
+    )
+    parser.add_argument(
+        "--analysts",
+        type=int,
+        default=5,
+        help="number of users running !lb and !mystats during the burst",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=10,
+        help="seconds after the reset within which the players click",
+    )
+    parser.add_argument(
+        "--tier",
+        choices=TIERS,
+        default="small",
+        help="scale tier of the synthetic database the burst runs against",
+    )
+    parser.add_argument(
+        "--max-answer-p95-ms",
+        type=float,
+        default=MAX_ANSWER_P95_MS,
+        help="fail if the p95 latency of the answers is above it",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.update(DUMMY_ENVIRONMENT)
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        # first, SQLAlchemy resolves the database's relative path on import
+        os.chdir(working_directory)
+        generate(Path("."), TIERS[args.tier]["users"], TIERS[args.tier]["years"])
+        outcome = asyncio.run(run(args.users, args.analysts, args.window, args.seed))
+
+    recorder, skews = outcome["recorder"], outcome["skews"]
+    nb_operations = sum(histogram.count for histogram in recorder.latencies.values())
+
+    print(
+        f"{args.users} player(s) and {args.analysts} analyst(s): {nb_operations} "
+        f"operation(s) in {outcome['elapsed']:.1f}s, "
+        f"{nb_operations / outcome['elapsed']:.1f} op/s"
+    )
+    for kind, histogram in sorted(recorder.latencies.items()):
+        print(f"  {kind:<8} {histogram.summary()}")
+    print(
+        f"  analytical queue, with {outcome['nb_waiting_paginators']} paginator(s) "
+        f"waiting for clicks:\n{outcome['queue']}"
+    )
+    print(f"  database locked errors: {recorder.nb_lock_errors}")
+    print(
+        f"  answer time skew: median {statistics.median(skews or [0]) * 1000:.2f}ms, "
+        f"max {max(skews, default=0) * 1000:.2f}ms ({len(skews)} answers)"
+    )
+
+    failed = False
+
+    for error, count in recorder.errors.most_common(10):
+        print(f"FAIL: {count} x {error}")
+        failed = True
+
+    if recorder.nb_lock_errors:
+        print(f"FAIL: {recorder.nb_lock_errors} operation(s) hit a locked database")
+        failed = True
+
+    if outcome["nb_unanswered"]:
+        print(
+            f"FAIL: {outcome['nb_unanswered']} analytical command(s) never replied, "
+            "stuck behind the paginators waiting for clicks"
+        )
+        failed = True
+
+    if outcome["nb_missing"]:
+        print(f"FAIL: {outcome['nb_missing']} right answer(s) not recorded")
+        failed = True
+
+    for command, count in outcome["analytical_lags"].items():
+        print(f"FAIL: {command} blocked the event loop {count} time(s)")
+        failed = True
+
+    answer_p95 = recorder.latencies["answer"].percentile(95) * 1000
+    if answer_p95 > args.max_answer_p95_ms:
+        print(
+            f"FAIL: answer p95 {answer_p95:.0f}ms, above {args.max_answer_p95_ms:.0f}ms"
+        )
+        failed = True
+
+    if max(skews, default=0) > TOLERANCE_SECONDS:
+        print(f"FAIL: answer times off by more than {TOLERANCE_SECONDS * 1000:.0f}ms")
+        failed = True
+
+    if not failed:
+        print("OK")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Startup benchmark: how long `import poyuta.main` takes.
+
+Runs `python -X importtime -c "import poyuta.main"` in a fresh interpreter,
+in an empty working directory so that nothing is read from or written to the
+real database, and reports the cumulative import time of `poyuta.main` along
+with the slowest top-level imports. Exits with status 1 if the median import
+time is over budget, or if the import created any file.
+
+python -m benchmarks.startup
+python -m benchmarks.startup --runs 10 --budget-ms 1000
+"""
+
+# Standard library imports
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# cumulative import time of poyuta.main we want to stay under
+DEFAULT_BUDGET_MS = 1000
+
+REPOSITORY_PATH = Path(__file__).resolve().parent.parent
+
+# enough configuration for poyuta.main to be importable
+DUMMY_ENVIRONMENT = {
+    "BOT_SECRET_TOKEN": "benchmark",
+    "COMMAND_PREFIX": "!",
+    "DAILY_QUIZ_RESET_TIME": "18:00:00",
+    "DEFAULT_ADMIN_NAME": "benchmark",
+    "DEFAULT_ADMIN_ID": "0",
+    "USE_HISTORIC_DATA": "",
+}
+
+# the settings making the bot write files, enabled when importing it so that
+# any file they create at import is caught
+FILE_WRITING_ENVIRONMENT = {
+    "SLOW_QUERY_THRESHOLD_MS": "100",
+    "TRAFFIC_CAPTURE_DIRECTORY": "traffic",
+    "METRICS_PROMETHEUS_PATH": "metrics.prom",
+}
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Parse the output of `-X importtime`.
+
+    Returns
+    -------
+    dict
+        (self time, cumulative time, depth) by module name, times in
+        microseconds. Modules imported by the `-c` statement have a depth of 0,
+        the modules they import a depth of 1, and so on.
+    """
+
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # header line
+            continue
+
+        # one space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+
+    return modules
+
+
+def run_once() -> dict:
+    """Import poyuta.main once in a fresh interpreter and an empty directory."""
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        environment = {
+            **os.environ,
+            **DUMMY_ENVIRONMENT,
+            **FILE_WRITING_ENVIRONMENT,
+            "PYTHONPATH": str(REPOSITORY_PATH),
+        }
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import poyuta.main"],
+            cwd=working_directory,
+            env=environment,
+            capture_output=True,
+            text=True,
+        )
+
+        if process.returncode != 0:
+            raise RuntimeError(f"import poyuta.main failed:\n{process.stderr}")
+
+        side_effects = sorted(
+            str(path.relative_to(working_directory))
+            for path in Path(working_directory).rglob("*")
+        )
+
+    modules = parse_importtime(process.stderr)
+    modules["__side_effects__"] = side_effects
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="number of imports")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="maximum median import time of poyuta.main",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of slowest imports to show"
+    )
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+
+    import_times_ms = [run["poyuta.main"][1] / 1000 for run in runs]
+    median_ms = statistics.median(import_times_ms)
+
+    # slowest imports done directly by poyuta.main, from the median run
+    median_run = sorted(runs, key=lambda run: run["poyuta.main"][1])[len(runs) // 2]
+    direct_imports = []
+    for name, value in median_run.items():
+        if name == "__side_effects__":
+            continue
+
+        _, cumulative_us, depth = value
+        if depth == 1:
+            direct_imports.append((cumulative_us, name))
+    direct_imports.sort(reverse=True)
+
+    print(f"import poyuta.main: median {median_ms:.0f}ms over {args.runs} run(s)")
+    print(f"  min {min(import_times_ms):.0f}ms, max {max(import_times_ms):.0f}ms")
+    print("slowest imports of poyuta.main:")
+    for cumulative_us, name in direct_imports[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    failed = False
+
+    side_effects = sorted({path for run in runs for path in run["__side_effects__"]})
+    if side_effects:
+        print(f"FAIL: importing poyuta.main created {side_effects}")
+        failed = True
+
+    if median_ms > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f}ms budget")
+        failed = True
+    else:
+        print(f"OK: within the {args.budget_ms:.0f}ms budget")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
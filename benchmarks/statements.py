@@ -0,0 +1,307 @@
+"""
+Statement benchmark: hot-path statements rebuilt on each call, or prebuilt.
+
+For each statement of `poyuta.statements`, measures, in microseconds per
+call:
+
+- build: constructing the statement as the bot did before on each call,
+  and computing its cache key, which SQLAlchemy needs to find the compiled
+  form, against the cache key of the prebuilt statement
+- execute: running the query as it was written before, against running the
+  prebuilt statement with its parameters, on a synthetic database, in a
+  transaction rolled back at the end
+
+python -m benchmarks.statements
+python -m benchmarks.statements --runs 5000
+"""
+
+# Standard library imports
+import argparse
+import os
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+# Database
+from sqlalchemy import (
+    DateTime,
+    String,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Benchmarks
+from benchmarks.generate_database import TIERS, generate
+from benchmarks.startup import DUMMY_ENVIRONMENT
+
+
+def rebuilt_submit_answer(user_id: int, quiz_id: int, answer_time: datetime):
+    """The conditional INSERT of a seiyuu answer, as it was built on each guess."""
+
+    from poyuta.database import Answer, UserStartQuizTimestamp
+
+    can_answer = ~exists().where(
+        Answer.user_id == user_id, Answer.quiz_id == quiz_id, Answer.is_correct
+    )
+    answer_duration = func.round(
+        (
+            func.julianday(literal(answer_time, DateTime), "utc")
+            - func.julianday(UserStartQuizTimestamp.timestamp, "utc")
+        )
+        * 86400,
+        3,
+    )
+    rows = select(
+        literal(user_id),
+        literal(quiz_id),
+        literal("Seiyuu 1"),
+        literal(None, String),
+        literal(False),
+        literal(False),
+        answer_duration,
+    ).where(
+        UserStartQuizTimestamp.user_id == user_id,
+        UserStartQuizTimestamp.quiz_id == quiz_id,
+        can_answer,
+    )
+    return (
+        insert(Answer)
+        .from_select(
+            [
+                Answer.user_id,
+                Answer.quiz_id,
+                Answer.answer,
+                Answer.bonus_answer,
+                Answer.is_correct,
+                Answer.is_bonus_point,
+                Answer.answer_time,
+            ],
+            rows,
+        )
+        .returning(Answer.answer_time)
+    )
+
+
+def cases(session, quiz, user_id: int) -> dict:
+    """(rebuild, run as before, run prebuilt) of each statement."""
+
+    from poyuta import statements
+    from poyuta.database import (
+        BONUS_ANSWER,
+        Answer,
+        Quiz,
+        User,
+        UserStartQuizTimestamp,
+    )
+
+    quiz_parameters = {"quiz_type_id": quiz.id_type, "quiz_date": quiz.date}
+    answer_parameters = {"user_id": user_id, "quiz_id": quiz.id}
+    answer_time = datetime.now()
+    users = [{"id": user_id, "name": "user", "pfp": None, "is_admin": False}]
+
+    def upsert_user():
+        statement = sqlite_insert(User).values(users)
+        return statement.on_conflict_do_update(
+            index_elements=[User.id],
+            set_={"name": statement.excluded.name, "pfp": statement.excluded.pfp},
+        )
+
+    def start_quiz_before():
+        # loaded the quiz and every start timestamp of it
+        current_quiz = session.get(Quiz, quiz.id)
+        if user_id not in [
+            start_time.user_id for start_time in current_quiz.start_quiz_timestamps
+        ]:
+            session.add(
+                UserStartQuizTimestamp(
+                    user_id=user_id, quiz_id=quiz.id, timestamp=answer_time
+                )
+            )
+            session.flush()
+        session.expire_all()
+
+    return {
+        "QUIZ_OF_DAY": (
+            lambda: select(Quiz.id, Quiz.answer, Quiz.bonus_answer)
+            .where(Quiz.id_type == quiz.id_type, Quiz.date == quiz.date)
+            .limit(1),
+            lambda: session.query(Quiz.id, Quiz.answer, Quiz.bonus_answer)
+            .filter(Quiz.id_type == quiz.id_type, Quiz.date == quiz.date)
+            .first(),
+            lambda: session.execute(statements.QUIZ_OF_DAY, quiz_parameters).first(),
+        ),
+        "QUIZ_IDS_OF_DAY": (
+            lambda: select(Quiz.id_type, Quiz.id).where(Quiz.date == quiz.date),
+            lambda: dict(
+                session.query(Quiz.id_type, Quiz.id).filter(Quiz.date == quiz.date)
+            ),
+            lambda: dict(
+                session.execute(
+                    statements.QUIZ_IDS_OF_DAY, {"quiz_date": quiz.date}
+                ).all()
+            ),
+        ),
+        "HAS_CORRECT_ANSWER": (
+            lambda: select(Answer).where(
+                Answer.user_id == user_id, Answer.quiz_id == quiz.id, Answer.is_correct
+            ),
+            lambda: session.query(Answer)
+            .filter(
+                Answer.user_id == user_id, Answer.quiz_id == quiz.id, Answer.is_correct
+            )
+            .first(),
+            lambda: session.execute(
+                statements.HAS_CORRECT_ANSWER, answer_parameters
+            ).scalar(),
+        ),
+        "HAS_BONUS_POINT": (
+            lambda: select(Answer).where(
+                Answer.user_id == user_id,
+                Answer.quiz_id == quiz.id,
+                Answer.is_bonus_point,
+            ),
+            lambda: session.query(Answer)
+            .filter(
+                Answer.user_id == user_id,
+                Answer.quiz_id == quiz.id,
+                Answer.is_bonus_point,
+            )
+            .first(),
+            lambda: session.execute(
+                statements.HAS_BONUS_POINT, answer_parameters
+            ).scalar(),
+        ),
+        "START_QUIZ": (
+            lambda: insert(UserStartQuizTimestamp).values(
+                user_id=user_id, quiz_id=quiz.id, timestamp=answer_time
+            ),
+            start_quiz_before,
+            lambda: session.execute(
+                statements.START_QUIZ, {**answer_parameters, "timestamp": answer_time}
+            ),
+        ),
+        "ATTEMPT_COUNTS": (
+            lambda: select(Answer.user_id, func.count(Answer.id))
+            .where(
+                Answer.quiz_id == quiz.id,
+                Answer.user_id.in_([user_id]),
+                Answer.answer != BONUS_ANSWER,
+            )
+            .group_by(Answer.user_id),
+            lambda: session.query(Answer.user_id, func.count(Answer.id))
+            .filter(
+                Answer.quiz_id == quiz.id,
+                Answer.user_id.in_([user_id]),
+                Answer.answer != BONUS_ANSWER,
+            )
+            .group_by(Answer.user_id)
+            .all(),
+            lambda: session.execute(
+                statements.ATTEMPT_COUNTS,
+                {"quiz_id": quiz.id, "user_ids": [user_id]},
+            ).all(),
+        ),
+        "SUBMIT_ANSWER": (
+            lambda: rebuilt_submit_answer(user_id, quiz.id, answer_time),
+            lambda: session.execute(
+                rebuilt_submit_answer(user_id, quiz.id, answer_time)
+            ).scalar(),
+            lambda: session.execute(
+                statements.SUBMIT_ANSWER,
+                {
+                    **answer_parameters,
+                    "answer": "Seiyuu 1",
+                    "bonus_answer": None,
+                    "is_correct": False,
+                    "is_bonus_point": False,
+                    "answer_time": answer_time,
+                },
+            ).scalar(),
+        ),
+        "UPSERT_USER": (
+            upsert_user,
+            lambda: session.execute(upsert_user()),
+            lambda: session.execute(statements.UPSERT_USER, users),
+        ),
+    }
+
+
+def per_call_us(function, nb_runs: int) -> float:
+    # warm up SQLAlchemy's compiled cache first
+    function()
+    return timeit.timeit(function, number=nb_runs) / nb_runs * 1_000_000
+
+
+def run(nb_runs: int) -> dict:
+    """Measure each statement against the working directory's database."""
+
+    # imported here, once the working directory is set
+    from poyuta import statements
+    from poyuta.database import Quiz, SessionFactory, UserStartQuizTimestamp
+
+    results = {}
+    with SessionFactory() as session:
+        # a played quiz, and one of its players
+        quiz = session.query(Quiz).join(UserStartQuizTimestamp).first()
+        user_id = (
+            session.query(UserStartQuizTimestamp.user_id)
+            .filter(UserStartQuizTimestamp.quiz_id == quiz.id)
+            .limit(1)
+            .scalar()
+        )
+
+        for name, (rebuild, before, prebuilt) in cases(session, quiz, user_id).items():
+            statement = getattr(statements, name)
+            results[name] = {
+                "build_before": per_call_us(
+                    lambda: rebuild()._generate_cache_key(), nb_runs
+                ),
+                "build_after": per_call_us(
+                    lambda: statement._generate_cache_key(), nb_runs
+                ),
+                "execute_before": per_call_us(before, nb_runs),
+                "execute_after": per_call_us(prebuilt, nb_runs),
+            }
+
+        session.rollback()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--runs", type=int, default=1000, help="number of calls of each statement"
+    )
+    parser.add_argument(
+        "--tier",
+        choices=TIERS,
+        default="small",
+        help="scale tier of the synthetic database",
+    )
+    args = parser.parse_args()
+
+    os.environ.update(DUMMY_ENVIRONMENT)
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        # first, SQLAlchemy resolves the database's relative path on import
+        os.chdir(working_directory)
+        generate(Path("."), TIERS[args.tier]["users"], TIERS[args.tier]["years"])
+        results = run(args.runs)
+
+    print(f"{'statement':<20}{'build us':>20}{'execute us':>22}")
+    print(f"{'':<20}{'before':>10}{'after':>10}{'before':>11}{'after':>11}")
+    for name, result in results.items():
+        print(
+            f"{name:<20}{result['build_before']:>10.1f}{result['build_after']:>10.1f}"
+            f"{result['execute_before']:>11.0f}{result['execute_after']:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
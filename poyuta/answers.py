@@ -0,0 +1,111 @@
+"""
+Answer submission.
+
+An answer is checked against the cached quiz in memory, then stored by a
+single conditional INSERT which also reads when the user started the quiz and
+makes sure they may still answer it, so that two answers sent at once can't
+both get the point.
+"""
+
+# Standard library imports
+import asyncio
+import weakref
+from datetime import datetime
+from typing import Optional
+
+# Database
+from sqlalchemy.orm.session import Session
+from poyuta.statements import SUBMIT_ANSWER, SUBMIT_BONUS_ANSWER
+
+# Results
+from poyuta.results import BONUS_ANSWER
+
+# lock of each (user ID, quiz ID) being answered, dropped once no one holds it
+_answer_locks = weakref.WeakValueDictionary()
+
+
+def answer_lock(user_id: int, quiz_id: int) -> asyncio.Lock:
+    """Get the lock serializing the answers of a user to a quiz.
+
+    Answers of other users, or to other quizzes, never wait on it.
+    """
+
+    key = (user_id, quiz_id)
+    lock = _answer_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _answer_locks[key] = lock
+    return lock
+
+
+def submit_answer(
+    session: Session,
+    user_id: int,
+    quiz_id: int,
+    answer: str,
+    answer_time: datetime,
+    is_correct: bool = False,
+    bonus_answer: Optional[str] = None,
+    is_bonus_point: bool = False,
+) -> Optional[float]:
+    """Store an answer if the user may still answer, in a single statement.
+
+    A seiyuu answer is stored if the user started the quiz and hasn't answered
+    it correctly yet. A bonus answer, when `bonus_answer` is given, if the user
+    answered the quiz correctly and hasn't got the bonus point yet.
+
+    Parameters
+    ----------
+    session : Session
+        Database session, committed.
+
+    user_id : int
+        Discord user ID.
+
+    quiz_id : int
+        Quiz ID.
+
+    answer : str
+        The seiyuu answer, ignored for a bonus answer.
+
+    answer_time : datetime
+        When the user answered, as stored in the database.
+
+    is_correct : bool, optional
+        Whether the seiyuu answer is correct, by default False.
+
+    bonus_answer : Optional[str], optional
+        The bonus answer, by default None for a seiyuu answer.
+
+    is_bonus_point : bool, optional
+        Whether the bonus answer is correct, by default False.
+
+    Returns
+    -------
+    Optional[float]
+        Answer time in seconds since the user started the quiz, None if the
+        answer wasn't stored.
+    """
+
+    if bonus_answer is None:
+        statement = SUBMIT_ANSWER
+    else:
+        statement = SUBMIT_BONUS_ANSWER
+        answer = BONUS_ANSWER
+
+    answer_duration = session.execute(
+        statement,
+        {
+            "user_id": user_id,
+            "quiz_id": quiz_id,
+            "answer": answer,
+            "bonus_answer": bonus_answer,
+            "is_correct": is_correct,
+            "is_bonus_point": is_bonus_point,
+            "answer_time": answer_time,
+        },
+    ).scalar()
+    session.commit()
+
+    # SQLite hands back whole seconds as integers
+    return float(answer_duration) if answer_duration is not None else None
@@ -0,0 +1,145 @@
+"""
+Send the same messages to many channels at once.
+"""
+
+# Standard library imports
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, List
+
+# Discord
+import discord
+from aiohttp import ClientError
+from discord.ext import commands
+
+# network errors worth retrying, on top of Discord's 5xx and 429 responses
+TRANSIENT_ERRORS = (ClientError, asyncio.TimeoutError)
+
+
+class BroadcastReport:
+    """Outcome of a broadcast.
+
+    Attributes
+    ----------
+    nb_channels : int
+        Number of channels targeted.
+
+    nb_messages : int
+        Number of messages successfully sent, across all channels.
+
+    failures : Dict[int, Exception]
+        Error that stopped each failed channel, by channel ID.
+
+    duration : float
+        Wall time of the whole fan-out, in seconds.
+    """
+
+    def __init__(self, nb_channels: int):
+        self.nb_channels = nb_channels
+        self.nb_messages = 0
+        self.failures: Dict[int, Exception] = {}
+        self.duration = 0.0
+
+    def __str__(self):
+        return (
+            f"broadcast to {self.nb_channels - len(self.failures)}/{self.nb_channels} "
+            f"channel(s), {self.nb_messages} message(s) in {self.duration:.2f}s"
+        )
+
+
+async def get_or_fetch_channel(bot: commands.Bot, channel_id: int):
+    """Get a channel from the cache, or fetch it from the API if it isn't cached."""
+
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        channel = await bot.fetch_channel(channel_id)
+    return channel
+
+
+async def send_with_retry(
+    channel: discord.abc.Messageable, retries: int, **message
+) -> discord.Message:
+    """Send a message, retrying transient errors with exponential backoff.
+
+    Discord's rate limits are handled by discord.py's HTTP client, which waits
+    on the right bucket before sending, so only server and network errors are
+    retried here.
+    """
+
+    for attempt in range(retries + 1):
+        try:
+            return await channel.send(**message)
+        except discord.HTTPException as e:
+            if isinstance(e, discord.DiscordServerError) or e.status == 429:
+                if attempt == retries:
+                    raise
+            else:
+                raise
+        except TRANSIENT_ERRORS:
+            if attempt == retries:
+                raise
+
+        await asyncio.sleep(2**attempt + random.random())
+
+
+async def broadcast(
+    bot: commands.Bot,
+    channel_ids: Iterable[int],
+    messages: List[dict],
+    concurrency: int = 5,
+    retries: int = 3,
+) -> BroadcastReport:
+    """Send the same messages, in order, to every channel.
+
+    Channels are served concurrently, at most `concurrency` at a time, and
+    independently: a channel that can't be found or keeps failing doesn't
+    stop the others.
+
+    Parameters
+    ----------
+    bot : commands.Bot
+        The bot.
+
+    channel_ids : Iterable[int]
+        IDs of the channels to send to.
+
+    messages : List[dict]
+        Keyword arguments of each `channel.send` call, e.g. `{"embed": embed}`.
+        They are built once by the caller and shared by every channel.
+
+    concurrency : int, optional
+        Maximum number of channels being sent to at once, by default 5.
+
+    retries : int, optional
+        How many times a transient error is retried per message, by default 3.
+
+    Returns
+    -------
+    BroadcastReport
+        What was sent, what failed and how long it took.
+    """
+
+    channel_ids = list(channel_ids)
+    report = BroadcastReport(nb_channels=len(channel_ids))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_to_channel(channel_id: int):
+        async with semaphore:
+            try:
+                channel = await get_or_fetch_channel(bot, channel_id)
+                for message in messages:
+                    await send_with_retry(channel, retries, **message)
+                    report.nb_messages += 1
+            except Exception as e:
+                report.failures[channel_id] = e
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send_to_channel(channel_id) for channel_id in channel_ids))
+    report.duration = time.perf_counter() - start
+
+    print(report)
+    for channel_id, error in report.failures.items():
+        print(f"failed to broadcast to channel {channel_id}: {error!r}")
+
+    return report
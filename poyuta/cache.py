@@ -0,0 +1,391 @@
+"""
+In-memory caches for the bot.
+"""
+
+# Standard library imports
+import threading
+from typing import Dict, List, Optional
+
+# SQLAlchemy
+from sqlalchemy.orm import sessionmaker
+
+# Database models
+from poyuta.database import (
+    User,
+    QuizType,
+    QuizChannels,
+    SubmissionChannels,
+    SessionFactory,
+)
+from poyuta.statements import UPSERT_USER
+
+
+class CachedUser:
+    """A user as known by the bot, detached from any database session.
+
+    Attributes
+    ----------
+    id : int
+        Discord user ID.
+
+    name : str
+        Discord user name.
+
+    pfp : str
+        Discord pfp hash.
+
+    is_admin : bool
+        Whether the user is a bot admin, as loaded. Admins are managed in the
+        database, the bot reads them from `reference_data`.
+    """
+
+    __slots__ = ("id", "name", "pfp", "is_admin")
+
+    def __init__(self, id: int, name: str, pfp: Optional[str], is_admin: bool):
+        self.id = id
+        self.name = name
+        self.pfp = pfp
+        self.is_admin = is_admin
+
+    def __repr__(self):
+        return f"CachedUser(id={self.id}, name={self.name!r})"
+
+
+class UserCache:
+    """Write-behind cache of the users table, keyed by Discord ID.
+
+    Reads are served from memory. New users and name/pfp changes are marked
+    dirty and written to the database in one statement by `flush`, which the
+    bot calls periodically.
+
+    Parameters
+    ----------
+    session_factory : sessionmaker
+        Factory used to load and flush the users.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        self.session_factory = session_factory
+        self.loaded = False
+
+        self._users: Dict[int, CachedUser] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load every user from the database, replacing the cached ones."""
+
+        with self.session_factory() as session:
+            rows = session.query(User.id, User.name, User.pfp, User.is_admin).all()
+
+        with self._lock:
+            self._users = {
+                row.id: CachedUser(row.id, row.name, row.pfp, row.is_admin)
+                for row in rows
+            }
+            self._dirty.clear()
+            self.loaded = True
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        """Get a user from its Discord ID, or None if it is unknown."""
+
+        if not self.loaded:
+            self.load()
+
+        try:
+            return self._users.get(int(user_id))
+        except (TypeError, ValueError):
+            return None
+
+    def upsert(
+        self, user_id: int, name: str, pfp: Optional[str], add_if_not_exist: bool
+    ) -> Optional[CachedUser]:
+        """Get a user and record its latest name and pfp.
+
+        Parameters
+        ----------
+        user_id : int
+            Discord user ID.
+
+        name : str
+            Discord user name.
+
+        pfp : str
+            Discord pfp hash.
+
+        add_if_not_exist : bool
+            Whether to add the user if it doesn't exist.
+
+        Returns
+        -------
+        Optional[CachedUser]
+            The cached user, None if it doesn't exist and wasn't added.
+        """
+
+        if not self.loaded:
+            self.load()
+
+        user_id = int(user_id)
+        with self._lock:
+            cached_user = self._users.get(user_id)
+
+            if not cached_user:
+                if not add_if_not_exist:
+                    return None
+
+                cached_user = CachedUser(user_id, name, pfp, False)
+                self._users[user_id] = cached_user
+                self._dirty.add(user_id)
+
+            elif cached_user.name != name or cached_user.pfp != pfp:
+                cached_user.name = name
+                cached_user.pfp = pfp
+                self._dirty.add(user_id)
+
+        return cached_user
+
+    @property
+    def nb_dirty(self) -> int:
+        return len(self._dirty)
+
+    def flush(self) -> int:
+        """Write the dirty users to the database in a single statement.
+
+        Returns
+        -------
+        int
+            Number of users written.
+        """
+
+        with self._lock:
+            if not self._dirty:
+                return 0
+
+            rows = [
+                {
+                    "id": user.id,
+                    "name": user.name,
+                    "pfp": user.pfp,
+                    "is_admin": user.is_admin,
+                }
+                for user in (self._users[user_id] for user_id in self._dirty)
+            ]
+            self._dirty.clear()
+
+        try:
+            with self.session_factory() as session:
+                # one statement, whatever the number of users
+                session.execute(UPSERT_USER, rows)
+                session.commit()
+        except Exception:
+            # put them back so the next flush retries
+            with self._lock:
+                self._dirty.update(row["id"] for row in rows)
+            raise
+
+        return len(rows)
+
+
+class CachedQuizType:
+    """A quiz type, detached from any database session.
+
+    Attributes
+    ----------
+    id : int
+        Quiz type ID.
+
+    type : str
+        Quiz type name.
+
+    emoji : str
+        Quiz type emoji.
+    """
+
+    __slots__ = ("id", "type", "emoji")
+
+    def __init__(self, id: int, type: str, emoji: str):
+        self.id = id
+        self.type = type
+        self.emoji = emoji
+
+    def __repr__(self):
+        return f"CachedQuizType(id={self.id}, type={self.type!r})"
+
+
+class CachedQuiz:
+    """The answers of a quiz, detached from any database session.
+
+    Attributes
+    ----------
+    id : int
+        Quiz ID.
+
+    answer : str
+        Answers of the quiz, separated by "|".
+
+    bonus_answer : str
+        Bonus answers of the quiz, separated by "|", if any.
+    """
+
+    __slots__ = ("id", "answer", "bonus_answer")
+
+    def __init__(self, id: int, answer: str, bonus_answer: Optional[str]):
+        self.id = id
+        self.answer = answer
+        self.bonus_answer = bonus_answer
+
+    def __repr__(self):
+        return f"CachedQuiz(id={self.id})"
+
+
+class ReferenceDataSnapshot:
+    """Immutable copy of the small reference tables.
+
+    Attributes
+    ----------
+    version : int
+        Incremented each time the reference data is refreshed.
+
+    quiz_types : List[CachedQuizType]
+        Quiz types, ordered by ID.
+
+    quiz_types_by_id : Dict[int, CachedQuizType]
+        Quiz types by ID.
+
+    admin_ids : frozenset
+        Discord IDs of the bot admins. Admins are managed in the database,
+        changes there are picked up at the next restart.
+
+    quiz_channels : Dict[int, int]
+        Quiz channel ID by server ID.
+
+    submission_channels : Dict[int, int]
+        Submission channel ID by server ID.
+
+    submission_channel_ids : frozenset
+        IDs of every submission channel.
+    """
+
+    __slots__ = (
+        "version",
+        "quiz_types",
+        "quiz_types_by_id",
+        "admin_ids",
+        "quiz_channels",
+        "submission_channels",
+        "submission_channel_ids",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        quiz_types: List[CachedQuizType],
+        admin_ids: frozenset,
+        quiz_channels: Dict[int, int],
+        submission_channels: Dict[int, int],
+    ):
+        self.version = version
+        self.quiz_types = quiz_types
+        self.quiz_types_by_id = {quiz_type.id: quiz_type for quiz_type in quiz_types}
+        self.admin_ids = admin_ids
+        self.quiz_channels = quiz_channels
+        self.submission_channels = submission_channels
+        self.submission_channel_ids = frozenset(submission_channels.values())
+
+
+class ReferenceData:
+    """Versioned cache of the quiz types, admins, quiz and submission channels.
+
+    These tables are small and rarely change, so they are loaded in one go
+    and every lookup is a dict or set access. Commands that change them must
+    call `refresh` afterwards.
+
+    Parameters
+    ----------
+    session_factory : sessionmaker
+        Factory used to load the tables.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        self.session_factory = session_factory
+        self._snapshot: Optional[ReferenceDataSnapshot] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> ReferenceDataSnapshot:
+        """Reload every table and swap in the new snapshot."""
+
+        with self.session_factory() as session:
+            quiz_types = [
+                CachedQuizType(row.id, row.type, row.emoji)
+                for row in session.query(
+                    QuizType.id, QuizType.type, QuizType.emoji
+                ).order_by(QuizType.id)
+            ]
+            admin_ids = frozenset(
+                id_user for (id_user,) in session.query(User.id).filter(User.is_admin)
+            )
+            quiz_channels = {
+                row.id_server: row.id_channel
+                for row in session.query(
+                    QuizChannels.id_server, QuizChannels.id_channel
+                )
+            }
+            submission_channels = {
+                row.id_sub_server: row.id_sub_channel
+                for row in session.query(
+                    SubmissionChannels.id_sub_server, SubmissionChannels.id_sub_channel
+                )
+            }
+
+        with self._lock:
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = ReferenceDataSnapshot(
+                version=version,
+                quiz_types=quiz_types,
+                admin_ids=admin_ids,
+                quiz_channels=quiz_channels,
+                submission_channels=submission_channels,
+            )
+
+        return self._snapshot
+
+    @property
+    def snapshot(self) -> ReferenceDataSnapshot:
+        """The current snapshot, loaded on first access."""
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    @property
+    def quiz_types(self) -> List[CachedQuizType]:
+        return self.snapshot.quiz_types
+
+    @property
+    def quiz_types_by_id(self) -> Dict[int, CachedQuizType]:
+        return self.snapshot.quiz_types_by_id
+
+    @property
+    def admin_ids(self) -> frozenset:
+        return self.snapshot.admin_ids
+
+    @property
+    def quiz_channels(self) -> Dict[int, int]:
+        return self.snapshot.quiz_channels
+
+    @property
+    def submission_channels(self) -> Dict[int, int]:
+        return self.snapshot.submission_channels
+
+    @property
+    def submission_channel_ids(self) -> frozenset:
+        return self.snapshot.submission_channel_ids
+
+
+user_cache = UserCache(SessionFactory)
+reference_data = ReferenceData(SessionFactory)
@@ -0,0 +1,154 @@
+"""
+Traffic capture, to replay real days with `benchmarks.replay`.
+
+Appends every command the bot receives to a log: prefix commands, slash
+commands and quiz button clicks, with their arguments, user, guild and when
+Discord received them. One file per UTC day, one compact JSON object per
+line:
+
+    {"at":1760896800123,"kind":"prefix","name":"male","args":"||kamiya||","user":1,"guild":2}
+
+With `redact`, the letters of the arguments are replaced by "x": the
+guesses can't be read, their length and the IDs in them are kept.
+"""
+
+# Standard library imports
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+# Discord
+import discord
+from discord.ext import commands
+
+PREFIX = "prefix"
+SLASH = "slash"
+BUTTON = "button"
+
+# letters, of any alphabet
+LETTER_PATTERN = re.compile(r"[^\W\d_]")
+
+
+class TrafficCapture:
+    """Append the commands received to a log file per day.
+
+    Parameters
+    ----------
+    directory : Union[str, Path]
+        Directory of the log files.
+
+    redact : bool, optional
+        Whether to replace the letters of the arguments by "x", by default
+        False.
+
+    Attributes
+    ----------
+    nb_records : int
+        Number of commands logged since the bot started.
+    """
+
+    def __init__(self, directory: Union[str, Path], redact: bool = False):
+        self.directory = Path(directory)
+        self.redact = redact
+        self.nb_records = 0
+
+        self._file = None
+        self._file_day: Optional[str] = None
+
+    def record(
+        self,
+        kind: str,
+        name: str,
+        args: Union[str, dict],
+        user_id: int,
+        guild_id: Optional[int],
+        created_at: datetime,
+    ):
+        """Append a command to the log of the day it was received."""
+
+        if self.redact:
+            args = (
+                {key: self._redact(value) for key, value in args.items()}
+                if isinstance(args, dict)
+                else self._redact(args)
+            )
+
+        line = json.dumps(
+            {
+                "at": int(created_at.timestamp() * 1000),
+                "kind": kind,
+                "name": name,
+                "args": args,
+                "user": user_id,
+                "guild": guild_id,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        self._day_file(created_at).write(line + "\n")
+        self.nb_records += 1
+
+    def record_context(self, ctx: commands.Context):
+        """Log a prefix command, with its arguments as typed."""
+
+        args = ctx.message.content[len(ctx.prefix) + len(ctx.invoked_with) :]
+        self.record(
+            PREFIX,
+            ctx.command.qualified_name,
+            args.strip(),
+            ctx.author.id,
+            ctx.guild.id if ctx.guild else None,
+            ctx.message.created_at,
+        )
+
+    def record_interaction(self, interaction: discord.Interaction):
+        """Log a slash command with its options, or a button click."""
+
+        if interaction.command is not None:
+            kind, name = SLASH, interaction.command.qualified_name
+            # users, channels, attachments, etc. by ID
+            args = {
+                key: (
+                    value
+                    if isinstance(value, (str, int, float, bool))
+                    else getattr(value, "id", str(value))
+                )
+                for key, value in interaction.namespace
+            }
+        else:
+            kind, name, args = BUTTON, interaction.data["custom_id"], ""
+
+        self.record(
+            kind,
+            name,
+            args,
+            interaction.user.id,
+            interaction.guild_id,
+            interaction.created_at,
+        )
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._file_day = None
+
+    def _redact(self, value):
+        return LETTER_PATTERN.sub("x", value) if isinstance(value, str) else value
+
+    def _day_file(self, created_at: datetime):
+        day = f"{created_at:%Y-%m-%d}"
+        if day != self._file_day:
+            self.close()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # line buffered, a line is on disk as soon as it's written
+            self._file = open(
+                self.directory / f"traffic-{day}.jsonl",
+                "a",
+                encoding="utf-8",
+                buffering=1,
+            )
+            self._file_day = day
+        return self._file
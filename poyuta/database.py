@@ -4,19 +4,25 @@ from pathlib import Path
 # SQLAlchemy
 import sqlalchemy as sa
 from sqlalchemy import create_engine, inspect, UniqueConstraint, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
+# Metrics
+from poyuta.metrics import CountingConnection
+
 # Define a unique name for the User class
 Base = declarative_base()
 
 # SQLAlchemy setup
 DATABASE_PATH = Path("database")
-DATABASE_PATH.mkdir(exist_ok=True)
 
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}/poyuta.db"
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}, echo=False
+    DATABASE_URL,
+    # connections count the rows fetched by each command
+    connect_args={"check_same_thread": False, "factory": CountingConnection},
+    echo=False,
 )
 SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -43,6 +49,9 @@ INITIAL_QUIZ_TYPES = [
     },
 ]
 
+# stored in place of the seiyuu answer of a bonus answer
+BONUS_ANSWER = "\\Bonus Answer\\"
+
 
 class QuizChannels(Base):
     __tablename__ = "quiz_channels"
@@ -112,6 +121,24 @@ class Answer(Base):
 
     answer_time = sa.Column(sa.Float, nullable=False)
 
+    # ensure a user gets the point, and the bonus point, of a quiz only once
+    __table_args__ = (
+        sa.Index(
+            "uq_answers_correct",
+            "user_id",
+            "quiz_id",
+            unique=True,
+            sqlite_where=sa.text("is_correct"),
+        ),
+        sa.Index(
+            "uq_answers_bonus_point",
+            "user_id",
+            "quiz_id",
+            unique=True,
+            sqlite_where=sa.text("is_bonus_point"),
+        ),
+    )
+
 
 class UserStartQuizTimestamp(Base):
     __tablename__ = "user_start_quiz_timestamp"
@@ -134,6 +161,8 @@ class UserStartQuizTimestamp(Base):
 def initialize_database(
     default_admin_id: id, default_admin_name: str, use_historic_data: bool = False
 ):
+    DATABASE_PATH.mkdir(exist_ok=True)
+
     inspector = inspect(engine)
 
     if (
@@ -175,3 +204,12 @@ def initialize_database(
                             session.execute(text(statement.strip()))
 
             session.commit()
+
+    # added after the first release, create them on older databases too
+    for index in Answer.__table__.indexes:
+        try:
+            index.create(bind=engine, checkfirst=True)
+        except IntegrityError:
+            print(
+                f"Index {index.name} not created: remove the duplicate answers first."
+            )
@@ -0,0 +1,174 @@
+"""
+Event loop lag monitor.
+
+A task sleeps for a short interval over and over and measures how late it
+wakes up: the time the event loop was blocked, e.g. by a synchronous query or
+some regex work in a handler. Meanwhile a watchdog thread checks that the
+task keeps waking up, and when it doesn't, samples the frame the event loop's
+thread is stuck in, so that each lag event names the command and the code
+that blocked the loop.
+"""
+
+# Standard library imports
+import asyncio
+import sys
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+from types import CodeType
+from typing import Dict, List, Optional
+
+# Metrics
+from poyuta.metrics import LatencyHistogram
+
+
+class LagEvent:
+    """The event loop was blocked for longer than the threshold.
+
+    Attributes
+    ----------
+    when : datetime
+        When the event loop got unblocked.
+
+    lag : float
+        How long the event loop was blocked, in seconds.
+
+    command : str
+        Name of the command that blocked it, if known.
+
+    stack : List[str]
+        Innermost frames of the blocking code, empty if it wasn't sampled.
+    """
+
+    __slots__ = ("when", "lag", "command", "stack")
+
+    def __init__(self, lag: float, command: Optional[str], stack: List[str]):
+        self.when = datetime.now()
+        self.lag = lag
+        self.command = command
+        self.stack = stack
+
+    def __str__(self):
+        return (
+            f"event loop blocked for {self.lag * 1000:.0f}ms "
+            f"by {self.command or 'unknown code'}"
+        )
+
+
+class LoopLagMonitor:
+    """Measure the event loop's lag and catch the code blocking it.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Seconds between two lag measurements, by default 0.1.
+
+    threshold : float, optional
+        Lag in seconds from which a `LagEvent` is recorded, by default 0.25.
+
+    size : int, optional
+        Number of latest events kept, by default 50.
+
+    nb_frames : int, optional
+        Number of innermost frames kept per event, by default 8.
+
+    Attributes
+    ----------
+    lag : LatencyHistogram
+        Every lag measured.
+
+    events : deque
+        Latest `LagEvent`, oldest first.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        size: int = 50,
+        nb_frames: int = 8,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.nb_frames = nb_frames
+
+        self.lag = LatencyHistogram()
+        self.events = deque(maxlen=size)
+
+        # command names by the code of their callback
+        self.command_names: Dict[CodeType, str] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = perf_counter()
+
+        # sample taken by the watchdog while the loop is blocked
+        self._sample: Optional[tuple] = None
+
+    def start(self, command_names: Dict[CodeType, str]):
+        """Start the monitor task and the watchdog thread."""
+
+        self.command_names = command_names
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = perf_counter()
+        self._stopped.clear()
+
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop the monitor task and the watchdog thread."""
+
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _measure(self):
+        while True:
+            expected = perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+
+            now = perf_counter()
+            self._last_tick = now
+            lag = max(now - expected, 0)
+            self.lag.add(lag)
+
+            sample, self._sample = self._sample, None
+            if lag < self.threshold:
+                continue
+
+            command, stack = sample if sample else (None, [])
+            event = LagEvent(lag, command, stack)
+            self.events.append(event)
+            print(event)
+
+    def _watch(self):
+        # the loop task should tick every interval, sample the loop's thread
+        # once when it's late by more than the threshold
+        while not self._stopped.wait(self.interval / 2):
+            late = perf_counter() - self._last_tick - self.interval
+            if late < self.threshold or self._sample is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._sample = self._describe(frame)
+
+    def _describe(self, frame) -> tuple:
+        """Command running in a frame, and its innermost frames."""
+
+        command = None
+        current = frame
+        while current is not None:
+            command = self.command_names.get(current.f_code, command)
+            current = current.f_back
+
+        stack = traceback.format_stack(frame)[-self.nb_frames :]
+        return command, stack
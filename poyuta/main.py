@@ -1,27 +1,28 @@
 # Standard libraries
+import asyncio
+import copy
+import cProfile
 import re
 import random
-import numpy as np
 from datetime import datetime, date, timedelta, time
 from typing import Optional
-from typing import List
-from collections import OrderedDict
+from typing import List, Tuple
+from collections import OrderedDict, defaultdict
 from itertools import islice
+from time import perf_counter
 
 # Discord
 import discord
 from discord import app_commands, Embed, Button, ButtonStyle
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ext.commands import Context
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 
 # Database
-from sqlalchemy import case, func, desc, or_
+from sqlalchemy import desc, or_
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.session import Session
 from poyuta.database import (
-    User,
     Quiz,
     QuizType,
     UserStartQuizTimestamp,
@@ -29,11 +30,41 @@ from poyuta.database import (
     SubmissionChannels,
     Answer,
     SessionFactory,
+    DATABASE_PATH,
+    engine,
     initialize_database,
 )
 
 # Utils
+from poyuta.broadcast import broadcast
+from poyuta.answers import answer_lock, submit_answer
+from poyuta.cache import CachedQuiz, user_cache, reference_data
+from poyuta.capture import TrafficCapture
+from poyuta.looplag import LoopLagMonitor
+from poyuta.memory import MemoryDiagnostics, count_orm_instances
+from poyuta.metrics import RateCounter, LatencyHistogram, command_metrics
+from poyuta.nplusone import NPlusOneDetector
 from poyuta.paginator import EmbedPaginatorSession
+from poyuta.priority import ANALYTICAL, CRITICAL, CommandScheduler
+from poyuta.querycache import query_cache
+from poyuta.profiling import ProfiledContext, top_functions
+from poyuta.ratelimit import RateLimited, RateLimiter, rate_limit
+from poyuta import readmodel
+from poyuta.slowqueries import SlowQueryLog
+from poyuta.statements import (
+    HAS_BONUS_POINT,
+    HAS_CORRECT_ANSWER,
+    QUIZ_IDS_OF_DAY,
+    QUIZ_OF_DAY,
+    QUIZ_TO_PLAY,
+    START_QUIZ,
+)
+from poyuta.results import (
+    BONUS_ANSWER,
+    compute_quiz_results,
+    merge_late_answers,
+    get_top_incorrect_answers,
+)
 from poyuta.utils import (
     load_environment,
     process_user_input,
@@ -44,6 +75,8 @@ from poyuta.utils import (
     get_quiz_type_choices,
     is_server_admin,
     is_bot_admin,
+    compute_command_tree_fingerprint,
+    to_database_time,
 )
 
 config = load_environment()
@@ -51,26 +84,402 @@ DAILY_QUIZ_RESET_TIME = datetime.strptime(
     config["DAILY_QUIZ_RESET_TIME"], "%H:%M:%S"
 ).time()
 
+# yesterday's results are computed this many minutes before the reset
+RESULTS_PRECOMPUTE_TIME = (
+    datetime.combine(date.today(), DAILY_QUIZ_RESET_TIME)
+    - timedelta(minutes=int(config.get("RESULTS_PRECOMPUTE_MINUTES") or 5))
+).time()
+
+# how often new users and pfp/name changes are written to the database
+USER_CACHE_FLUSH_SECONDS = 10
+
+# stats and leaderboards prefix commands, queued behind answers and clicks by
+# PoyutaBot.invoke; the slash commands /history, /queue and /plannedquizzes
+# take their analytical slot themselves
+ANALYTICAL_COMMANDS = {
+    "mystats",
+    "myfemaleguesses",
+    "mymaleguesses",
+    "maleimageguesses",
+    "femaleimageguesses",
+    "mysongguesses",
+    "topspeed",
+    "currenttop",
+    "seiyuuleaderboard",
+    "leaderboard",
+    "legacyleaderboard",
+}
+
+# how many analytical commands run at once, and how many can wait their turn
+ANALYTICAL_CONCURRENCY = 2
+ANALYTICAL_QUEUE_SIZE = 100
+BUSY_MESSAGE = "The bot is busy, please try again in a moment."
+
+# how many commands of each class a user can run, as "<rate>/<seconds>"
+answers_rate_limiter = RateLimiter.from_config(
+    "answers", config.get("RATE_LIMIT_ANSWERS") or "6/10"
+)
+stats_rate_limiter = RateLimiter.from_config(
+    "stats", config.get("RATE_LIMIT_STATS") or "4/30"
+)
+leaderboards_rate_limiter = RateLimiter.from_config(
+    "leaderboards", config.get("RATE_LIMIT_LEADERBOARDS") or "4/60"
+)
+
+# the event loop's lag is measured this often, and recorded past the threshold
+LOOP_LAG_INTERVAL = 0.1
+LOOP_LAG_THRESHOLD = 0.25
+
+# if set, the command metrics are written there in the Prometheus text format
+METRICS_PROMETHEUS_PATH = config.get("METRICS_PROMETHEUS_PATH")
+METRICS_PROMETHEUS_SECONDS = 60
+
+# development only: report the statements run more than this many times by a
+# single command, raising an error instead if N_PLUS_ONE_RAISE is set
+n_plus_one_detector = (
+    NPlusOneDetector(
+        threshold=int(config["N_PLUS_ONE_THRESHOLD"]),
+        raise_error=config.get("N_PLUS_ONE_RAISE") == "1",
+    )
+    if config.get("N_PLUS_ONE_THRESHOLD")
+    else None
+)
+
+# log the statements slower than SLOW_QUERY_THRESHOLD_MS, with their query plan;
+# the log file is only opened in PoyutaBot.setup_hook
+SLOW_QUERY_THRESHOLD_MS = int(config.get("SLOW_QUERY_THRESHOLD_MS") or 0)
+SLOW_QUERY_LOG_PATH = config.get("SLOW_QUERY_LOG_PATH") or (
+    DATABASE_PATH / "slow_queries.log"
+)
+
+# if set, every command received is logged there, to be replayed
+traffic_capture = (
+    TrafficCapture(
+        config["TRAFFIC_CAPTURE_DIRECTORY"],
+        redact=config.get("TRAFFIC_CAPTURE_REDACT") == "1",
+    )
+    if config.get("TRAFFIC_CAPTURE_DIRECTORY")
+    else None
+)
+
+# if set, allocations are traced and a memory report is logged this often
+MEMORY_DIAGNOSTICS_MINUTES = int(config.get("MEMORY_DIAGNOSTICS_MINUTES") or 0)
+
+# estimated memory the cached query results may use, 0 disables the cache
+query_cache.max_bytes = int(config.get("QUERY_CACHE_MAX_MB") or 32) * 1_000_000
+
+# profiles saved by !profile
+PROFILES_PATH = DATABASE_PATH / "profiles"
+# cProfile can only profile one command at a time
+profile_lock = asyncio.Lock()
+
+# fingerprint of the last synced application commands
+COMMAND_TREE_FINGERPRINT_PATH = DATABASE_PATH / "command_tree_fingerprint"
+
 intents = discord.Intents.all()
 intents.reactions = True
 intents.messages = True
 
 
-initialize_database(
-    config["DEFAULT_ADMIN_ID"],
-    config["DEFAULT_ADMIN_NAME"],
-    True if config["USE_HISTORIC_DATA"] else False,
-)
+class PoyutaCommandTree(app_commands.CommandTree):
+    # app commands have no before/after invoke hooks: the metrics of a slash
+    # command start here, and end on completion or in on_error
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if traffic_capture:
+            traffic_capture.record_interaction(interaction)
+        # None for components, modals and commands unknown to the tree
+        if interaction.command is not None:
+            start_instrumentation(f"/{interaction.command.qualified_name}")
+        return True
+
+    async def on_error(
+        self, interaction: discord.Interaction, error: app_commands.AppCommandError
+    ):
+        finish_instrumentation()
+        await super().on_error(interaction, error)
 
 
 # Update bot class to include the session property
 class PoyutaBot(commands.Bot):
     def __init__(self, command_prefix, intents):
-        super().__init__(command_prefix=command_prefix, intents=intents)
+        super().__init__(
+            command_prefix=command_prefix,
+            intents=intents,
+            tree_cls=PoyutaCommandTree,
+        )
 
         self.last_leaderboard_update = None
         self.last_leaderboard_message = None
 
+        # results of the closing day, computed shortly before the reset
+        self.precomputed_quiz_results = None
+
+        # today's quiz id by quiz type, shared by every NewQuizButton
+        self.daily_quiz_ids = {}
+        self.daily_quiz_ids_date = None
+
+        # quizzes being answered by (quiz type ID, date), None if there's none
+        self.quizzes = {}
+
+        # messages processed (commands, submissions) vs. ignored by on_message
+        self.message_counters = {"handled": RateCounter(), "skipped": RateCounter()}
+
+        # daily jobs, started once in setup_hook
+        self.scheduler = None
+
+        # catches the handlers blocking the event loop, started in setup_hook
+        self.loop_lag_monitor = LoopLagMonitor(
+            interval=LOOP_LAG_INTERVAL, threshold=LOOP_LAG_THRESHOLD
+        )
+
+        # statements slower than SLOW_QUERY_THRESHOLD_MS, set up in setup_hook
+        self.slow_query_log = None
+
+        # live objects and allocation growth, traced if MEMORY_DIAGNOSTICS_MINUTES
+        self.memory_diagnostics = MemoryDiagnostics()
+
+        # analytical commands wait for a turn, critical ones run right away
+        self.command_scheduler = CommandScheduler(
+            concurrency=ANALYTICAL_CONCURRENCY, max_queue_size=ANALYTICAL_QUEUE_SIZE
+        )
+
+        # slash command latencies by command name: time until the interaction
+        # is acknowledged, and until the result is sent
+        self.interaction_latencies = {
+            "ack": defaultdict(LatencyHistogram),
+            "result": defaultdict(LatencyHistogram),
+        }
+
+    async def setup_hook(self):
+        # importing poyuta.main has no side effects: the database and
+        # everything that reads it is only set up here, once logged in
+        initialize_database(
+            config["DEFAULT_ADMIN_ID"],
+            config["DEFAULT_ADMIN_NAME"],
+            True if config["USE_HISTORIC_DATA"] else False,
+        )
+
+        # count the SQL statements of each command
+        command_metrics.instrument(engine)
+        if n_plus_one_detector:
+            n_plus_one_detector.install(engine)
+        if SLOW_QUERY_THRESHOLD_MS:
+            self.slow_query_log = SlowQueryLog(
+                threshold=SLOW_QUERY_THRESHOLD_MS / 1000, path=SLOW_QUERY_LOG_PATH
+            )
+            self.slow_query_log.install(engine)
+        if METRICS_PROMETHEUS_PATH:
+            self.write_prometheus_metrics.start()
+
+        # name the command blocking the event loop from its callback's code
+        command_names = {
+            command.callback.__code__: command.qualified_name
+            for command in self.walk_commands()
+        }
+        command_names.update(
+            (command.callback.__code__, f"/{command.qualified_name}")
+            for command in self.tree.walk_commands()
+            if isinstance(command, app_commands.Command)
+        )
+        self.loop_lag_monitor.start(command_names)
+
+        if MEMORY_DIAGNOSTICS_MINUTES:
+            self.memory_diagnostics.start()
+            self.log_memory_report.change_interval(minutes=MEMORY_DIAGNOSTICS_MINUTES)
+            self.log_memory_report.start()
+
+        # load every user once, get_user is then served from memory
+        user_cache.load()
+        self.flush_user_cache.start()
+
+        # quiz types, admins, quiz and submission channels
+        reference_data.refresh()
+
+        # resume the quiz buttons posted before the restart
+        self.add_view(NewQuizView())
+
+        # the quiz type choices of the slash commands come from the database
+        quiz_type_choices = get_quiz_type_choices()
+        for command in (new_quiz, send_submission, edit_quiz):
+            app_commands.choices(quiz_type=quiz_type_choices)(command)
+
+        # setup_hook only runs once per process, unlike on_ready
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            precompute_quiz_results,
+            "cron",
+            hour=RESULTS_PRECOMPUTE_TIME.hour,
+            minute=RESULTS_PRECOMPUTE_TIME.minute,
+            second=RESULTS_PRECOMPUTE_TIME.second,
+            id="precompute_quiz_results",
+            replace_existing=True,
+        )
+        self.scheduler.add_job(
+            post_yesterdays_quiz_results,
+            "cron",
+            hour=DAILY_QUIZ_RESET_TIME.hour,
+            minute=DAILY_QUIZ_RESET_TIME.minute,
+            second=DAILY_QUIZ_RESET_TIME.second,
+            id="post_yesterdays_quiz_results",
+            replace_existing=True,
+        )
+        self.scheduler.start()
+
+        print(self.scheduler.get_jobs())
+
+        await self.sync_command_tree()
+
+    async def sync_command_tree(self, force: bool = False) -> bool:
+        """Sync the application commands, if they changed since the last sync.
+
+        Parameters
+        ----------
+        force : bool, optional
+            Whether to sync even if the commands didn't change, by default False.
+
+        Returns
+        -------
+        bool
+            False if the sync failed, True if it succeeded or wasn't needed.
+        """
+
+        fingerprint = compute_command_tree_fingerprint(self.tree)
+
+        if (
+            not force
+            and COMMAND_TREE_FINGERPRINT_PATH.exists()
+            and COMMAND_TREE_FINGERPRINT_PATH.read_text() == fingerprint
+        ):
+            print("commands unchanged since the last sync, skipping sync")
+            return True
+
+        try:
+            print("syncing commands")
+            synced = await self.tree.sync()
+            print(f"synced {len(synced)} command(s)")
+
+            for command in synced:
+                print(f"{command.name} synced")
+        except Exception as e:
+            print(e)
+            return False
+
+        COMMAND_TREE_FINGERPRINT_PATH.write_text(fingerprint)
+        return True
+
+    async def close(self):
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        self.flush_user_cache.cancel()
+        self.write_prometheus_metrics.cancel()
+        self.loop_lag_monitor.stop()
+        self.log_memory_report.cancel()
+        if traffic_capture:
+            traffic_capture.close()
+        user_cache.flush()
+        await super().close()
+
+    async def invoke(self, ctx: Context):
+        if traffic_capture and ctx.command:
+            traffic_capture.record_context(ctx)
+
+        priority = (
+            ANALYTICAL
+            if ctx.command and ctx.command.qualified_name in ANALYTICAL_COMMANDS
+            else CRITICAL
+        )
+
+        try:
+            async with self.command_scheduler.slot(priority) as slot:
+                # released early by run_paginator, once only clicks are awaited
+                ctx.command_slot = slot
+                await super().invoke(ctx)
+        except asyncio.QueueFull:
+            await ctx.send(BUSY_MESSAGE)
+
+    async def on_command_error(self, ctx: Context, error: commands.CommandError):
+        # rate limited users are told once by the check, then ignored
+        if isinstance(error, RateLimited):
+            return
+
+        await super().on_command_error(ctx, error)
+
+    # write new users and pfp/name changes in batches
+    @tasks.loop(seconds=USER_CACHE_FLUSH_SECONDS)
+    async def flush_user_cache(self):
+        try:
+            user_cache.flush()
+        except Exception as e:
+            print(f"failed to flush the user cache: {e}")
+
+    @tasks.loop(seconds=METRICS_PROMETHEUS_SECONDS)
+    async def write_prometheus_metrics(self):
+        try:
+            command_metrics.write_prometheus(
+                METRICS_PROMETHEUS_PATH, extra=query_cache.to_prometheus()
+            )
+        except Exception as e:
+            print(f"failed to write the Prometheus metrics: {e}")
+
+    @tasks.loop(minutes=60)
+    async def log_memory_report(self):
+        # walking every object takes a moment, let the event loop go on
+        print(await asyncio.to_thread(self.memory_diagnostics.report))
+
+    def load_daily_quiz_ids(self, quiz_date: date):
+        """Resolve the quizzes of a day, in a single query."""
+
+        with self.session as session:
+            self.daily_quiz_ids = dict(
+                session.execute(QUIZ_IDS_OF_DAY, {"quiz_date": quiz_date}).all()
+            )
+        self.daily_quiz_ids_date = quiz_date
+
+    def get_daily_quiz_ids(self) -> dict:
+        """Get today's quiz id by quiz type, resolving them on a new day."""
+
+        current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
+        if self.daily_quiz_ids_date != current_quiz_date:
+            self.load_daily_quiz_ids(current_quiz_date)
+        return self.daily_quiz_ids
+
+    def get_quiz(self, quiz_type_id: int, quiz_date: date) -> Optional[CachedQuiz]:
+        """Get the quiz of a type and day, loading it on first use."""
+
+        key = (quiz_type_id, quiz_date)
+        if key not in self.quizzes:
+            with self.session as session:
+                row = session.execute(
+                    QUIZ_OF_DAY, {"quiz_type_id": quiz_type_id, "quiz_date": quiz_date}
+                ).first()
+
+            # only today's and yesterday's quizzes can still be answered
+            for cached_key in list(self.quizzes):
+                if cached_key[1] < quiz_date - timedelta(days=1):
+                    del self.quizzes[cached_key]
+
+            self.quizzes[key] = CachedQuiz(*row) if row else None
+        return self.quizzes[key]
+
+    def invalidate_daily_quiz_ids(self):
+        """Make the next click or answer resolve today's quizzes again."""
+
+        self.daily_quiz_ids_date = None
+        self.quizzes.clear()
+
+    def invalidate_precomputed_quiz_results(self, quiz_date: date):
+        """Make the reset compute the results again if they are of that date.
+
+        `merge_late_answers` only adds the answers given since the results
+        were precomputed, edits of the quiz or of older answers are missed.
+        """
+
+        payload = self.precomputed_quiz_results
+        if payload is not None and payload["date"] == quiz_date:
+            self.precomputed_quiz_results = None
+
     # add database session to bot
     # can now be access through bot.session
     @property
@@ -82,47 +491,101 @@ class PoyutaBot(commands.Bot):
 bot = PoyutaBot(command_prefix=config["COMMAND_PREFIX"], intents=intents)
 
 
-@bot.event
-async def on_ready():
-    print(f"logged in as {bot.user.name}")
+def record_interaction_latency(command_name: str, phase: str, started: float):
+    """Record the time elapsed since `started` for a phase of a slash command.
 
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        post_yesterdays_quiz_results,
-        "cron",
-        hour=DAILY_QUIZ_RESET_TIME.hour,
-        minute=DAILY_QUIZ_RESET_TIME.minute,
-        second=DAILY_QUIZ_RESET_TIME.second,
-    )
-    scheduler.start()
+    Parameters
+    ----------
+    command_name : str
+        Name of the slash command.
 
-    print(scheduler.get_jobs())
+    phase : str
+        "ack" once the interaction is deferred, "result" once the result is sent.
 
-    try:
-        print("syncing commands")
-        synced = await bot.tree.sync()
-        print(f"synced {len(synced)} command(s)")
+    started : float
+        `perf_counter()` when the command started.
+    """
 
-        for command in synced:
-            print(f"{command.name} synced")
-    except Exception as e:
-        print(e)
+    bot.interaction_latencies[phase][command_name].add(perf_counter() - started)
 
 
 @bot.event
-async def on_message(message):
-    with bot.session as session:
-        submission_channels = session.query(SubmissionChannels).all()
+async def on_ready():
+    # fired again on every gateway reconnect: keep it free of one-time setup,
+    # which lives in PoyutaBot.setup_hook
+    print(f"logged in as {bot.user.name}")
+
 
+@bot.event
+async def on_message(message):
     # Check if the message is in any submission channel
-    if message.channel.id in [
-        channel.id_sub_channel for channel in submission_channels
-    ]:
+    if message.channel.id in reference_data.submission_channel_ids:
+        bot.message_counters["handled"].increment()
+
         # Delete the message if it's in a submission channel
         await message.delete()
-    else:
-        # Process other commands if the message is not in a submission channel
-        await bot.process_commands(message)
+        return
+
+    # ignore ordinary chat right away
+    if not message.content.startswith(bot.command_prefix):
+        bot.message_counters["skipped"].increment()
+        return
+
+    bot.message_counters["handled"].increment()
+
+    # Process other commands if the message is not in a submission channel
+    await bot.process_commands(message)
+
+
+def start_instrumentation(command_name: str):
+    """Start recording the metrics of a command, in the current task."""
+
+    command_metrics.start(command_name)
+    if n_plus_one_detector:
+        n_plus_one_detector.start(command_name)
+
+
+def finish_instrumentation():
+    """Record the metrics of the command of the current task."""
+
+    command_metrics.finish()
+    if n_plus_one_detector:
+        n_plus_one_detector.finish()
+
+
+@bot.before_invoke
+async def start_command_instrumentation(ctx: Context):
+    start_instrumentation(ctx.command.qualified_name)
+
+
+@bot.after_invoke
+async def finish_command_instrumentation(ctx: Context):
+    finish_instrumentation()
+
+
+async def run_paginator(ctx: Context, paginator: EmbedPaginatorSession):
+    """Show the pages of a command, then wait for clicks on them.
+
+    The pages are built by then: the command's analytical slot is released
+    first, so that waiting for clicks, until the paginator's timeout, doesn't
+    hold back the other stats commands. Its metrics end there too, so that
+    its wall time doesn't include the user reading the pages.
+    """
+
+    slot = getattr(ctx, "command_slot", None)
+    if slot is not None:
+        slot.release()
+
+    # after_invoke then finds nothing left to record
+    finish_instrumentation()
+
+    await paginator.run()
+
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    # dispatched in a new task, which got a copy of the command's context
+    finish_instrumentation()
 
 
 # attempt to decorate up the help command
@@ -219,26 +682,26 @@ async def help(ctx, command: str = None):
     pages.append(embed)
 
     # Check admin status
-    with bot.session as session:
-        if is_bot_admin(session, ctx.author):
+    if is_bot_admin(user=ctx.author):
 
-            embed = discord.Embed(title="Admin Command Help", color=discord.Color.red())
+        embed = discord.Embed(title="Admin Command Help", color=discord.Color.red())
 
-            # Create an embed for each admin command
-            for command in admin_commands:
-                embed.add_field(name="", value=f"```{command}```", inline=False)
+        # Create an embed for each admin command
+        for command in admin_commands:
+            embed.add_field(name="", value=f"```{command}```", inline=False)
 
-            pages.append(embed)
+        pages.append(embed)
 
     session = EmbedPaginatorSession(ctx, *pages)
 
     # Send the embed
-    await session.run()
+    await run_paginator(ctx, session)
 
 
 # --- Answering seiyuu --- #
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="male", aliases=["m"])
 async def male_answer_quiz(
     ctx: commands.Context,
@@ -269,6 +732,7 @@ async def male_answer_quiz(
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="female", aliases=["f"])
 async def female_answer_quiz(ctx: commands.Context):
     """
@@ -299,6 +763,7 @@ async def female_answer_quiz(ctx: commands.Context):
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="maleimage", aliases=["mi"])
 async def male_image_answer_quiz(ctx: commands.Context):
     """
@@ -329,6 +794,7 @@ async def male_image_answer_quiz(ctx: commands.Context):
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="femaleimage", aliases=["fi"])
 async def female_image_answer_quiz(ctx: commands.Context):
     """
@@ -359,6 +825,7 @@ async def female_image_answer_quiz(ctx: commands.Context):
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="song", aliases=["s"])
 async def song_answer_quiz(ctx: commands.Context):
     """
@@ -397,7 +864,8 @@ async def answer_quiz_type(
 ):
     """guess the seiyuu for the current quiz_type quiz."""
 
-    answer_time = datetime.now()
+    # when Discord received the message, not when we got to handle it
+    answer_time = to_database_time(ctx.message.created_at)
 
     answer = answer.replace('"', "")
 
@@ -425,41 +893,54 @@ async def answer_quiz_type(
         await ctx.send(embed=embed)
         return
 
-    with bot.session as session:
-        current_quiz_date = get_current_quiz_date(
-            daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME
-        )
+    current_quiz_date = get_current_quiz_date(
+        daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME, now=answer_time
+    )
 
-        # get quiz for this date and type
-        quiz = (
-            session.query(Quiz)
-            .filter(Quiz.id_type == quiz_type_id, Quiz.date == current_quiz_date)
-            .first()
-        )
-        if not quiz:
-            await ctx.send(f"No {quiz_type_name} quiz today :disappointed_relieved:")
-            return
+    # get quiz for this date and type
+    quiz = bot.get_quiz(quiz_type_id, current_quiz_date)
+    if not quiz:
+        await ctx.send(f"No {quiz_type_name} quiz today :disappointed_relieved:")
+        return
 
-        user = get_user(session=session, user=ctx.author, add_if_not_exist=True)
+    user = get_user(user=ctx.author, add_if_not_exist=True)
 
-        has_correct_answer = (
-            session.query(Answer)
-            .filter(
-                Answer.user_id == user.id,
-                Answer.quiz_id == quiz.id,
-                Answer.is_correct,
-            )
-            .first()
-        )
-        has_correct_bonus = (
-            session.query(Answer)
-            .filter(
-                Answer.user_id == user.id,
-                Answer.quiz_id == quiz.id,
-                Answer.is_bonus_point,
+    quiz_answer = quiz.answer.replace('"', "")
+
+    # Generate a pattern to match with the correct answer
+    user_answer_pattern = process_user_input(
+        input_str=answer, partial_match=False, swap_words=True
+    )
+
+    # If the pattern matches: the answer is correct
+    quiz_answers = quiz_answer.split("|")
+    is_correct = any(
+        re.search(user_answer_pattern, a.strip(), re.IGNORECASE) for a in quiz_answers
+    )
+
+    def store_answer() -> Optional[float]:
+        with bot.session as session:
+            return submit_answer(
+                session=session,
+                user_id=user.id,
+                quiz_id=quiz.id,
+                answer=answer,
+                answer_time=answer_time,
+                is_correct=is_correct,
             )
-            .first()
-        )
+
+    # the answers of a user to a quiz are stored one at a time, in order
+    async with answer_lock(user.id, quiz.id):
+        # only stored if they started the quiz and haven't answered correctly yet
+        answer_duration = await asyncio.to_thread(store_answer)
+
+    if answer_duration is None:
+        with bot.session as session:
+            parameters = {"user_id": user.id, "quiz_id": quiz.id}
+            has_correct_answer = session.execute(
+                HAS_CORRECT_ANSWER, parameters
+            ).scalar()
+            has_correct_bonus = session.execute(HAS_BONUS_POINT, parameters).scalar()
 
         # if the user has already answered the quiz correctly
         # don't let them answer again
@@ -482,97 +963,44 @@ async def answer_quiz_type(
             await ctx.send(embed=embed)
             return
 
-        # get the time at which the user clicked the button
-        start_quiz_timestamp = (
-            session.query(UserStartQuizTimestamp)
-            .filter(
-                UserStartQuizTimestamp.user_id == user.id,
-                UserStartQuizTimestamp.quiz_id == quiz.id,
-            )
-            .first()
+        # otherwise the user hasn't clicked the button yet
+        embed.add_field(
+            name="Invalid",
+            value=f"You haven't started the {quiz_type_name} quiz yet. How would you know the answer? <:worrystare:1184497003267358953>",
+            inline=True,
         )
 
-        # if the user hasn't clicked the button yet
-        # don't let them answer
-        if not start_quiz_timestamp:
-            embed.add_field(
-                name="Invalid",
-                value=f"You haven't started the {quiz_type_name} quiz yet. How would you know the answer? <:worrystare:1184497003267358953>",
-                inline=True,
-            )
-
-            await ctx.send(embed=embed)
-            return
+        await ctx.send(embed=embed)
+        return
 
-        # compute answer time in seconds
-        answer_time = answer_time - start_quiz_timestamp.timestamp
-        answer_time = round(answer_time.total_seconds(), 3)
+    if is_correct:
+        # the bonus point can only be claimed after the correct answer
+        if quiz.bonus_answer:
+            bonus_point_feedback = f" (you can also try to get the bonus point using `!{quiz_type_name.lower().replace(' ', '')}bonus ||your answer||`)"
+        else:
+            bonus_point_feedback = ""
 
-        # create the answer object
-        user_answer = Answer(
-            user_id=user.id,
-            quiz_id=quiz.id,
-            answer=answer,
-            answer_time=answer_time,
-            is_bonus_point=False,
+        embed.add_field(
+            name="Answer",
+            value=f"✅ Correct in {answer_duration}s!{bonus_point_feedback}",
+            inline=True,
         )
 
-        quiz_answer = quiz.answer.replace('"', "")
-
-        # Generate a pattern to match with the correct answer
-        user_answer_pattern = process_user_input(
-            input_str=answer, partial_match=False, swap_words=True
+    # Otherwise, the pattern doesn't match: the answer is incorrect
+    else:
+        embed.add_field(
+            name="Answer",
+            value="❌ Incorrect!",
+            inline=True,
         )
 
-        # If the pattern matches: the answer is correct
-        quiz_answers = quiz_answer.split("|")
-        if any(re.search(user_answer_pattern, a.strip(), re.IGNORECASE) for a in quiz_answers):
-
-            # if they don't have a bonus point yet
-            if not has_correct_bonus and quiz.bonus_answer:
-                bonus_point_feedback = f" (you can also try to get the bonus point using `!{quiz_type_name.lower().replace(' ', '')}bonus ||your answer||`)"
-            else:
-                bonus_point_feedback = ""
-
-            embed.add_field(
-                name="Answer",
-                value=f"✅ Correct in {answer_time}s!{bonus_point_feedback}",
-                inline=True,
-            )
-
-            # Store the user's answer in the Answer table
-            with bot.session as session:
-                user_answer.is_correct = True
-                session.add(user_answer)
-                session.commit()
-
-            # send the embed
-            await ctx.send(embed=embed)
-
-            return
-
-        # Otherwise, the pattern doesn't match: the answer is incorrect
-        else:
-            embed.add_field(
-                name="Answer",
-                value="❌ Incorrect!",
-                inline=True,
-            )
-
-            # Store the user's answer in the Answer table
-            with bot.session as session:
-                user_answer.is_correct = False
-                session.add(user_answer)
-                session.commit()
-
-            await ctx.send(embed=embed)
-
-            return
+    await ctx.send(embed=embed)
 
 
 # --- Answering character --- #
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="malebonus", aliases=["mb", "malecharacter", "mc", "ma", "maleanime"])
 # Add other decorators as needed
 async def male_bonus_answer_quiz(
@@ -607,6 +1035,7 @@ async def male_bonus_answer_quiz(
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(
     name="femalebonus", aliases=["fb", "femalecharacter", "fc", "fa", "femaleanime"]
 )
@@ -643,6 +1072,7 @@ async def female_bonus_answer_quiz(
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="songbonus", aliases=["sb", "songb"])
 async def song_bonus_answer_quiz(ctx: commands.Context, *answer: str):
     """
@@ -671,6 +1101,7 @@ async def song_bonus_answer_quiz(ctx: commands.Context, *answer: str):
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="maleimagebonus", aliases=["mib"])
 async def male_image_bonus_answer_quiz(ctx: commands.Context, *answer: str):
     """
@@ -699,6 +1130,7 @@ async def male_image_bonus_answer_quiz(ctx: commands.Context, *answer: str):
     )
 
 
+@rate_limit(answers_rate_limiter, delete_message=True)
 @bot.command(name="femaleimagebonus", aliases=["fib"])
 async def female_image_bonus_answer_quiz(ctx: commands.Context, *answer: str):
     """
@@ -737,7 +1169,8 @@ async def answer_bonus_quiz(
     Attempt to earn the bonus point for today's quiz, once the main quiz has been answered correctly.
     """
 
-    answer_time = datetime.now()
+    # when Discord received the message, not when we got to handle it
+    answer_time = to_database_time(ctx.message.created_at)
 
     # Sanitize the answer
     answer = answer.replace('"', "")
@@ -762,68 +1195,66 @@ async def answer_bonus_quiz(
         await ctx.send(embed=embed)
         return
 
-    with bot.session as session:
-        current_quiz_date = get_current_quiz_date(
-            daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME
+    current_quiz_date = get_current_quiz_date(
+        daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME, now=answer_time
+    )
+
+    quiz = bot.get_quiz(quiz_type_id, current_quiz_date)
+
+    if not quiz:
+        embed.add_field(
+            name="Invalid",
+            value=f"No {quiz_type_name} quiz available today. :disappointed_relieved:",
+            inline=True,
         )
+        await ctx.send(embed=embed)
+        return
 
-        quiz = (
-            session.query(Quiz)
-            .filter(Quiz.id_type == quiz_type_id, Quiz.date == current_quiz_date)
-            .first()
+    if not quiz.bonus_answer:
+        embed.add_field(
+            name="Invalid",
+            value=f"There is no bonus available for today's {quiz_type_name} quiz.",
+            inline=True,
         )
+        await ctx.send(embed=embed)
+        return
 
-        if not quiz:
-            embed.add_field(
-                name="Invalid",
-                value=f"No {quiz_type_name} quiz available today. :disappointed_relieved:",
-                inline=True,
-            )
-            await ctx.send(embed=embed)
-            return
+    user = get_user(user=ctx.author, add_if_not_exist=True)
 
-        if not quiz.bonus_answer:
-            embed.add_field(
-                name="Invalid",
-                value=f"There is no bonus available for today's {quiz_type_name} quiz.",
-                inline=True,
-            )
-            await ctx.send(embed=embed)
-            return
+    quiz_bonus_answer = quiz.bonus_answer.replace('"', "")
 
-        user = get_user(session=session, user=ctx.author, add_if_not_exist=True)
+    user_bonus_answer_pattern = process_user_input(
+        input_str=answer, partial_match=False, swap_words=True
+    )
 
-        has_correct_answer = (
-            session.query(Answer)
-            .filter(
-                Answer.user_id == user.id,
-                Answer.quiz_id == quiz.id,
-                Answer.is_correct,
-            )
-            .first()
-        )
+    quiz_bonus_answers = quiz_bonus_answer.split("|")
+    is_bonus_point = any(
+        re.search(user_bonus_answer_pattern, a.strip(), re.IGNORECASE)
+        for a in quiz_bonus_answers
+    )
 
-        has_correct_bonus = (
-            session.query(Answer)
-            .filter(
-                Answer.user_id == user.id,
-                Answer.quiz_id == quiz.id,
-                Answer.is_bonus_point,
+    def store_bonus_answer() -> Optional[float]:
+        with bot.session as session:
+            return submit_answer(
+                session=session,
+                user_id=user.id,
+                quiz_id=quiz.id,
+                answer=BONUS_ANSWER,
+                answer_time=answer_time,
+                bonus_answer=answer,
+                is_bonus_point=is_bonus_point,
             )
-            .first()
-        )
 
-        if not has_correct_answer:
-            embed.add_field(
-                name="Invalid",
-                value=(
-                    f"You haven't correctly answered today's {quiz_type_name} quiz yet.\n"
-                    f"Use `!{quiz_type_name.lower().replace(' ', '')} ||your answer||` to submit your main answer first."
-                ),
-                inline=True,
-            )
-            await ctx.send(embed=embed)
-            return
+    # the answers of a user to a quiz are stored one at a time, in order
+    async with answer_lock(user.id, quiz.id):
+        # only stored if they answered correctly and haven't got the bonus yet
+        answer_duration_sec = await asyncio.to_thread(store_bonus_answer)
+
+    if answer_duration_sec is None:
+        with bot.session as session:
+            has_correct_bonus = session.execute(
+                HAS_BONUS_POINT, {"user_id": user.id, "quiz_id": quiz.id}
+            ).scalar()
 
         if has_correct_bonus:
             embed.add_field(
@@ -834,61 +1265,34 @@ async def answer_bonus_quiz(
             await ctx.send(embed=embed)
             return
 
-        # Retrieve the user's quiz start time for time calculation
-        start_quiz_timestamp = (
-            session.query(UserStartQuizTimestamp)
-            .filter(
-                UserStartQuizTimestamp.user_id == user.id,
-                UserStartQuizTimestamp.quiz_id == quiz.id,
-            )
-            .first()
+        embed.add_field(
+            name="Invalid",
+            value=(
+                f"You haven't correctly answered today's {quiz_type_name} quiz yet.\n"
+                f"Use `!{quiz_type_name.lower().replace(' ', '')} ||your answer||` to submit your main answer first."
+            ),
+            inline=True,
         )
+        await ctx.send(embed=embed)
+        return
 
-        # Calculate answer time
-        answer_duration = answer_time - start_quiz_timestamp.timestamp
-        answer_duration_sec = round(answer_duration.total_seconds(), 3)
-
-        # Prepare the new answer entry
-        new_answer = Answer(
-            user_id=user.id,
-            quiz_id=quiz.id,
-            answer="\\Bonus Answer\\",
-            bonus_answer=answer,
-            answer_time=answer_duration_sec,
-            is_correct=False,
+    if is_bonus_point:
+        embed.add_field(
+            name="Bonus Answer",
+            value=f"✅ Correct! You claimed the bonus in {answer_duration_sec}s.",
+            inline=True,
         )
-
-        quiz_bonus_answer = quiz.bonus_answer.replace('"', "")
-
-        user_bonus_answer_pattern = process_user_input(
-            input_str=answer, partial_match=False, swap_words=True
+    else:
+        embed.add_field(
+            name="Bonus Answer",
+            value="❌ Incorrect! Better luck next time. :disappointed_relieved:",
+            inline=True,
         )
 
-        quiz_bonus_answers = quiz_bonus_answer.split("|")
-        if any(re.search(user_bonus_answer_pattern, a.strip(), re.IGNORECASE) for a in quiz_bonus_answers):
-            new_answer.is_bonus_point = True
-            session.add(new_answer)
-            session.commit()
-
-            embed.add_field(
-                name="Bonus Answer",
-                value=f"✅ Correct! You claimed the bonus in {answer_duration_sec}s.",
-                inline=True,
-            )
-        else:
-            new_answer.is_bonus_point = False
-            session.add(new_answer)
-            session.commit()
-
-            embed.add_field(
-                name="Bonus Answer",
-                value="❌ Incorrect! Better luck next time. :disappointed_relieved:",
-                inline=True,
-            )
-
-        await ctx.send(embed=embed)
+    await ctx.send(embed=embed)
 
 
+@rate_limit(stats_rate_limiter)
 @bot.command(name="mystats", aliases=["stats", "ms"])
 # Add other decorators as needed
 async def my_stats(ctx: commands.Context, user_id: Optional[int] = None):
@@ -906,47 +1310,52 @@ async def my_stats(ctx: commands.Context, user_id: Optional[int] = None):
         # get the user
 
         user = (
-            get_user(session=session, user=ctx.author, add_if_not_exist=True)
+            get_user(user=ctx.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
 
         if not user:
             await ctx.send(f"{ctx.author.mention} You don't have any stats yet.")
             return
 
-        pages = []
-        quiz_types = session.query(QuizType).all()
-        for quiz_type in quiz_types:
+        def build_pages():
+            pages = []
+            quiz_types = reference_data.quiz_types
+            for quiz_type in quiz_types:
 
-            # create the embed object
-            embed = discord.Embed(title="")
+                # create the embed object
+                embed = discord.Embed(title="")
 
-            # set the author
-            embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
+                # set the author
+                embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-            embed.add_field(
-                name=f"{quiz_type.emoji} {quiz_type.type}", value="", inline=False
-            )
+                embed.add_field(
+                    name=f"{quiz_type.emoji} {quiz_type.type}", value="", inline=False
+                )
 
-            # generate the embed content for this quiz_type
-            embed = await generate_stats_embed_content(
-                session=session,
-                embed=embed,
-                user_id=user.id,
-                quiz_type=quiz_type,
-                daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME,
-            )
+                # generate the embed content for this quiz_type
+                embed = generate_stats_embed_content(
+                    session=session,
+                    embed=embed,
+                    user_id=user.id,
+                    quiz_type=quiz_type,
+                    daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME,
+                )
 
-            embed.add_field(name="", value="", inline=False)
+                embed.add_field(name="", value="", inline=False)
 
-            pages.append(embed)
+                pages.append(embed)
+            return pages
+
+        # query in a worker thread so the event loop keeps handling answers
+        pages = await asyncio.to_thread(build_pages)
 
     paginator = EmbedPaginatorSession(ctx, *pages)
-    await paginator.run()
+    await run_paginator(ctx, paginator)
 
 
-async def generate_stats_embed_content(
+def generate_stats_embed_content(
     session: Session,
     embed: Embed,
     user_id: int,
@@ -977,51 +1386,41 @@ async def generate_stats_embed_content(
     with session as session:
         # Get the answers for this type
 
-        played_quizzes = (
-            session.query(Quiz)
-            .join(UserStartQuizTimestamp)
-            .filter(
-                Quiz.id_type == quiz_type.id,
-                UserStartQuizTimestamp.user_id == user_id,
-            )
-        ).all()
-
-        correct_quizzes = (
-            session.query(Quiz)
-            .join(Answer)
-            .filter(
-                Quiz.id_type == quiz_type.id,
-                Answer.user_id == user_id,
-                Answer.is_correct,
-            )
-        ).all()
+        nb_played_quizzes = readmodel.nb_played_quizzes(
+            session, user_id=user_id, quiz_type_id=quiz_type.id
+        )
 
-        answers = (
-            session.query(Answer)
-            .join(Quiz)
-            .filter(Answer.user_id == user_id, Quiz.id_type == quiz_type.id)
-            .all()
+        answers = readmodel.user_answers(
+            session, user_id=user_id, quiz_type_id=quiz_type.id
         )
 
         correct_answers = [answer for answer in answers if answer.is_correct]
+        correct_quiz_ids = {answer.quiz_id for answer in correct_answers}
+
+        # seiyuu attempts of each quiz
+        nb_attempts_by_quiz = defaultdict(int)
+        for answer in answers:
+            if answer.answer != BONUS_ANSWER:
+                nb_attempts_by_quiz[answer.quiz_id] += 1
 
         # Guess Rates
         guess_rate = (
-            round(len(correct_answers) / len(played_quizzes) * 100, 2)
-            if played_quizzes
+            round(len(correct_answers) / nb_played_quizzes * 100, 2)
+            if nb_played_quizzes
             else "N/A"
         )
         correct_bonus = [answer for answer in answers if answer.is_bonus_point]
         embed.add_field(
             name="> :dart: Guess Rate",
-            value=f"> {guess_rate}% ({len(correct_answers)}/{len(played_quizzes)}) + {len(correct_bonus)} character(s)",
+            value=f"> {guess_rate}% ({len(correct_answers)}/{nb_played_quizzes}) + {len(correct_bonus)} character(s)",
             inline=True,
         )
 
         # Average Guess Time
         average_guess_time = (
             round(
-                np.mean([answer.answer_time for answer in correct_answers]),
+                sum(answer.answer_time for answer in correct_answers)
+                / len(correct_answers),
                 2,
             )
             if correct_answers
@@ -1036,13 +1435,8 @@ async def generate_stats_embed_content(
         embed.add_field(name="", value="", inline=False)
 
         # Total attempts
-        nb_total_attempts = len(
-            [
-                answer
-                for answer in answers
-                if answer.answer != "\\Bonus Answer\\"
-                and answer.quiz_id in [quiz.id for quiz in correct_quizzes]
-            ]
+        nb_total_attempts = sum(
+            nb_attempts_by_quiz[quiz_id] for quiz_id in correct_quiz_ids
         )
 
         embed.add_field(
@@ -1053,8 +1447,8 @@ async def generate_stats_embed_content(
 
         # Average number of attempts per quiz
         average_attempts = (
-            round(nb_total_attempts / len(played_quizzes), 2)
-            if played_quizzes
+            round(nb_total_attempts / nb_played_quizzes, 2)
+            if nb_played_quizzes
             else "N/A"
         )
         embed.add_field(
@@ -1066,37 +1460,19 @@ async def generate_stats_embed_content(
         embed.add_field(name="", value="", inline=False)
 
         # Fastest Guesses for this user
-        fastest_answers = (
-            session.query(Answer)
-            .join(Quiz)
-            .filter(
-                Answer.user_id == user_id,
-                Quiz.id_type == quiz_type.id,
-                Quiz.date < current_quiz_date,
-                Answer.is_correct,
-            )
-            .order_by(Answer.answer_time)
-            .limit(3)
-            .all()
+        fastest_answers = readmodel.fastest_guesses(
+            session,
+            before=current_quiz_date,
+            user_id=user_id,
+            quiz_type_id=quiz_type.id,
+            limit=3,
         )
 
         medals = [":first_place:", ":second_place:", ":third_place:"]
 
-        nb_attempts = []
-        for fastest_answer in fastest_answers:
-            nb_attempts.append(
-                session.query(Answer)
-                .filter(
-                    Answer.user_id == fastest_answer.user_id,
-                    Answer.quiz_id == fastest_answer.quiz_id,
-                    Answer.answer != "\\Bonus Answer\\",
-                )
-                .count()
-            )
-
         fastest_answers = "\n\n".join(
             [
-                f"{medals[i]} | **{answer.answer_time}s** - {answer.answer} in {nb_attempts[i]} attempts on {answer.quiz.date}"
+                f"{medals[i]} | **{answer.answer_time}s** - {answer.answer} in {nb_attempts_by_quiz[answer.quiz_id]} attempts on {answer.quiz_date}"
                 for i, answer in enumerate(fastest_answers)
             ]
         )
@@ -1110,6 +1486,7 @@ async def generate_stats_embed_content(
     return embed
 
 
+@rate_limit(stats_rate_limiter)
 @bot.command(name="myfemaleguesses", aliases=["mfg", "femaleguesses", "fg"])
 async def my_female_guesses(ctx: Context, user_id: Optional[int] = None):
     """
@@ -1126,24 +1503,26 @@ async def my_female_guesses(ctx: Context, user_id: Optional[int] = None):
     with bot.session as session:
         # get the user
         user = (
-            get_user(session=session, user=ctx.author, add_if_not_exist=True)
+            get_user(user=ctx.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
 
         if not user:
             await ctx.send(f"{ctx.author.mention} You don't have any guesses yet.")
             return
 
-        quiz_type = session.query(QuizType).get(2)  # female quiz type
+        quiz_type = reference_data.quiz_types_by_id[2]  # female quiz type
         mgpages = []
 
         # create the embed object for each quiz type
         embed = discord.Embed(title=f"Top Guesses for {quiz_type.type}")
         embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-        # generate the embed content for this quiz_type
-        await generate_guesses_embed_content(
+        # generate the embed content for this quiz_type, in a worker thread so
+        # the event loop keeps handling answers
+        await asyncio.to_thread(
+            generate_guesses_embed_content,
             session=session,
             embed=embed,
             user_id=user.id,
@@ -1159,10 +1538,11 @@ async def my_female_guesses(ctx: Context, user_id: Optional[int] = None):
             )
             return
 
-        paginator = EmbedPaginatorSession(ctx, *mgpages)
-        await paginator.run()
+    paginator = EmbedPaginatorSession(ctx, *mgpages)
+    await run_paginator(ctx, paginator)
 
 
+@rate_limit(stats_rate_limiter)
 @bot.command(name="mymaleguesses", aliases=["mmg", "maleguesses", "mg"])
 async def my_male_guesses(ctx: Context, user_id: Optional[int] = None):
     """
@@ -1179,24 +1559,26 @@ async def my_male_guesses(ctx: Context, user_id: Optional[int] = None):
     with bot.session as session:
         # get the user
         user = (
-            get_user(session=session, user=ctx.author, add_if_not_exist=True)
+            get_user(user=ctx.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
 
         if not user:
             await ctx.send(f"{ctx.author.mention} You don't have any guesses yet.")
             return
 
-        quiz_type = session.query(QuizType).get(1)  # male quiz type
+        quiz_type = reference_data.quiz_types_by_id[1]  # male quiz type
         mgpages = []
 
         # create the embed object for each quiz type
         embed = discord.Embed(title=f"Top Guesses for {quiz_type.type}")
         embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-        # generate the embed content for this quiz_type
-        await generate_guesses_embed_content(
+        # generate the embed content for this quiz_type, in a worker thread so
+        # the event loop keeps handling answers
+        await asyncio.to_thread(
+            generate_guesses_embed_content,
             session=session,
             embed=embed,
             user_id=user.id,
@@ -1210,10 +1592,11 @@ async def my_male_guesses(ctx: Context, user_id: Optional[int] = None):
             await ctx.send(f"{ctx.author.mention} You don't have any male guesses yet.")
             return
 
-        paginator = EmbedPaginatorSession(ctx, *mgpages)
-        await paginator.run()
+    paginator = EmbedPaginatorSession(ctx, *mgpages)
+    await run_paginator(ctx, paginator)
 
 
+@rate_limit(stats_rate_limiter)
 @bot.command(name="maleimageguesses", aliases=["mig"])
 async def my_image_guesses(ctx: Context, user_id: Optional[int] = None):
     """
@@ -1228,24 +1611,26 @@ async def my_image_guesses(ctx: Context, user_id: Optional[int] = None):
     with bot.session as session:
         # get the user
         user = (
-            get_user(session=session, user=ctx.author, add_if_not_exist=True)
+            get_user(user=ctx.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
 
         if not user:
             await ctx.send(f"{ctx.author.mention} You don't have any guesses yet.")
             return
 
-        quiz_type = session.query(QuizType).get(3)
+        quiz_type = reference_data.quiz_types_by_id[3]
         mgpages = []
 
         # create the embed object for each quiz type
         embed = discord.Embed(title=f"Top Guesses for {quiz_type.type}")
         embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-        # generate the embed content for this quiz_type
-        await generate_guesses_embed_content(
+        # generate the embed content for this quiz_type, in a worker thread so
+        # the event loop keeps handling answers
+        await asyncio.to_thread(
+            generate_guesses_embed_content,
             session=session,
             embed=embed,
             user_id=user.id,
@@ -1261,10 +1646,11 @@ async def my_image_guesses(ctx: Context, user_id: Optional[int] = None):
             )
             return
 
-        paginator = EmbedPaginatorSession(ctx, *mgpages)
-        await paginator.run()
+    paginator = EmbedPaginatorSession(ctx, *mgpages)
+    await run_paginator(ctx, paginator)
 
 
+@rate_limit(stats_rate_limiter)
 @bot.command(name="femaleimageguesses", aliases=["fig"])
 async def my_image_guesses(ctx: Context, user_id: Optional[int] = None):
     """
@@ -1279,24 +1665,26 @@ async def my_image_guesses(ctx: Context, user_id: Optional[int] = None):
     with bot.session as session:
         # get the user
         user = (
-            get_user(session=session, user=ctx.author, add_if_not_exist=True)
+            get_user(user=ctx.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
 
         if not user:
             await ctx.send(f"{ctx.author.mention} You don't have any guesses yet.")
             return
 
-        quiz_type = session.query(QuizType).get(4)
+        quiz_type = reference_data.quiz_types_by_id[4]
         mgpages = []
 
         # create the embed object for each quiz type
         embed = discord.Embed(title=f"Top Guesses for {quiz_type.type}")
         embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-        # generate the embed content for this quiz_type
-        await generate_guesses_embed_content(
+        # generate the embed content for this quiz_type, in a worker thread so
+        # the event loop keeps handling answers
+        await asyncio.to_thread(
+            generate_guesses_embed_content,
             session=session,
             embed=embed,
             user_id=user.id,
@@ -1312,10 +1700,11 @@ async def my_image_guesses(ctx: Context, user_id: Optional[int] = None):
             )
             return
 
-        paginator = EmbedPaginatorSession(ctx, *mgpages)
-        await paginator.run()
+    paginator = EmbedPaginatorSession(ctx, *mgpages)
+    await run_paginator(ctx, paginator)
 
 
+@rate_limit(stats_rate_limiter)
 @bot.command(name="mysongguesses", aliases=["msg", "songguesses", "sg"])
 async def my_song_guesses(ctx: Context, user_id: Optional[int] = None):
     """
@@ -1332,24 +1721,26 @@ async def my_song_guesses(ctx: Context, user_id: Optional[int] = None):
     with bot.session as session:
         # get the user
         user = (
-            get_user(session=session, user=ctx.author, add_if_not_exist=True)
+            get_user(user=ctx.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
 
         if not user:
             await ctx.send(f"{ctx.author.mention} You don't have any guesses yet.")
             return
 
-        quiz_type = session.query(QuizType).get(5)
+        quiz_type = reference_data.quiz_types_by_id[5]
         mgpages = []
 
         # create the embed object for each quiz type
         embed = discord.Embed(title=f"Top Guesses for {quiz_type.type}")
         embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-        # generate the embed content for this quiz_type
-        await generate_guesses_embed_content(
+        # generate the embed content for this quiz_type, in a worker thread so
+        # the event loop keeps handling answers
+        await asyncio.to_thread(
+            generate_guesses_embed_content,
             session=session,
             embed=embed,
             user_id=user.id,
@@ -1363,11 +1754,11 @@ async def my_song_guesses(ctx: Context, user_id: Optional[int] = None):
             await ctx.send(f"{ctx.author.mention} You don't have any song guesses yet.")
             return
 
-        paginator = EmbedPaginatorSession(ctx, *mgpages)
-        await paginator.run()
+    paginator = EmbedPaginatorSession(ctx, *mgpages)
+    await run_paginator(ctx, paginator)
 
 
-async def generate_guesses_embed_content(
+def generate_guesses_embed_content(
     session: Session,
     embed: Embed,
     user_id: int,
@@ -1457,7 +1848,7 @@ async def generate_guesses_embed_content(
         )
 
         medals = [":first_place:", ":second_place:", ":third_place:"]
-        quiz_types = session.query(QuizType).all()
+        quiz_types = reference_data.quiz_types
         nb_attempts = []
         for fastest_answer in fastest_answers:
             nb_attempts.append(
@@ -1474,7 +1865,7 @@ async def generate_guesses_embed_content(
             embed = discord.Embed(title=f"Top Guesses for {quiz_type.type}")
             embed.set_author(name=ctx.author.name, icon_url=ctx.author.avatar.url)
 
-            page_end = np.min([page_start + 10, len(fastest_answers)])
+            page_end = min(page_start + 10, len(fastest_answers))
 
             for i, answer in enumerate(
                 fastest_answers[page_start:page_end], start=page_start
@@ -1485,6 +1876,7 @@ async def generate_guesses_embed_content(
             mgpages.append(embed)
 
 
+@rate_limit(leaderboards_rate_limiter)
 @bot.command(name="topspeed", aliases=["tops"])
 # Add other decorators as needed
 async def topspeed(ctx: commands.Context):
@@ -1497,27 +1889,22 @@ async def topspeed(ctx: commands.Context):
     !tops
     """
 
-    with bot.session as session:
-        answers = session.query(Answer).all()
-        medals = [":first_place:", ":second_place:", ":third_place:"]
+    medals = [":first_place:", ":second_place:", ":third_place:"]
 
-        if not answers:
-            await ctx.send(f"No valid answers found.")
-            return
+    def fetch_fastest_answers():
+        with bot.session as session:
+            if not readmodel.has_answers(session):
+                return None
 
-        # Get the fastest answers for this quiz type
-        current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
-        fastest_answers = (
-            session.query(Answer)
-            .join(Quiz)
-            .filter(
-                Answer.is_correct,
-                Quiz.date < current_quiz_date,
-                Answer.answer != "\\Bonus Answer\\",
-            )
-            .order_by(Answer.answer_time)
-            .all()
-        )
+            # Get the fastest answers for this quiz type
+            current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
+            return readmodel.fastest_guesses(session, before=current_quiz_date)
+
+    # query in a worker thread so the event loop keeps handling answers
+    fastest_answers = await asyncio.to_thread(fetch_fastest_answers)
+    if fastest_answers is None:
+        await ctx.send(f"No valid answers found.")
+        return
 
     toppages = []
     for page_start in range(0, len(fastest_answers), 20):
@@ -1534,9 +1921,10 @@ async def topspeed(ctx: commands.Context):
         toppages.append(embed)
 
     session = EmbedPaginatorSession(ctx, *toppages)
-    await session.run()
+    await run_paginator(ctx, session)
 
 
+@rate_limit(leaderboards_rate_limiter)
 @bot.command(name="currenttop", aliases=["ct"])
 async def current_top(ctx: commands.Context):
     """
@@ -1547,87 +1935,80 @@ async def current_top(ctx: commands.Context):
     !currenttop
     !ct
     """
-    with bot.session as session:
-        # Get the fastest answers for today's quiz and onwards
-        current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
-        tomorrow_reset_date = current_quiz_date + timedelta(days=1)
 
-        # Explicitly define the join conditions
-        fastest_answers = (
-            session.query(Answer, QuizType)
-            .join(Quiz, Answer.quiz_id == Quiz.id)
-            .join(QuizType, Quiz.id_type == QuizType.id)
-            .filter(
-                Answer.is_correct,
-                Quiz.date >= current_quiz_date,
-                Quiz.date < tomorrow_reset_date,
-                Answer.answer != "\\Bonus Answer\\",
-            )
-            .order_by(QuizType.id, Answer.answer_time)
-            .all()
-        )
+    def fetch_fastest_answers():
+        with bot.session as session:
+            # Get the fastest answers for today's quiz and onwards
+            current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
 
-        if not fastest_answers:
-            await ctx.send(f"No valid answers found.")
-            return
+            return readmodel.guesses_of_day(session, current_quiz_date)
 
-        pages = []
+    # query in a worker thread so the event loop keeps handling answers
+    fastest_answers = await asyncio.to_thread(fetch_fastest_answers)
 
-        # Initialize quiz_types to group answers by their type, and keep the order based on QuizType.id
-        quiz_types = OrderedDict()
-        medals = [":first_place:", ":second_place:", ":third_place:"]
+    if not fastest_answers:
+        await ctx.send(f"No valid answers found.")
+        return
 
-        # Group answers by quiz type
-        for answer, quiz_type in fastest_answers:
-            if quiz_type.type not in quiz_types:
-                quiz_types[quiz_type.type] = []
-            quiz_types[quiz_type.type].append(
-                (answer.user.id, answer.answer_time, quiz_type.emoji)
-            )
+    pages = []
 
-        # Convert quiz_types dict into a list of tuples so we can chunk it
-        quiz_type_items = list(quiz_types.items())
+    # Initialize quiz_types to group answers by their type, and keep the order based on QuizType.id
+    quiz_types = OrderedDict()
+    medals = [":first_place:", ":second_place:", ":third_place:"]
 
-        # Helper function to chunk quiz types into groups of 2
-        def chunked(iterable, size):
-            it = iter(iterable)
-            return iter(lambda: tuple(islice(it, size)), ())
+    # Group answers by quiz type
+    for answer in fastest_answers:
+        quiz_type = reference_data.quiz_types_by_id[answer.quiz_type_id]
+        if quiz_type.type not in quiz_types:
+            quiz_types[quiz_type.type] = []
+        quiz_types[quiz_type.type].append(
+            (answer.user_id, answer.answer_time, quiz_type.emoji)
+        )
 
-        # Iterate over the quiz type chunks
-        for quiz_type_chunk in chunked(quiz_type_items, 2):
-            embed = discord.Embed(
-                title="Today's Top Guesses",
-                description="Fastest answers by type",
-                color=0x2F3136,
-            )
+    # Convert quiz_types dict into a list of tuples so we can chunk it
+    quiz_type_items = list(quiz_types.items())
 
-            # Add up to two fields (quiz types) to each embed
-            for quiz_type, user_times in quiz_type_chunk:
-                user_times = sorted(user_times, key=lambda x: x[1])
+    # Helper function to chunk quiz types into groups of 2
+    def chunked(iterable, size):
+        it = iter(iterable)
+        return iter(lambda: tuple(islice(it, size)), ())
 
-                value = ""
-                for i, (user_id, time, emoji) in enumerate(user_times[:10]):
-                    rank = f"{medals[i]} " if i < 3 else f"#{i + 1}: "
-                    value += f"> {rank} <@{user_id}> - **{time:.2f}s**\n"
+    # Iterate over the quiz type chunks
+    for quiz_type_chunk in chunked(quiz_type_items, 2):
+        embed = discord.Embed(
+            title="Today's Top Guesses",
+            description="Fastest answers by type",
+            color=0x2F3136,
+        )
 
-                # Add a field for this quiz type
-                emoji = user_times[0][2] if user_times else ""
-                embed.add_field(
-                    name=f"> {emoji} {quiz_type}",
-                    value=value or "No data.",
-                    inline=True,
-                )
+        # Add up to two fields (quiz types) to each embed
+        for quiz_type, user_times in quiz_type_chunk:
+            user_times = sorted(user_times, key=lambda x: x[1])
 
-            embed.add_field(name="", value="", inline=False)
+            value = ""
+            for i, (user_id, time, emoji) in enumerate(user_times[:10]):
+                rank = f"{medals[i]} " if i < 3 else f"#{i + 1}: "
+                value += f"> {rank} <@{user_id}> - **{time:.2f}s**\n"
 
-            # Append this embed to the pages list
-            pages.append(embed)
+            # Add a field for this quiz type
+            emoji = user_times[0][2] if user_times else ""
+            embed.add_field(
+                name=f"> {emoji} {quiz_type}",
+                value=value or "No data.",
+                inline=True,
+            )
+
+        embed.add_field(name="", value="", inline=False)
 
-        # Start pagination session
-        session = EmbedPaginatorSession(ctx, *pages)
-        await session.run()
+        # Append this embed to the pages list
+        pages.append(embed)
+
+    # Start pagination session
+    session = EmbedPaginatorSession(ctx, *pages)
+    await run_paginator(ctx, session)
 
 
+@rate_limit(leaderboards_rate_limiter)
 @bot.command(name="seiyuuleaderboard", aliases=["slb"])
 # Add other decorators as needed
 async def seiyuuleaderboard(ctx: commands.Context):
@@ -1640,8 +2021,13 @@ async def seiyuuleaderboard(ctx: commands.Context):
     !slb
     """
 
-    if bot.last_leaderboard_update is not None and (
-        datetime.now() - bot.last_leaderboard_update < timedelta(minutes=120)
+    # profiling leaves the cooldown and the database as they are
+    profiled = isinstance(ctx, ProfiledContext)
+
+    if (
+        not profiled
+        and bot.last_leaderboard_update is not None
+        and datetime.now() - bot.last_leaderboard_update < timedelta(minutes=120)
     ):
         # write a message to let the user know that the leaderboard was already shown recently
         await ctx.send(
@@ -1649,37 +2035,23 @@ async def seiyuuleaderboard(ctx: commands.Context):
         )
         return
 
-    with bot.session as session:
-        users = session.query(User).all()
-        quiz_types = session.query(QuizType).all()
-        medals = [":first_place:", ":second_place:", ":third_place:"]
-
-        # initialize the score dict
-        user_scores = {"total": {user.id: 0 for user in users}}
-        for quiz_type in quiz_types:
-            user_scores[quiz_type.type] = {user.id: 0 for user in users}
-
-        for user in users:
-            for quiz_type in quiz_types:
-                user_score = await compute_user_score(
-                    id_user=user.id, id_quiz_type=quiz_type.id, bonus_points=False
-                )
-                user_scores[quiz_type.type][user.id] += user_score
-                user_scores["total"][user.id] += user_score
+    # make sure users only known by the cache are ranked too
+    if not profiled:
+        user_cache.flush()
 
-        for quiz_type in quiz_types:
-            user_scores[quiz_type.type] = await sort_user_scores_by_value(
-                user_scores[quiz_type.type]
-            )
+    quiz_types = reference_data.quiz_types
+    medals = [":first_place:", ":second_place:", ":third_place:"]
 
-        # sort global by value
-        user_scores["total"] = await sort_user_scores_by_value(user_scores["total"])
+    # score in a worker thread so the event loop keeps handling answers
+    users, user_scores = await asyncio.to_thread(
+        compute_leaderboard_scores, bonus_points=False
+    )
 
     pages = []
     for page_start in range(0, len(users), 10):
         embed = discord.Embed(title="Leaderboard")
 
-        page_end = np.min([page_start + 10, len(users)])
+        page_end = min(page_start + 10, len(users))
 
         for quiz_type in quiz_types:
             value = ""
@@ -1704,13 +2076,76 @@ async def seiyuuleaderboard(ctx: commands.Context):
 
         pages.append(embed)
 
-    bot.last_leaderboard_update = datetime.now()
+    if not profiled:
+        bot.last_leaderboard_update = datetime.now()
 
     session = EmbedPaginatorSession(ctx, *pages)
-    await session.run()
+    await run_paginator(ctx, session)
+
+
+def compute_leaderboard_scores(bonus_points=True) -> Tuple[List[int], dict]:
+    """
+    Compute the scores of every user, by quiz type and in total.
+
+    Score is computed as follows:
+    - 1 point for each correct answer
+    - 0.5 point for each bonus character point
+    - if there has been more than 5 attempts before getting a correct answer: 0.5 points
+    - if there has been more than 8 attempts before getting a correct answer: 0.25 points
+    - if there has been more than 3 attempts before getting a correct bonus character: 0.25 points
+
+    Parameters
+    ----------
+    bonus_points : bool, optional
+        Whether the bonus character points count, by default True.
+
+    Returns
+    -------
+    Tuple[List[int], dict]
+        The IDs of the users, and their scores by quiz type name and for
+        "total", each sorted from the highest.
+    """
+
+    with bot.session as session:
+        users = readmodel.user_ids(session)
+        scored_answers = readmodel.scored_answers(session)
+    quiz_types = reference_data.quiz_types
+
+    # points of each user by quiz type ID
+    nb_points = defaultdict(int)
+    for scored in scored_answers:
+        nb_answers = scored.nb_answers
+        if not scored.is_bonus:
+            nb_point = 1 if nb_answers <= 5 else 0.5 if nb_answers <= 8 else 0.25
+        elif bonus_points:
+            nb_point = 0.5 if nb_answers <= 3 else 0.25
+        else:
+            continue
+        nb_points[(scored.user_id, scored.quiz_type_id)] += nb_point
+
+    # initialize the score dict
+    user_scores = {"total": {user_id: 0 for user_id in users}}
+    for quiz_type in quiz_types:
+        user_scores[quiz_type.type] = {user_id: 0 for user_id in users}
+
+    for user_id in users:
+        for quiz_type in quiz_types:
+            user_score = round(float(nb_points[(user_id, quiz_type.id)]), 2)
+            user_scores[quiz_type.type][user_id] += user_score
+            user_scores["total"][user_id] += user_score
+
+    for quiz_type in quiz_types:
+        user_scores[quiz_type.type] = sort_user_scores_by_value(
+            user_scores[quiz_type.type]
+        )
 
+    # sort global by value
+    user_scores["total"] = sort_user_scores_by_value(user_scores["total"])
 
-async def sort_user_scores_by_value(user_scores: dict):
+    return users, user_scores
+
+
+def sort_user_scores_by_value(user_scores: dict):
     return dict(
         sorted(
             user_scores.items(),
@@ -1720,6 +2155,7 @@ async def sort_user_scores_by_value(user_scores: dict):
     )
 
 
+@rate_limit(leaderboards_rate_limiter)
 @bot.command(name="leaderboard", aliases=["lb"])
 # Add other decorators as needed
 async def leaderboard(ctx: commands.Context):
@@ -1739,8 +2175,13 @@ async def leaderboard(ctx: commands.Context):
     !lb
     """
 
-    if bot.last_leaderboard_update is not None and (
-        datetime.now() - bot.last_leaderboard_update < timedelta(minutes=120)
+    # profiling leaves the cooldown and the database as they are
+    profiled = isinstance(ctx, ProfiledContext)
+
+    if (
+        not profiled
+        and bot.last_leaderboard_update is not None
+        and datetime.now() - bot.last_leaderboard_update < timedelta(minutes=120)
     ):
         # write a message to let the user know that the leaderboard was already shown recently
         await ctx.send(
@@ -1748,38 +2189,21 @@ async def leaderboard(ctx: commands.Context):
         )
         return
 
-    with bot.session as session:
-        users = session.query(User).all()
-        quiz_types = session.query(QuizType).all()
-        medals = [":first_place:", ":second_place:", ":third_place:"]
-
-        # initialize the score dict
-        user_scores = {"total": {user.id: 0 for user in users}}
-        for quiz_type in quiz_types:
-            user_scores[quiz_type.type] = {user.id: 0 for user in users}
-
-        for i, user in enumerate(users):
+    # make sure users only known by the cache are ranked too
+    if not profiled:
+        user_cache.flush()
 
-            for quiz_type in quiz_types:
-                user_score = await compute_user_score(
-                    id_user=user.id, id_quiz_type=quiz_type.id
-                )
-                user_scores[quiz_type.type][user.id] += user_score
-                user_scores["total"][user.id] += user_score
-
-        for quiz_type in quiz_types:
-            user_scores[quiz_type.type] = await sort_user_scores_by_value(
-                user_scores[quiz_type.type]
-            )
+    quiz_types = reference_data.quiz_types
+    medals = [":first_place:", ":second_place:", ":third_place:"]
 
-        # sort global by value
-        user_scores["total"] = await sort_user_scores_by_value(user_scores["total"])
+    # score in a worker thread so the event loop keeps handling answers
+    users, user_scores = await asyncio.to_thread(compute_leaderboard_scores)
 
     pages = []
     for page_start in range(0, len(users), 10):
         embed = discord.Embed(title="Leaderboard")
 
-        page_end = np.min([page_start + 10, len(users)])
+        page_end = min(page_start + 10, len(users))
 
         for idx_q, quiz_type in enumerate(quiz_types):
             value = ""
@@ -1810,73 +2234,14 @@ async def leaderboard(ctx: commands.Context):
 
         pages.append(embed)
 
-    bot.last_leaderboard_update = datetime.now()
+    if not profiled:
+        bot.last_leaderboard_update = datetime.now()
 
     session = EmbedPaginatorSession(ctx, *pages)
-    await session.run()
-
-
-async def compute_user_score(id_user: int, id_quiz_type: int, bonus_points=True):
-    """
-    Compute the score of a user for a given quiz type.
-
-    Score is computed as follows:
-    - 1 point for each correct answer
-    - 0.5 point for each bonus character point
-    - if there has been more than 5 attempts before getting a correct answer: 0.5 points
-    - if there has been more than 8 attempts before getting a correct answer: 0.25 points
-    - if there has been more than 3 attempts before getting a correct bonus character: 0.25 points
-
-    Parameters
-    ----------
-    id_user : int
-        The id of the user.
-
-    id_quiz_type : int
-        The id of the quiz type.
-
-    Returns
-    -------
-    float
-        The score of the user for the given quiz type.
-    """
-
-    nb_points = 0
-    with bot.session as session:
-
-        # Combined query to get attempts for both regular and bonus points
-        attempts = (
-            session.query(
-                Answer.quiz_id,
-                func.count(Answer.id).label("nb_attempts"),
-                case((Answer.is_bonus_point, "bonus"), else_="regular").label("type"),
-            )
-            .join(Quiz)
-            .filter(
-                Answer.user_id == id_user,
-                Quiz.id_type == id_quiz_type,
-                Answer.is_correct | Answer.is_bonus_point,
-            )
-            .group_by(
-                Answer.quiz_id, case((Answer.is_bonus_point, "bonus"), else_="regular")
-            )
-            .all()
-        )
-
-        nb_points = 0
-
-        for attempt in attempts:
-            nb_attempts = attempt.nb_attempts
-            if attempt.type == "regular":
-                nb_point = 1 if nb_attempts <= 5 else 0.5 if nb_attempts <= 8 else 0.25
-                nb_points += nb_point
-            elif attempt.type == "bonus" and bonus_points:
-                nb_point = 0.5 if nb_attempts <= 3 else 0.25
-                nb_points += nb_point
-
-        return round(float(nb_points), 2)
+    await run_paginator(ctx, session)
 
 
+@rate_limit(leaderboards_rate_limiter)
 @bot.command(name="legacyleaderboard", aliases=["llb"])
 # Add other decorators as needed
 async def legacy_leaderboard(ctx: commands.Context):
@@ -1919,12 +2284,42 @@ async def legacy_leaderboard(ctx: commands.Context):
 async def history(interaction: discord.Interaction):
     """Get your answer history for today's quiz."""
 
+    started = perf_counter()
+    await interaction.response.defer(ephemeral=True)
+    record_interaction_latency("history", "ack", started)
+
+    try:
+        async with bot.command_scheduler.slot(ANALYTICAL):
+            # build it in a worker thread so the event loop keeps acknowledging others
+            embed = await asyncio.to_thread(build_history_embed, interaction.user)
+    except asyncio.QueueFull:
+        await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+        return
+
+    await interaction.followup.send(embed=embed, ephemeral=True)
+    record_interaction_latency("history", "result", started)
+
+
+def build_history_embed(user: discord.User) -> Embed:
+    """Build the embed of a user's answer history for today's quiz.
+
+    Parameters
+    ----------
+    user : discord.User
+        Discord user.
+
+    Returns
+    -------
+    Embed
+        The history embed.
+    """
+
     with bot.session as session:
-        user = get_user(session=session, user=interaction.user, add_if_not_exist=True)
+        db_user = get_user(user=user, add_if_not_exist=True)
 
         current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
 
-        quiz_types = session.query(QuizType).all()
+        quiz_types = reference_data.quiz_types
 
         embed = discord.Embed(
             title="Today's History",
@@ -1932,8 +2327,8 @@ async def history(interaction: discord.Interaction):
         )
 
         embed.set_author(
-            name=interaction.user.name,
-            icon_url=interaction.user.avatar.url,
+            name=user.name,
+            icon_url=user.avatar.url,
         )
 
         for quiz_type in quiz_types:
@@ -1944,15 +2339,11 @@ async def history(interaction: discord.Interaction):
             )
 
             # get the answers list for this user and this quiz type
-            answers = (
-                session.query(Answer)
-                .join(Quiz)
-                .filter(
-                    Answer.user_id == user.id,
-                    Quiz.id_type == quiz_type.id,
-                    Quiz.date == current_quiz_date,
-                )
-                .all()
+            answers = readmodel.user_answers(
+                session,
+                user_id=db_user.id,
+                quiz_type_id=quiz_type.id,
+                quiz_date=current_quiz_date,
             )
 
             # if the user hasn't answered yet
@@ -1988,7 +2379,23 @@ async def history(interaction: discord.Interaction):
 
             embed.add_field(name="", value="", inline=False)
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+
+async def precompute_quiz_results():
+    """Compute the results of the closing day shortly before the reset."""
+
+    # before the reset, the current quiz date is the day about to close
+    closing_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
+    quiz_type_ids = [quiz_type.id for quiz_type in reference_data.quiz_types]
+
+    def compute():
+        with bot.session as session:
+            return compute_quiz_results(session, closing_quiz_date, quiz_type_ids)
+
+    # keep the event loop free for the players while the stats are computed
+    bot.precomputed_quiz_results = await asyncio.to_thread(compute)
+    print(f"precomputed the results of {closing_quiz_date}")
 
 
 @bot.event
@@ -1997,310 +2404,208 @@ async def post_yesterdays_quiz_results():
     current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
     yesterday = current_quiz_date - timedelta(days=1)
 
-    # Query the database for the quiz that matches the calculated date
+    quiz_types = reference_data.quiz_types
+    payload = bot.precomputed_quiz_results
+
     with bot.session as session:
-        quiz_types = session.query(QuizType).all()
-        for i, quiz_type in enumerate(quiz_types):
-            # get yesterday's quiz
-            yesterday_quiz = (
-                session.query(Quiz)
-                .filter(Quiz.id_type == quiz_type.id, Quiz.date == yesterday)
-                .first()
+        if (
+            payload is None
+            or payload["date"] != yesterday
+            or any(quiz_type.id not in payload["quizzes"] for quiz_type in quiz_types)
+        ):
+            # nothing precomputed for yesterday (e.g. !pqr), compute it all now
+            payload = compute_quiz_results(
+                session, yesterday, [quiz_type.id for quiz_type in quiz_types]
             )
+            bot.precomputed_quiz_results = payload
+        else:
+            # only add the answers given since the results were precomputed
+            merge_late_answers(session, payload)
 
-            embed = discord.Embed(
-                title=f"Yesterday's {quiz_type.type} Quiz Results",
-                color=0xBBE6F3,
-            )
+    # every message is built once, then sent to every quiz channel
+    messages = [
+        {"embed": build_quiz_results_embed(quiz_type, payload["quizzes"][quiz_type.id])}
+        for quiz_type in quiz_types
+    ]
+    # resolve the new day's quizzes once, for every button of every channel
+    bot.load_daily_quiz_ids(current_quiz_date)
+    messages.append({"view": NewQuizView()})
 
-            if not yesterday_quiz:
-                embed.add_field(
-                    name=f"There was no {quiz_type.type} quiz yesterday.",
-                    value="",
-                    inline=False,
-                )
-                # send it on every channels set as quiz channel
-                for quiz_channel in session.query(QuizChannels).all():
-                    channel = bot.get_channel(quiz_channel.id_channel)
-                    await channel.send(embed=embed)
-                continue
+    # send them on every channels set as quiz channel
+    await broadcast(bot, reference_data.quiz_channels.values(), messages)
 
-            embed.set_footer(
-                text=f"Quiz ID: {yesterday_quiz.id}",
-            )
 
-            if yesterday_quiz:
-                quiz_answers = [a.strip() for a in yesterday_quiz.answer.split("|")]
-                if len(quiz_answers) == 1:
-                    answer_feedback = f"> Answer: ||{quiz_answers[0]}||"
-                else:
-                    formatted_answers = " / ".join(quiz_answers)
-                    answer_feedback = f"> Answers: ||{formatted_answers}||"
+def build_quiz_results_embed(quiz_type: QuizType, results: Optional[dict]) -> Embed:
+    """Build the results embed of yesterday's quiz of a given type.
 
-                if yesterday_quiz.bonus_answer:
-                    bonus_answers = [b.strip() for b in yesterday_quiz.bonus_answer.split("|")]
-                    if len(bonus_answers) == 1:
-                            bonus_feedback = f"\n> Bonus answer: ||{bonus_answers[0]}||"
-                    else:
-                        formatted_bonus = " / ".join(bonus_answers)
-                        bonus_feedback = f"\n> Bonus answers: ||{formatted_bonus}||"
-                else:
-                    bonus_feedback = ""
+    Parameters
+    ----------
+    quiz_type : QuizType
+        Type of the quiz.
 
-                value = f"{answer_feedback}{bonus_feedback}"
-            else:
-                value = "> No quiz took place :disappointed_relieved:"
+    results : Optional[dict]
+        Results of the quiz computed by `compute_quiz_results`, None if there
+        was no quiz of that type.
 
-            embed.add_field(
-                name=f"> {quiz_type.emoji} {quiz_type.type}",
-                value=value,
-                inline=True,
-            )
-            embed.add_field(
-                name="> Clip",
-                value=f"> {yesterday_quiz.clip}" if yesterday_quiz else "> N/A",
-                inline=True,
-            )
-
-            # if there was no quiz, don't need to send all the stats of the quiz
-            # stop the current iteration and go to the next quiz type
-            if not yesterday_quiz:
-                # send it on every channels set as quiz channel
-                for quiz_channel in session.query(QuizChannels).all():
-                    channel = bot.get_channel(quiz_channel.id_channel)
-                    await channel.send(embed=embed)
-                continue
-
-            # if we're here, that means there was a quiz
-            creator_pfp = reconstruct_discord_pfp_url(
-                user_id=yesterday_quiz.creator_id,
-                pfp_hash=yesterday_quiz.creator.pfp,
-            )
-
-            embed.set_author(
-                name=yesterday_quiz.creator.name,
-                icon_url=creator_pfp,
-            )
-
-            # Linebreak
-            embed.add_field(name="", value="", inline=False)
-
-            # General stats
-            nb_seiyuu_attempts = (
-                session.query(Answer)
-                .filter(
-                    Answer.quiz_id == yesterday_quiz.id,
-                    Answer.answer != "\\Bonus Answer\\",
-                )
-                .count()
-            )
-
-            nb_correct_seiyuu_answers = (
-                session.query(Answer)
-                .filter(
-                    Answer.quiz_id == yesterday_quiz.id,
-                    Answer.answer != "\\Bonus Answer\\",
-                    Answer.is_correct,
-                )
-                .count()
-            )
-
-            nb_bonus_attempts = (
-                session.query(Answer)
-                .filter(
-                    Answer.quiz_id == yesterday_quiz.id,
-                    Answer.answer == "\\Bonus Answer\\",
-                )
-                .count()
-            )
+    Returns
+    -------
+    Embed
+        The results embed.
+    """
 
-            nb_correct_bonus_answers = (
-                session.query(Answer)
-                .filter(
-                    Answer.quiz_id == yesterday_quiz.id,
-                    Answer.answer == "\\Bonus Answer\\",
-                    Answer.is_bonus_point,
-                )
-                .count()
-            )
+    embed = discord.Embed(
+        title=f"Yesterday's {quiz_type.type} Quiz Results",
+        color=0xBBE6F3,
+    )
 
-            embed.add_field(
-                name="> :1234: Attempts",
-                value=f"> {nb_seiyuu_attempts} attempt(s)",
-                inline=True,
-            )
+    if not results:
+        embed.add_field(
+            name=f"There was no {quiz_type.type} quiz yesterday.",
+            value="",
+            inline=False,
+        )
+        return embed
 
-            embed.add_field(
-                name="> :dart: Points",
-                value=f"> {nb_correct_seiyuu_answers} people",
-                inline=True,
-            )
+    embed.set_footer(
+        text=f"Quiz ID: {results['quiz_id']}",
+    )
 
-            # linebreak
-            embed.add_field(name="", value="", inline=False)
+    quiz_answers = [a.strip() for a in results["answer"].split("|")]
+    if len(quiz_answers) == 1:
+        answer_feedback = f"> Answer: ||{quiz_answers[0]}||"
+    else:
+        formatted_answers = " / ".join(quiz_answers)
+        answer_feedback = f"> Answers: ||{formatted_answers}||"
 
-            embed.add_field(
-                name="> :1234: Bonus Attempts",
-                value=f"> {nb_bonus_attempts} attempt(s)",
-                inline=True,
-            )
+    if results["bonus_answer"]:
+        bonus_answers = [b.strip() for b in results["bonus_answer"].split("|")]
+        if len(bonus_answers) == 1:
+            bonus_feedback = f"\n> Bonus answer: ||{bonus_answers[0]}||"
+        else:
+            formatted_bonus = " / ".join(bonus_answers)
+            bonus_feedback = f"\n> Bonus answers: ||{formatted_bonus}||"
+    else:
+        bonus_feedback = ""
 
-            embed.add_field(
-                name="> :dart: Bonus Points",
-                value=f"> {nb_correct_bonus_answers} people",
-                inline=True,
-            )
+    embed.add_field(
+        name=f"> {quiz_type.emoji} {quiz_type.type}",
+        value=f"{answer_feedback}{bonus_feedback}",
+        inline=True,
+    )
+    embed.add_field(
+        name="> Clip",
+        value=f"> {results['clip']}",
+        inline=True,
+    )
 
-            # linebreak
-            embed.add_field(name="", value="", inline=False)
+    creator_pfp = reconstruct_discord_pfp_url(
+        user_id=results["creator_id"],
+        pfp_hash=results["creator_pfp"],
+    )
 
-            # Top Guessers
-            medals = [":first_place:", ":second_place:", ":third_place:"]
-            top_faster_answers = (
-                session.query(Answer)
-                .filter(
-                    Answer.quiz_id == yesterday_quiz.id,
-                    Answer.is_correct,
-                )
-                .order_by(Answer.answer_time)
-                .limit(3)
-                .all()
-            )
-            top_guessers = "\n".join(
-                [
-                    f"> {medals[i]} <@{answer.user_id}>"
-                    for i, answer in enumerate(top_faster_answers)
-                ]
-            )
-            embed.add_field(
-                name="> Top Guessers",
-                value=top_guessers,
-                inline=True,
-            )
+    embed.set_author(
+        name=results["creator_name"],
+        icon_url=creator_pfp,
+    )
 
-            # Times
-            top_times = "\n".join(
-                [
-                    f"> {answer.answer_time}s"
-                    for i, answer in enumerate(top_faster_answers)
-                ]
-            )
-            embed.add_field(name="> Time", value=top_times, inline=True)
+    # Linebreak
+    embed.add_field(name="", value="", inline=False)
 
-            # Attempts
+    # General stats
+    embed.add_field(
+        name="> :1234: Attempts",
+        value=f"> {results['nb_seiyuu_attempts']} attempt(s)",
+        inline=True,
+    )
 
-            top_attempts = []
-            for answer in top_faster_answers:
-                user_id = answer.user_id
+    embed.add_field(
+        name="> :dart: Points",
+        value=f"> {results['nb_correct_seiyuu_answers']} people",
+        inline=True,
+    )
 
-                nb_attempts = (
-                    session.query(Answer)
-                    .filter(
-                        Answer.quiz_id == yesterday_quiz.id,
-                        Answer.user_id == user_id,
-                        Answer.answer != "\\Bonus Answer\\",
-                    )
-                    .count()
-                )
+    # linebreak
+    embed.add_field(name="", value="", inline=False)
 
-                top_attempts.append(f"> {nb_attempts}")
+    embed.add_field(
+        name="> :1234: Bonus Attempts",
+        value=f"> {results['nb_bonus_attempts']} attempt(s)",
+        inline=True,
+    )
 
-            embed.add_field(
-                name="> Attempts", value="\n".join(top_attempts), inline=True
-            )
+    embed.add_field(
+        name="> :dart: Bonus Points",
+        value=f"> {results['nb_correct_bonus_answers']} people",
+        inline=True,
+    )
 
-            # Most incorrectly guessed
-            # Count each incorrect answer
-            incorrect_answers = {}
-            for answer in yesterday_quiz.answers:
-                if answer.is_correct:
-                    continue
+    # linebreak
+    embed.add_field(name="", value="", inline=False)
 
-                if answer.answer == "\\Bonus Answer\\":
-                    continue
+    # Top Guessers
+    medals = [":first_place:", ":second_place:", ":third_place:"]
+    top_answers = results["top_answers"]
 
-                regex_pattern = process_user_input(
-                    input_str=answer.answer, partial_match=False, swap_words=True
-                )
-                for key in incorrect_answers.keys():
-                    if re.search(regex_pattern, key, re.IGNORECASE):
-                        incorrect_answers[key] += 1
-                        break
-                else:
-                    incorrect_answers[answer.answer] = 1
+    top_guessers = "\n".join(
+        [f"> {medals[i]} <@{user_id}>" for i, (user_id, _, _) in enumerate(top_answers)]
+    )
+    embed.add_field(
+        name="> Top Guessers",
+        value=top_guessers,
+        inline=True,
+    )
 
-            # sort the dict by value
-            incorrect_answers = dict(
-                sorted(
-                    incorrect_answers.items(), key=lambda item: item[1], reverse=True
-                )
-            )
+    # Times
+    top_times = "\n".join([f"> {answer_time}s" for _, answer_time, _ in top_answers])
+    embed.add_field(name="> Time", value=top_times, inline=True)
 
-            # top 3 most incorrectly guessed
-            top_3_incorrect = "\n".join(
-                [
-                    f"> {key} ({value} times)"
-                    for i, (key, value) in enumerate(incorrect_answers.items())
-                    if i < 3
-                ]
-            )
-            embed.add_field(
-                name="Most Incorrectly Guessed", value=top_3_incorrect, inline=False
-            )
+    # Attempts
+    top_attempts = "\n".join([f"> {nb_attempts}" for _, _, nb_attempts in top_answers])
+    embed.add_field(name="> Attempts", value=top_attempts, inline=True)
 
-            # Send the message with the view
-            # send it on every channels set as quiz channel
-            for quiz_channel in session.query(QuizChannels).all():
-                channel = bot.get_channel(quiz_channel.id_channel)
-                await channel.send(embed=embed)
+    # top 3 most incorrectly guessed
+    top_3_incorrect = "\n".join(
+        [
+            f"> {key} ({value} times)"
+            for key, value in get_top_incorrect_answers(results, nb=3)
+        ]
+    )
+    embed.add_field(
+        name="Most Incorrectly Guessed", value=top_3_incorrect, inline=False
+    )
 
-        for quiz_channel in session.query(QuizChannels).all():
-            channel = bot.get_channel(quiz_channel.id_channel)
-            view = NewQuizView(current_quiz_date)
-            await channel.send(view=view)
+    return embed
 
 
 @bot.event
 async def post_quiz_buttons():
-    current_quiz_date = get_current_quiz_date(DAILY_QUIZ_RESET_TIME)
-    with bot.session as session:
-        for quiz_channel in session.query(QuizChannels).all():
-            channel = bot.get_channel(quiz_channel.id_channel)
-            view = NewQuizView(current_quiz_date)
-            await channel.send(view=view)
+    view = NewQuizView()
+    await broadcast(
+        bot, reference_data.quiz_channels.values(), messages=[{"view": view}]
+    )
 
 
 class NewQuizButton(discord.ui.Button):
-    """Class for the NewQuizButton"""
+    """Class for the NewQuizButton
 
-    def __init__(
-        self,
-        quiz_type: QuizType,
-        new_quiz_date: date,
-    ):
+    Its custom_id only depends on the quiz type, so that buttons posted on
+    previous days or before a restart keep working and always start the
+    current quiz of that type.
+    """
+
+    def __init__(self, quiz_type: QuizType):
         super().__init__(
             label=f"Play today's {quiz_type.type} Quiz",
             style=discord.ButtonStyle.green,
+            custom_id=f"poyuta:new_quiz:{quiz_type.id}",
         )
 
-        self.new_quiz_date = new_quiz_date
         self.quiz_type = quiz_type
 
-        # get quiz
-        with bot.session as session:
-            current_quiz = (
-                session.query(Quiz)
-                .filter(
-                    Quiz.id_type == self.quiz_type.id,
-                    Quiz.date == self.new_quiz_date,
-                )
-                .first()
-            )
-
-            self.current_quiz_id = current_quiz.id if current_quiz else None
-
     async def callback(self, interaction: discord.Interaction):
-        if not self.current_quiz_id:
+        current_quiz_id = bot.get_daily_quiz_ids().get(self.quiz_type.id)
+
+        if not current_quiz_id:
             await interaction.response.send_message(
                 f"No {self.quiz_type.type} quiz today :disappointed_relieved:",
                 ephemeral=True,
@@ -2308,34 +2613,34 @@ class NewQuizButton(discord.ui.Button):
             return
 
         with bot.session as session:
-            current_quiz = session.query(Quiz).get(self.current_quiz_id)
-
-            user = get_user(
-                session=session, user=interaction.user, add_if_not_exist=True
+            current_quiz = session.execute(
+                QUIZ_TO_PLAY, {"quiz_id": current_quiz_id}
+            ).first()
+
+            user = get_user(user=interaction.user, add_if_not_exist=True)
+
+            # Add the timestamp at which they clicked the button in db,
+            # as received by Discord, unless they clicked it once already
+            session.execute(
+                START_QUIZ,
+                {
+                    "user_id": user.id,
+                    "quiz_id": current_quiz.id,
+                    "timestamp": to_database_time(interaction.created_at),
+                },
             )
-
-            # make sure they didn't click it once already
-            if user.id not in [
-                start_time.user_id for start_time in current_quiz.start_quiz_timestamps
-            ]:
-                # Add the timestamp at which they clicked the button in db
-                new_start_quiz_timestamp = UserStartQuizTimestamp(
-                    user_id=user.id,
-                    quiz_id=current_quiz.id,
-                    timestamp=datetime.now(),
-                )
-                session.add(new_start_quiz_timestamp)
-                session.commit()
+            session.commit()
 
             embed = discord.Embed(
                 title=f"{self.quiz_type.emoji} Today's {self.quiz_type.type} Quiz",
                 color=0xBBE6F3,
             )
 
+            creator = user_cache.get(current_quiz.creator_id)
             embed.set_author(
-                name=current_quiz.creator.name,
+                name=creator.name,
                 icon_url=reconstruct_discord_pfp_url(
-                    user_id=current_quiz.creator_id, pfp_hash=current_quiz.creator.pfp
+                    user_id=current_quiz.creator_id, pfp_hash=creator.pfp
                 ),
             )
 
@@ -2367,28 +2672,37 @@ class NewQuizButton(discord.ui.Button):
 
 
 class NewQuizView(discord.ui.View):
-    def __init__(self, new_quiz_date):
+    """Persistent view holding one NewQuizButton per quiz type.
+
+    It is registered once with `bot.add_view` in `setup_hook`, so the
+    buttons of every message it was sent with keep working after a restart.
+    """
+
+    def __init__(self):
         super().__init__(timeout=None)
 
-        with bot.session as session:
+        quiz_types = reference_data.quiz_types
 
-            quiz_types = session.query(QuizType).all()
+        # change the order so that any "quiz_type.type" that contains "Image" is pushed to the end of the list
+        quiz_types = sorted(
+            quiz_types,
+            key=lambda x: x.type.lower().endswith("image"),
+        )
 
-            # change the order so that any "quiz_type.type" that contains "Image" is pushed to the end of the list
-            quiz_types = sorted(
-                quiz_types,
-                key=lambda x: x.type.lower().endswith("image"),
-            )
+        for quiz_type in quiz_types:
+            button = NewQuizButton(quiz_type=quiz_type)
+            self.add_item(button)
 
-            for quiz_type in quiz_types:
-                button = NewQuizButton(quiz_type=quiz_type, new_quiz_date=new_quiz_date)
-                self.add_item(button)
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if traffic_capture:
+            traffic_capture.record_interaction(interaction)
+        return True
 
 
 # --- SERVER ADMIN COMMANDS --- #
 
 
-@commands.check(lambda ctx: is_server_admin(ctx, session=bot.session))
+@commands.check(lambda ctx: is_server_admin(ctx))
 @bot.command(name="setsubmissionchannel", aliases=["ssc"])
 async def setsubmissionchannel(ctx):
     """*Server Admin only* - Set the current channel as the submission main channel for this server."""
@@ -2416,10 +2730,12 @@ async def setsubmissionchannel(ctx):
         session.add(new_submission_channel)
         session.commit()
 
+    reference_data.refresh()
+
     await ctx.send(f"Submission channel set to {ctx.channel.mention}.")
 
 
-@commands.check(lambda ctx: is_server_admin(ctx, session=bot.session))
+@commands.check(lambda ctx: is_server_admin(ctx))
 @bot.command(name="unsetsubmissionchannel", aliases=["ussc"])
 async def unsetsubmissionchannel(ctx):
     """*Server Admin only* - Unset the current channel as the submission channel for this server."""
@@ -2438,12 +2754,14 @@ async def unsetsubmissionchannel(ctx):
         session.delete(submission_channel)
         session.commit()
 
+    reference_data.refresh()
+
     await ctx.send(
         f"Submission channel unset from {bot.get_channel(submission_channel.id_sub_channel).mention}."
     )
 
 
-@commands.check(lambda ctx: is_server_admin(ctx, session=bot.session))
+@commands.check(lambda ctx: is_server_admin(ctx))
 @bot.command(name="setchannel", aliases=["sc"])
 async def setchannel(ctx):
     """*Server Admin only* - Set the current channel as the quiz main channel for this server."""
@@ -2471,10 +2789,12 @@ async def setchannel(ctx):
         session.add(new_quiz_channel)
         session.commit()
 
+    reference_data.refresh()
+
     await ctx.send(f"Quiz channel set to {ctx.channel.mention}.")
 
 
-@commands.check(lambda ctx: is_server_admin(ctx, session=bot.session))
+@commands.check(lambda ctx: is_server_admin(ctx))
 @bot.command(name="unsetchannel", aliases=["usc"])
 async def unsetchannel(ctx):
     """*Server Admin only* - Unset the current channel as the quiz main channel for this server."""
@@ -2493,6 +2813,8 @@ async def unsetchannel(ctx):
         session.delete(quiz_channel)
         session.commit()
 
+    reference_data.refresh()
+
     await ctx.send(
         f"Quiz channel unset from {bot.get_channel(quiz_channel.id_channel).mention}."
     )
@@ -2501,22 +2823,271 @@ async def unsetchannel(ctx):
 # --- BOT ADMIN COMMANDS --- #
 
 
-@commands.check(lambda ctx: is_bot_admin(session=bot.session, user=ctx.author))
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
 @bot.command(aliases=["pqr"])  # for quick debugging
 async def postquizresults(ctx):
     """**Bot Admin Only** Force the bot to post yesterday's quiz results."""
     await post_yesterdays_quiz_results()
 
 
-@commands.check(lambda ctx: is_bot_admin(session=bot.session, user=ctx.author))
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
 @bot.command(aliases=["pqb"])  # for quick debugging
 async def postquizbuttons(ctx):
     """**Bot Admin Only** Force the bot to post yesterday's quiz results."""
     await post_quiz_buttons()
 
 
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["sync"])
+async def synccommands(ctx):
+    """**Bot Admin Only** Force the bot to sync the slash commands with Discord."""
+    if await bot.sync_command_tree(force=True):
+        await ctx.send("Slash commands synced.")
+    else:
+        await ctx.send("Failed to sync the slash commands, see the bot's logs.")
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["il"])
+async def interactionlatency(ctx):
+    """**Bot Admin Only** Show the slash commands' time to acknowledge vs. time to result."""
+
+    embed = discord.Embed(title="Slash Command Latency")
+    for command_name, histogram in sorted(bot.interaction_latencies["result"].items()):
+        ack_histogram = bot.interaction_latencies["ack"][command_name]
+        embed.add_field(
+            name=f"/{command_name}",
+            value=f"> ack: {ack_histogram.summary()}\n> result: {histogram.summary()}",
+            inline=False,
+        )
+
+    if not embed.fields:
+        embed.description = "No slash command used yet."
+
+    await ctx.send(embed=embed)
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["cq"])
+async def commandqueue(ctx):
+    """**Bot Admin Only** Show the analytical command queue and its wait times."""
+
+    await ctx.send(bot.command_scheduler.summary())
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command()
+async def perf(ctx):
+    """**Bot Admin Only** Show the latency percentiles of the slowest commands."""
+
+    # an embed has at most 25 fields
+    slowest_commands = sorted(
+        command_metrics.commands.items(),
+        key=lambda item: item[1].wall_time.percentile(95),
+        reverse=True,
+    )[:25]
+
+    embed = discord.Embed(title="Command Performance")
+    for name, metrics in slowest_commands:
+        statements, rows = metrics.nb_statements, metrics.nb_rows
+        embed.add_field(
+            name=name,
+            value=(
+                f"> wall: {metrics.wall_time.summary()}\n"
+                f"> db: {metrics.db_time.summary()}\n"
+                f"> SQL: p50 {statements.percentile(50)} | "
+                f"p99 {statements.percentile(99)} statements, "
+                f"p50 {rows.percentile(50)} | p99 {rows.percentile(99)} rows"
+            ),
+            inline=False,
+        )
+
+    if not embed.fields:
+        embed.description = "No command used yet."
+
+    await ctx.send(embed=embed)
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["lag"])
+async def looplag(ctx, nb_events: int = 3):
+    """**Bot Admin Only** Show the event loop lag and what blocked it lately."""
+
+    monitor = bot.loop_lag_monitor
+    embed = discord.Embed(
+        title="Event Loop Lag",
+        description=(
+            f"> lag: {monitor.lag.summary()}\n"
+            f"> {len(monitor.events)} time(s) over {monitor.threshold * 1000:.0f}ms"
+        ),
+    )
+
+    for event in list(monitor.events)[-nb_events:]:
+        stack = "".join(event.stack) or "not sampled\n"
+        # keep the innermost frames within the field length limit
+        embed.add_field(
+            name=f"{event.when:%H:%M:%S} {event}",
+            value=f"```{stack[-1000:]}```",
+            inline=False,
+        )
+
+    await ctx.send(embed=embed)
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["mem"])
+async def memory(ctx):
+    """**Bot Admin Only** Show the live objects, and what allocated the most lately."""
+
+    diagnostics = bot.memory_diagnostics
+    # compared with the last periodic report, which keeps its own baseline
+    report, orm_instances = await asyncio.to_thread(
+        lambda: (diagnostics.report(keep_snapshot=False), count_orm_instances())
+    )
+
+    embed = discord.Embed(title="Memory")
+    embed.add_field(
+        name="Live objects",
+        value="\n".join(
+            f"> {name}: {count}" for name, count in report.live_objects.items()
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="ORM instances by model",
+        value="\n".join(
+            f"> {model}: {count}" for model, count in orm_instances.most_common(5)
+        )
+        or "> none",
+        inline=False,
+    )
+
+    if report.traced is None:
+        embed.description = (
+            "Allocations aren't traced, set MEMORY_DIAGNOSTICS_MINUTES to trace them."
+        )
+    else:
+        embed.description = f"> {report.traced / 1e6:.1f}MB traced"
+        growth = "\n".join(
+            f"{size_diff / 1e3:+9.1f}kB {count_diff:+7} blocks  {where}"
+            for where, size_diff, count_diff in report.growth
+        )
+        embed.add_field(
+            name="Top growth since the last periodic report",
+            value=f"```{growth[:1000]}```" if growth else "> none",
+            inline=False,
+        )
+
+    await ctx.send(embed=embed)
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["qc"])
+async def querycache(ctx, action: str = None):
+    """
+    **Bot Admin Only** Show the query result cache's hit rate and size.
+
+    Parameters
+    ----------
+    action : str, optional
+        "clear" to drop the cached results first, by default None.
+
+    Examples
+    ---------
+    !querycache
+    !querycache clear
+    """
+
+    if action == "clear":
+        query_cache.clear()
+
+    embed = discord.Embed(title="Query Cache", description=query_cache.summary())
+    await ctx.send(embed=embed)
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command()
+async def profile(ctx, *, command_line: str):
+    """
+    **Bot Admin Only** Profile a stats or leaderboard command.
+
+    The command's messages are sent to you in direct messages, followed by
+    its slowest functions and the profile, to open with pstats or snakeviz.
+
+    Examples
+    ---------
+    !profile mystats 123456789012345678
+    !profile leaderboard
+    """
+
+    message = copy.copy(ctx.message)
+    message.content = f"{ctx.prefix}{command_line}"
+    profiled_ctx = await bot.get_context(message, cls=ProfiledContext)
+
+    # only commands reading the database, profiling must not answer a quiz
+    if (
+        not profiled_ctx.command
+        or profiled_ctx.command.qualified_name not in ANALYTICAL_COMMANDS
+    ):
+        profilable = sorted(ANALYTICAL_COMMANDS)
+        await ctx.send(f"Only these commands can be profiled: {', '.join(profilable)}.")
+        return
+
+    if profile_lock.locked():
+        await ctx.send("Another command is being profiled, try again once it's done.")
+        return
+
+    name = profiled_ctx.command.qualified_name
+    async with profile_lock:
+        profiler = cProfile.Profile()
+        started = perf_counter()
+        profiler.enable()
+        try:
+            await bot.invoke(profiled_ctx)
+        finally:
+            profiler.disable()
+        wall_time = perf_counter() - started
+
+    PROFILES_PATH.mkdir(exist_ok=True)
+    path = PROFILES_PATH / f"{name}-{datetime.now():%Y%m%d-%H%M%S}.prof"
+    profiler.dump_stats(path)
+
+    # the functions fitting in a message, slowest first
+    lines = top_functions(profiler)
+    while len("\n".join(lines)) > 1800:
+        lines.pop()
+    report = "\n".join(lines)
+
+    await ctx.author.send(
+        f"`{command_line}` took {wall_time * 1000:.0f}ms\n```{report}```",
+        file=discord.File(path),
+    )
+
+
+@commands.check(lambda ctx: is_bot_admin(user=ctx.author))
+@bot.command(aliases=["mr"])
+async def messagerates(ctx):
+    """**Bot Admin Only** Show how many messages per second are handled vs. skipped."""
+
+    handled = bot.message_counters["handled"]
+    skipped = bot.message_counters["skipped"]
+    rate_limited = ", ".join(
+        f"{limiter.name} {limiter.nb_refused}"
+        for limiter in (
+            answers_rate_limiter,
+            stats_rate_limiter,
+            leaderboards_rate_limiter,
+        )
+    )
+
+    await ctx.send(
+        f"> Handled: {handled.per_second():.2f} msg/s ({handled.total} total)\n"
+        f"> Skipped: {skipped.per_second():.2f} msg/s ({skipped.total} total)\n"
+        f"> Rate limited: {rate_limited}"
+    )
+
+
 @bot.tree.command(name="newquiz")
-@app_commands.choices(quiz_type=get_quiz_type_choices(session=bot.session))
 @app_commands.describe(
     quiz_type="type of the quiz to add",
     new_clip="input new clip",
@@ -2533,7 +3104,7 @@ async def new_quiz(
     """**Bot Admin Only** - create a new quiz."""
 
     with bot.session as session:
-        if not is_bot_admin(session=session, user=interaction.user):
+        if not is_bot_admin(user=interaction.user):
             await interaction.response.send_message(
                 "You are not an admin, you can't use this command."
             )
@@ -2552,7 +3123,7 @@ async def new_quiz(
         )
 
         # call this just to update pfp
-        get_user(session=session, user=interaction.user, add_if_not_exist=True)
+        get_user(user=interaction.user, add_if_not_exist=True)
 
         # if the latest quiz date is in the future
         # that means there's already a quiz for today, so add the new date to the planned quizzes
@@ -2575,13 +3146,14 @@ async def new_quiz(
         session.add(new_quiz)
         session.commit()
 
+    bot.invalidate_daily_quiz_ids()
+
     await interaction.response.send_message(
         f"New {quiz_type.name} quiz created on {new_date}."
     )
 
 
 @bot.tree.command(name="submission")
-@app_commands.choices(quiz_type=get_quiz_type_choices(session=bot.session))
 @app_commands.describe(
     quiz_type="type of the quiz to submit",
     clip="mp3 clip",
@@ -2595,39 +3167,33 @@ async def send_submission(
     answer: str,
     bonus_answer: Optional[str] = None,
 ):
+    started = perf_counter()
+
     # Get the server and channel IDs for the current interaction
     server_id = interaction.guild.id
     channel_id = interaction.channel.id
 
-    with bot.session as session:
-        # Check if the current channel is allowed for submissions
-        submission_channel = (
-            session.query(SubmissionChannels)
-            .filter_by(id_sub_server=server_id, id_sub_channel=channel_id)
-            .first()
-        )
+    # Check if the current channel is allowed for submissions
+    the_correct_channel_to_post_in = reference_data.submission_channels.get(server_id)
 
-        if not submission_channel:
-            # If the channel is not allowed, send a message with the correct channel information
-            the_correct_channel_to_post_in = (
-                session.query(SubmissionChannels.id_sub_channel)
-                .filter_by(id_sub_server=server_id)
-                .first()
+    if the_correct_channel_to_post_in != channel_id:
+        # If the channel is not allowed, send a message with the correct channel information
+        if the_correct_channel_to_post_in:
+            channel_mention = f"<#{the_correct_channel_to_post_in}>"
+            await interaction.response.send_message(
+                f"Unauthorized Channel. Please head over to {channel_mention}",
+                ephemeral=True,
+            )
+        else:
+            await interaction.response.send_message(
+                "Unauthorized Channel. Please contact the server administrator.",
+                ephemeral=True,
             )
 
-            if the_correct_channel_to_post_in:
-                channel_mention = f"<#{the_correct_channel_to_post_in[0]}>"
-                await interaction.response.send_message(
-                    f"Unauthorized Channel. Please head over to {channel_mention}",
-                    ephemeral=True,
-                )
-            else:
-                await interaction.response.send_message(
-                    "Unauthorized Channel. Please contact the server administrator.",
-                    ephemeral=True,
-                )
+        return
 
-            return
+    await interaction.response.defer()
+    record_interaction_latency("submission", "ack", started)
 
     with bot.session as session:
         latest_quiz = (
@@ -2643,7 +3209,7 @@ async def send_submission(
         )
 
         # call this just to update pfp
-        get_user(session=session, user=interaction.user, add_if_not_exist=True)
+        get_user(user=interaction.user, add_if_not_exist=True)
 
         # if the latest quiz date is in the future
         # that means there's already a quiz for today, so add the new date to the planned quizzes
@@ -2665,7 +3231,12 @@ async def send_submission(
         )
         session.add(new_quiz)
         session.commit()
-    await interaction.response.send_message("✅")
+
+    bot.invalidate_daily_quiz_ids()
+
+    await interaction.followup.send("✅")
+    record_interaction_latency("submission", "result", started)
+
     # Send the result as a direct message to the user
     await interaction.user.send(
         f"Submission for {quiz_type.name} added for {new_date}\n ||[{answer}]({clip})|| {'+ ||' + bonus_answer if bonus_answer else ''}||"
@@ -2676,83 +3247,63 @@ async def send_submission(
 async def planned_quizzes(interaction: discord.Interaction):
     """**Bot Admin Only** - Check the planned quizzes."""
 
-    with bot.session as session:
-        if not is_bot_admin(session=session, user=interaction.user):
-            await interaction.response.send_message(
-                "You are not an admin, you can't use this command."
-            )
-            return
-
-        current_quiz_date = get_current_quiz_date(
-            daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME
-        )
+    started = perf_counter()
 
-        # get all the quizzes that are planned after the current quiz
-        unique_date = (
-            session.query(Quiz.date)
-            .filter(Quiz.date >= current_quiz_date)
-            .distinct()
-            .all()
+    if not is_bot_admin(user=interaction.user):
+        await interaction.response.send_message(
+            "You are not an admin, you can't use this command."
         )
+        return
 
-        if not unique_date:
-            await interaction.response.send_message(
-                f"No planned quizzes after {current_quiz_date}."
-            )
-            return
+    await interaction.response.defer()
+    record_interaction_latency("plannedquizzes", "ack", started)
 
-        embed = discord.Embed(title="Planned Quizzes")
+    try:
+        async with bot.command_scheduler.slot(ANALYTICAL):
+            # build it in a worker thread so the event loop keeps acknowledging others
+            message = await asyncio.to_thread(build_planned_quizzes_message, True)
+    except asyncio.QueueFull:
+        await interaction.followup.send(BUSY_MESSAGE)
+        return
 
-        # get all the quiz types
-        quiz_types = session.query(QuizType).all()
+    await interaction.followup.send(**message)
+    record_interaction_latency("plannedquizzes", "result", started)
 
-        for i, quiz_date in enumerate(unique_date):
-            quiz_date = quiz_date[0]
 
-            embed.add_field(
-                name=f":calendar_spiral: __**{quiz_date if i != 0 else 'Today'}**__",
-                value="",
-                inline=False,
-            )
+@bot.tree.command(name="queue")
+async def queue(interaction: discord.Interaction):
+    """Check the planned quizzes."""
 
-            for i, quiz_type in enumerate(quiz_types):
-                # get quiz for this type and date
-                quiz = (
-                    session.query(Quiz)
-                    .filter(
-                        Quiz.id_type == quiz_type.id,
-                        Quiz.date == quiz_date,
-                        Quiz.creator_id,
-                    )
-                    .first()
-                )
+    started = perf_counter()
+    await interaction.response.defer()
+    record_interaction_latency("queue", "ack", started)
 
-                if quiz:
-                    creator_id = quiz.creator_id
-                    value = f"||[{quiz.answer}]({quiz.clip})||{' + ||' + quiz.bonus_answer if quiz.bonus_answer else ''}|| by <@{creator_id}>"
-                else:
-                    value = "Nothing planned :disappointed_relieved:"
+    try:
+        async with bot.command_scheduler.slot(ANALYTICAL):
+            # build it in a worker thread so the event loop keeps acknowledging others
+            message = await asyncio.to_thread(build_planned_quizzes_message, False)
+    except asyncio.QueueFull:
+        await interaction.followup.send(BUSY_MESSAGE)
+        return
 
-                embed.add_field(
-                    name=f"> {quiz_type.emoji} {quiz_type.type}",
-                    value=f"> {value}",
-                    inline=True,
-                )
+    await interaction.followup.send(**message)
+    record_interaction_latency("queue", "result", started)
 
-                # Linebreak every two types unless last type
-                if (i + 1) % 2 == 0 and i != 0 and i + 1 != len(quiz_types):
-                    embed.add_field(name="", value="", inline=False)
-
-            # Linebreak unless last date
-            if quiz_date != unique_date[-1][0]:
-                embed.add_field(name="\u200b", value="", inline=False)
 
-        await interaction.response.send_message(embed=embed)
+def build_planned_quizzes_message(show_answers: bool) -> dict:
+    """Build the message listing the planned quizzes.
 
+    Parameters
+    ----------
+    show_answers : bool
+        Whether to show the clips and answers (for admins), or only who
+        queued each quiz.
 
-@bot.tree.command(name="queue")
-async def queue(interaction: discord.Interaction):
-    """Check the planned quizzes."""
+    Returns
+    -------
+    dict
+        Keyword arguments of the message to send.
+    """
 
     with bot.session as session:
         current_quiz_date = get_current_quiz_date(
@@ -2760,26 +3311,24 @@ async def queue(interaction: discord.Interaction):
         )
 
         # get all the quizzes that are planned after the current quiz
-        unique_date = (
-            session.query(Quiz.date)
-            .filter(Quiz.date >= current_quiz_date)
-            .distinct()
-            .all()
-        )
+        planned_quizzes = readmodel.planned_quizzes(session, current_quiz_date)
+        unique_date = list(dict.fromkeys(quiz.date for quiz in planned_quizzes))
+
+        # first quiz with a creator of each date and type
+        quizzes = {}
+        for quiz in planned_quizzes:
+            if quiz.creator_id:
+                quizzes.setdefault((quiz.date, quiz.quiz_type_id), quiz)
 
         if not unique_date:
-            await interaction.response.send_message(
-                f"No planned quizzes after {current_quiz_date}."
-            )
-            return
+            return {"content": f"No planned quizzes after {current_quiz_date}."}
 
         embed = discord.Embed(title="Planned Quizzes")
 
         # get all the quiz types
-        quiz_types = session.query(QuizType).all()
+        quiz_types = reference_data.quiz_types
 
         for i, quiz_date in enumerate(unique_date):
-            quiz_date = quiz_date[0]
 
             embed.add_field(
                 name=f":calendar_spiral: __**{quiz_date if i != 0 else 'Today'}**__",
@@ -2789,13 +3338,12 @@ async def queue(interaction: discord.Interaction):
 
             for i, quiz_type in enumerate(quiz_types):
                 # get quiz for this type and date
-                quiz = (
-                    session.query(Quiz)
-                    .filter(Quiz.id_type == quiz_type.id, Quiz.date == quiz_date)
-                    .first()
-                )
+                quiz = quizzes.get((quiz_date, quiz_type.id))
 
-                if quiz:
+                if quiz and show_answers:
+                    creator_id = quiz.creator_id
+                    value = f"||[{quiz.answer}]({quiz.clip})||{' + ||' + quiz.bonus_answer if quiz.bonus_answer else ''}|| by <@{creator_id}>"
+                elif quiz:
                     creator_id = quiz.creator_id
                     value = f"Queued by <@{creator_id}>"
                 else:
@@ -2812,14 +3360,13 @@ async def queue(interaction: discord.Interaction):
                     embed.add_field(name="", value="", inline=False)
 
             # Linebreak unless last date
-            if quiz_date != unique_date[-1][0]:
+            if quiz_date != unique_date[-1]:
                 embed.add_field(name="\u200b", value="", inline=False)
 
-        await interaction.response.send_message(embed=embed)
+    return {"embed": embed}
 
 
 @bot.tree.command(name="editquiz")
-@app_commands.choices(quiz_type=get_quiz_type_choices(session=bot.session))
 @app_commands.describe(
     quiz_date="date of the quiz to update in YYYY-MM-DD format",
     quiz_type="type of the quiz to update",
@@ -2843,140 +3390,160 @@ async def edit_quiz(
 ):
     """**Bot Admin Only** - Update a planned quiz."""
 
-    with bot.session as session:
-        # Check if the user is an admin
-        is_admin = is_bot_admin(session=session, user=interaction.user)
-
-        # Check if the quiz exists for this quiz_type and quiz_date
-        quiz = (
-            session.query(Quiz)
-            .filter(Quiz.id_type == quiz_type.value, Quiz.date == quiz_date)
-            .first()
-        )
+    started = perf_counter()
+    await interaction.response.defer()
+    record_interaction_latency("editquiz", "ack", started)
 
-        if not quiz:
-            try:
-                quiz_date = datetime.strptime(quiz_date, "%Y-%m-%d").date()
-            except ValueError:
-                await interaction.response.send_message(
-                    "invalid date format. please use YYYY-MM-DD."
-                )
-            return
+    try:
+        with bot.session as session:
+            # Check if the user is an admin
+            is_admin = is_bot_admin(user=interaction.user)
 
-        # Check if the user is the creator of the quiz or an admin
-        if not is_admin and quiz.creator_id != interaction.user.id:
-            await interaction.response.send_message(
-                "You are not authorized to edit or delete this quiz."
+            # Check if the quiz exists for this quiz_type and quiz_date
+            quiz = (
+                session.query(Quiz)
+                .filter(Quiz.id_type == quiz_type.value, Quiz.date == quiz_date)
+                .first()
             )
-            return
 
-        if delete_quiz:
-            if quiz:
-                # Delete the quiz
-                session.delete(quiz)
-
-                # Commit the deletion to the database
-                session.commit()
+            if not quiz:
+                try:
+                    quiz_date = datetime.strptime(quiz_date, "%Y-%m-%d").date()
+                except ValueError:
+                    await interaction.followup.send(
+                        "invalid date format. please use YYYY-MM-DD."
+                    )
+                else:
+                    await interaction.followup.send(
+                        f"no {quiz_type.name} quiz on {quiz_date}."
+                    )
+                return
 
-                await interaction.response.send_message(
-                    f"{quiz_type.name} quiz for {quiz_date} deleted."
-                )
-            else:
-                await interaction.response.send_message(
-                    f"no {quiz_type.name} quiz on {quiz_date}."
+            # Check if the user is the creator of the quiz or an admin
+            if not is_admin and quiz.creator_id != interaction.user.id:
+                await interaction.followup.send(
+                    "You are not authorized to edit or delete this quiz."
                 )
-            return
+                return
 
-        if clear_button_clicks:
-            # Conditionally delete rows from UserStartQuizTimestamp based on gender
-            gender_condition = (
-                UserStartQuizTimestamp.timestamp
-                if quiz_type.value == 1  # 1 represents male and 2 represents female
-                else desc(UserStartQuizTimestamp.timestamp)
-            )
+            if delete_quiz:
+                if quiz:
+                    # Delete the quiz
+                    deleted_quiz_date = quiz.date
+                    session.delete(quiz)
 
-            latest_timestamps = (
-                session.query(UserStartQuizTimestamp)
-                .filter_by(quiz_id=quiz.id)
-                .order_by(gender_condition)
-                .all()
-            )
+                    # Commit the deletion to the database
+                    session.commit()
 
-            if latest_timestamps:
-                session.query(UserStartQuizTimestamp).filter(
-                    UserStartQuizTimestamp.quiz_id == quiz.id
-                ).delete()
+                    bot.invalidate_daily_quiz_ids()
+                    bot.invalidate_precomputed_quiz_results(deleted_quiz_date)
 
-                # Commit the deletion to the database
-                session.commit()
+                    await interaction.followup.send(
+                        f"{quiz_type.name} quiz for {quiz_date} deleted."
+                    )
+                else:
+                    await interaction.followup.send(
+                        f"no {quiz_type.name} quiz on {quiz_date}."
+                    )
+                return
 
-                await interaction.response.send_message(
-                    f"{quiz_type.name} quiz updated for {quiz_date}. "
-                    f"buttons for {quiz_type.name} also resetted."
+            if clear_button_clicks:
+                # Conditionally delete rows from UserStartQuizTimestamp based on gender
+                gender_condition = (
+                    UserStartQuizTimestamp.timestamp
+                    if quiz_type.value == 1  # 1 represents male and 2 represents female
+                    else desc(UserStartQuizTimestamp.timestamp)
                 )
-            else:
-                await interaction.response.send_message("nothing to clear.")
-        if clear_attempts:
-            # Conditionally delete rows from Answer based on quiz type
-            # Separate conditions for male and female quiz types
-            gender_condition_answer = (
-                Answer.quiz_id
-                if quiz.type.id
-                == 1  # 1 represents Male Seiyuu and 2 represents Female Seiyuu
-                else desc(Answer.quiz_id)
-            )
 
-            latest_answer = (
-                session.query(Answer)
-                .filter_by(quiz_id=quiz.id)
-                .order_by(gender_condition_answer)
-                .limit(1)
-                .first()
-            )
+                latest_timestamps = (
+                    session.query(UserStartQuizTimestamp)
+                    .filter_by(quiz_id=quiz.id)
+                    .order_by(gender_condition)
+                    .all()
+                )
 
-            if latest_answer:
-                # Filter and delete rows based on quiz type condition
-                session.query(Answer).filter(
-                    Answer.quiz_id == quiz.id,
-                    Answer.quiz.has(Quiz.id_type == quiz.type.id),
-                    Answer.quiz.has(Quiz.date == quiz.date),
-                ).delete()
+                if latest_timestamps:
+                    session.query(UserStartQuizTimestamp).filter(
+                        UserStartQuizTimestamp.quiz_id == quiz.id
+                    ).delete()
 
-                # Commit the deletion to the database
-                session.commit()
+                    # Commit the deletion to the database
+                    session.commit()
 
-                await interaction.response.send_message(
-                    f"{quiz.type.type} quiz updated for {quiz.date}. "
-                    f"{quiz.type.type} attempts for today cleared."
-                )
-            else:
-                await interaction.response.send_message(
-                    f"{quiz.type.type} quiz updated for {quiz.date}. "
-                    f"no {quiz.type.type} attempts made today."
+                    await interaction.followup.send(
+                        f"{quiz_type.name} quiz updated for {quiz_date}. "
+                        f"buttons for {quiz_type.name} also resetted."
+                    )
+                else:
+                    await interaction.followup.send("nothing to clear.")
+            if clear_attempts:
+                # Conditionally delete rows from Answer based on quiz type
+                # Separate conditions for male and female quiz types
+                gender_condition_answer = (
+                    Answer.quiz_id
+                    if quiz.type.id
+                    == 1  # 1 represents Male Seiyuu and 2 represents Female Seiyuu
+                    else desc(Answer.quiz_id)
                 )
 
-        else:
-            # If none of the special options were selected, proceed with regular updates
-            if any([new_clip, new_answer, new_bonus_answer]):
-                # Update attributes
-                quiz.clip = new_clip if new_clip is not None else quiz.clip
-                quiz.answer = new_answer if new_answer is not None else quiz.answer
-                quiz.bonus_answer = (
-                    new_bonus_answer
-                    if new_bonus_answer is not None
-                    else quiz.bonus_answer
+                latest_answer = (
+                    session.query(Answer)
+                    .filter_by(quiz_id=quiz.id)
+                    .order_by(gender_condition_answer)
+                    .limit(1)
+                    .first()
                 )
 
-                # Commit the changes to the database
-                session.commit()
+                if latest_answer:
+                    # Filter and delete rows based on quiz type condition
+                    session.query(Answer).filter(
+                        Answer.quiz_id == quiz.id,
+                        Answer.quiz.has(Quiz.id_type == quiz.type.id),
+                        Answer.quiz.has(Quiz.date == quiz.date),
+                    ).delete()
+
+                    # Commit the deletion to the database
+                    session.commit()
+
+                    bot.invalidate_precomputed_quiz_results(quiz.date)
+
+                    await interaction.followup.send(
+                        f"{quiz.type.type} quiz updated for {quiz.date}. "
+                        f"{quiz.type.type} attempts for today cleared."
+                    )
+                else:
+                    await interaction.followup.send(
+                        f"{quiz.type.type} quiz updated for {quiz.date}. "
+                        f"no {quiz.type.type} attempts made today."
+                    )
 
-                await interaction.response.send_message(
-                    f"{quiz_type.name} quiz updated for {quiz_date}."
-                )
             else:
-                await interaction.response.send_message(
-                    "please provide one or more of the optional values to update."
-                )
+                # If none of the special options were selected, proceed with regular updates
+                if any([new_clip, new_answer, new_bonus_answer]):
+                    # Update attributes
+                    quiz.clip = new_clip if new_clip is not None else quiz.clip
+                    quiz.answer = new_answer if new_answer is not None else quiz.answer
+                    quiz.bonus_answer = (
+                        new_bonus_answer
+                        if new_bonus_answer is not None
+                        else quiz.bonus_answer
+                    )
+
+                    # Commit the changes to the database
+                    session.commit()
+
+                    bot.invalidate_daily_quiz_ids()
+                    bot.invalidate_precomputed_quiz_results(quiz.date)
+
+                    await interaction.followup.send(
+                        f"{quiz_type.name} quiz updated for {quiz_date}."
+                    )
+                else:
+                    await interaction.followup.send(
+                        "please provide one or more of the optional values to update."
+                    )
+    finally:
+        record_interaction_latency("editquiz", "result", started)
 
 
 # Command to edit answers
@@ -3004,7 +3571,7 @@ async def edit_answer(
 
     # Check if the user invoking the command is an admin
     with bot.session as session:
-        if not is_bot_admin(session=session, user=interaction.user):
+        if not is_bot_admin(user=interaction.user):
             await interaction.response.send_message(
                 "You are not an admin, you can't use this command."
             )
@@ -3020,9 +3587,9 @@ async def edit_answer(
 
         # Get the user
         user = (
-            get_user(session=session, user=interaction.author, add_if_not_exist=True)
+            get_user(user=interaction.author, add_if_not_exist=True)
             if not user_id
-            else get_user_from_id(session=session, user_id=user_id)
+            else get_user_from_id(user_id=user_id)
         )
         if not user:
             await interaction.send(
@@ -3036,6 +3603,9 @@ async def edit_answer(
             return
 
         # Delete the answer if delete is True
+        # the results of the answer's day are computed again at the reset
+        bot.invalidate_precomputed_quiz_results(answer_obj.quiz.date)
+
         if delete:
             session.delete(answer_obj)
             session.commit()
@@ -3059,12 +3629,3 @@ async def edit_answer(
         await interaction.response.send_message(
             f"Answer for user **{user.name}**, answer {answer}, and time {answer_time} updated."
         )
-
-
-# Helper function to check if a user is an admin
-def is_bot_admin(session, user):
-    try:
-        user_obj = session.query(User).filter_by(id=user.id, is_admin=True).first()
-        return user_obj is not None
-    except Exception as e:
-        return False
@@ -0,0 +1,203 @@
+"""
+Memory diagnostics, for a bot running for weeks.
+
+Counts the live objects of the types suspected of piling up: database
+sessions and ORM instances, views (paginators wait 210 seconds, quiz buttons
+forever), embeds and paginator sessions. When tracing is on, a tracemalloc
+snapshot is also diffed with the previous one, to find the lines of code
+whose allocations keep growing. Only the periodic reports replace the
+previous snapshot, so that a report asked in between doesn't shorten the
+period they compare.
+
+The bot traces allocations when MEMORY_DIAGNOSTICS_MINUTES is set, and logs
+a report that often. Tracing slows allocations down and takes memory of its
+own, so it is off by default; the live objects can always be counted.
+"""
+
+# Standard library imports
+import gc
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Discord
+from discord import Embed
+from discord.ui import View
+
+# Database
+from sqlalchemy.orm.session import Session
+from poyuta.database import Base
+
+# Paginator
+from poyuta.paginator import PaginatorSession
+
+# types counted among the live objects, by name
+TRACKED_TYPES = {
+    "sessions": Session,
+    "ORM instances": Base,
+    "views": View,
+    "paginators": PaginatorSession,
+    "embeds": Embed,
+}
+
+# allocations of the diagnostics themselves, and of imports
+IGNORED_FILES = [__file__, tracemalloc.__file__, "<frozen importlib.*>", "<unknown>"]
+
+
+def count_live_objects() -> Dict[str, int]:
+    """Number of objects of each tracked type alive right now.
+
+    Walks every object tracked by the garbage collector: it takes a moment,
+    call it only every now and then.
+    """
+
+    tracked_types = tuple(TRACKED_TYPES.values())
+    counts = dict.fromkeys(TRACKED_TYPES, 0)
+    for obj in gc.get_objects():
+        if not isinstance(obj, tracked_types):
+            continue
+        for name, tracked_type in TRACKED_TYPES.items():
+            if isinstance(obj, tracked_type):
+                counts[name] += 1
+    return counts
+
+
+def count_orm_instances() -> Counter:
+    """Number of ORM instances alive right now, by model."""
+
+    return Counter(
+        type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, Base)
+    )
+
+
+class MemoryReport:
+    """Memory used at some point, and what grew since the previous report.
+
+    Attributes
+    ----------
+    when : datetime
+        When the report was made.
+
+    live_objects : Dict[str, int]
+        Number of live objects of each tracked type.
+
+    traced : Optional[int]
+        Bytes allocated and not freed since tracing started, None if it's off.
+
+    growth : List[Tuple[str, int, int]]
+        Lines of code whose allocations grew the most since the previous
+        report: where, size difference in bytes, number of blocks difference.
+    """
+
+    __slots__ = ("when", "live_objects", "traced", "growth")
+
+    def __init__(
+        self,
+        live_objects: Dict[str, int],
+        traced: Optional[int] = None,
+        growth: Optional[List[Tuple[str, int, int]]] = None,
+    ):
+        self.when = datetime.now()
+        self.live_objects = live_objects
+        self.traced = traced
+        self.growth = growth or []
+
+    def __str__(self):
+        objects = ", ".join(
+            f"{count} {name}" for name, count in self.live_objects.items()
+        )
+        if self.traced is None:
+            return f"memory: {objects}"
+
+        line = f"memory: {self.traced / 1e6:.1f}MB traced, {objects}"
+        if self.growth:
+            where, size_diff, _ = self.growth[0]
+            line += f", top growth {size_diff / 1e3:+.1f}kB at {where}"
+        return line
+
+
+class MemoryDiagnostics:
+    """Live object counts, and allocation growth between tracemalloc snapshots.
+
+    Parameters
+    ----------
+    nb_frames : int, optional
+        Number of frames stored per allocation, by default 1: allocations
+        are grouped by the line that made them.
+
+    nb_sites : int, optional
+        Number of lines of code reported by growth, by default 10.
+    """
+
+    def __init__(self, nb_frames: int = 1, nb_sites: int = 10):
+        self.nb_frames = nb_frames
+        self.nb_sites = nb_sites
+
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        # reports are made in worker threads
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing allocations, the first snapshot is the baseline."""
+
+        with self._lock:
+            if not self.tracing:
+                tracemalloc.start(self.nb_frames)
+            self._previous_snapshot = self._take_snapshot()
+
+    def stop(self):
+        """Stop tracing allocations, and forget the snapshots."""
+
+        with self._lock:
+            tracemalloc.stop()
+            self._previous_snapshot = None
+
+    def report(self, keep_snapshot: bool = True) -> MemoryReport:
+        """Count the live objects, and diff a new snapshot with the previous one.
+
+        Parameters
+        ----------
+        keep_snapshot : bool, optional
+            Whether the new snapshot becomes the previous one, by default
+            True. Reports asked between the periodic ones don't keep it.
+        """
+
+        live_objects = count_live_objects()
+
+        with self._lock:
+            if not self.tracing:
+                return MemoryReport(live_objects)
+
+            snapshot = self._take_snapshot()
+            growth = []
+            if self._previous_snapshot is not None:
+                differences = snapshot.compare_to(self._previous_snapshot, "lineno")
+                growth = [
+                    (
+                        # e.g. orm/session.py:123, a file name alone is ambiguous
+                        f"{'/'.join(Path(difference.traceback[0].filename).parts[-2:])}"
+                        f":{difference.traceback[0].lineno}",
+                        difference.size_diff,
+                        difference.count_diff,
+                    )
+                    for difference in differences
+                    if difference.size_diff > 0
+                ][: self.nb_sites]
+            if keep_snapshot:
+                self._previous_snapshot = snapshot
+
+            traced, _ = tracemalloc.get_traced_memory()
+
+        return MemoryReport(live_objects, traced, growth)
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
@@ -0,0 +1,313 @@
+"""
+In-memory metrics for the bot.
+"""
+
+# Standard library imports
+import os
+import sqlite3
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+
+# SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RateCounter:
+    """Count events over a sliding window of whole seconds.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of seconds to average over, by default 60.
+
+    Attributes
+    ----------
+    total : int
+        Number of events counted since the counter was created.
+    """
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.total = 0
+
+        # (second, count) buckets, oldest first
+        self._buckets = deque()
+
+    def increment(self, amount: int = 1):
+        """Count `amount` events now."""
+
+        now = int(time.monotonic())
+        self.total += amount
+
+        if self._buckets and self._buckets[-1][0] == now:
+            self._buckets[-1][1] += amount
+        else:
+            self._buckets.append([now, amount])
+
+        self._expire(now)
+
+    def per_second(self) -> float:
+        """Average number of events per second over the window."""
+
+        self._expire(int(time.monotonic()))
+        return sum(count for _, count in self._buckets) / self.window
+
+    def _expire(self, now: int):
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+
+
+class Histogram:
+    """Keep the latest values of something and compute their percentiles.
+
+    Parameters
+    ----------
+    size : int, optional
+        Number of latest samples kept, by default 1000.
+
+    Attributes
+    ----------
+    count : int
+        Number of samples added since the histogram was created.
+
+    total : float
+        Sum of the samples added since the histogram was created.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.count = 0
+        self.total = 0
+        self._samples = deque(maxlen=size)
+
+    def add(self, value: float):
+        """Add a sample."""
+
+        self.count += 1
+        self.total += value
+        self._samples.append(value)
+
+    def percentile(self, percent: float) -> float:
+        """Value under which `percent`% of the kept samples are, 0 if empty."""
+
+        if not self._samples:
+            return 0
+
+        samples = sorted(self._samples)
+        index = round(percent / 100 * (len(samples) - 1))
+        return samples[index]
+
+
+class LatencyHistogram(Histogram):
+    """Histogram of latencies, in seconds."""
+
+    def percentile(self, percent: float) -> float:
+        return float(super().percentile(percent))
+
+    def summary(self) -> str:
+        """p50/p95/p99 of the kept samples, in milliseconds."""
+
+        return (
+            f"p50 {self.percentile(50) * 1000:.0f}ms"
+            f" | p95 {self.percentile(95) * 1000:.0f}ms"
+            f" | p99 {self.percentile(99) * 1000:.0f}ms"
+            f" ({self.count})"
+        )
+
+
+class CommandInvocation:
+    """What a single command invocation did so far.
+
+    Attributes
+    ----------
+    name : str
+        Name of the command.
+
+    started : float
+        `time.perf_counter()` when the command started.
+
+    db_time : float
+        Seconds spent executing SQL statements.
+
+    nb_statements : int
+        Number of SQL statements executed.
+
+    nb_rows : int
+        Number of rows fetched.
+    """
+
+    __slots__ = ("name", "started", "db_time", "nb_statements", "nb_rows")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.nb_statements = 0
+        self.nb_rows = 0
+
+
+# invocation of the command running in the current task, copied to the
+# threads it starts with asyncio.to_thread
+current_invocation: ContextVar[Optional[CommandInvocation]] = ContextVar(
+    "current_invocation", default=None
+)
+
+
+class CommandMetrics:
+    """Rolling histograms of the invocations of a command.
+
+    Attributes
+    ----------
+    wall_time : LatencyHistogram
+        Time from the start to the end of the command.
+
+    db_time : LatencyHistogram
+        Time spent executing SQL statements.
+
+    nb_statements : Histogram
+        Number of SQL statements executed.
+
+    nb_rows : Histogram
+        Number of rows fetched.
+    """
+
+    def __init__(self):
+        self.wall_time = LatencyHistogram()
+        self.db_time = LatencyHistogram()
+        self.nb_statements = Histogram()
+        self.nb_rows = Histogram()
+
+
+class CommandMetricsRegistry:
+    """Wall time, DB time, statements and rows of every command.
+
+    The bot calls `start` and `finish` around each command, and `instrument`
+    makes the engine count the SQL statements of the running command.
+
+    Attributes
+    ----------
+    commands : Dict[str, CommandMetrics]
+        Metrics by command name.
+    """
+
+    def __init__(self):
+        self.commands: Dict[str, CommandMetrics] = defaultdict(CommandMetrics)
+
+    def start(self, name: str) -> CommandInvocation:
+        """Start recording an invocation of a command in the current task."""
+
+        invocation = CommandInvocation(name)
+        current_invocation.set(invocation)
+        return invocation
+
+    def finish(self, invocation: Optional[CommandInvocation] = None):
+        """Record an invocation, by default the one of the current task."""
+
+        invocation = invocation or current_invocation.get()
+        if invocation is None:
+            return
+        current_invocation.set(None)
+
+        metrics = self.commands[invocation.name]
+        metrics.wall_time.add(time.perf_counter() - invocation.started)
+        metrics.db_time.add(invocation.db_time)
+        metrics.nb_statements.add(invocation.nb_statements)
+        metrics.nb_rows.add(invocation.nb_rows)
+
+    def instrument(self, engine: Engine):
+        """Count the SQL statements, and their time, of the running command."""
+
+        if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            return
+
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text format."""
+
+        lines = []
+        for metric, attribute, help_text in (
+            ("poyuta_command_duration_seconds", "wall_time", "Command wall time."),
+            ("poyuta_command_db_seconds", "db_time", "Command time spent in SQL."),
+            ("poyuta_command_statements", "nb_statements", "SQL statements run."),
+            ("poyuta_command_rows", "nb_rows", "Rows fetched from the database."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+
+            for name, metrics in sorted(self.commands.items()):
+                histogram = getattr(metrics, attribute)
+                for quantile in (0.5, 0.95, 0.99):
+                    value = histogram.percentile(quantile * 100)
+                    lines.append(
+                        f'{metric}{{command="{name}",quantile="{quantile}"}} {value}'
+                    )
+                lines.append(f'{metric}_sum{{command="{name}"}} {histogram.total}')
+                lines.append(f'{metric}_count{{command="{name}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path, extra: str = ""):
+        """Write the metrics to a file, e.g. for node_exporter's textfile collector.
+
+        The file is replaced atomically, so it is never read half written.
+        `extra` is appended, e.g. other metrics in the same format.
+        """
+
+        path = Path(path)
+        temporary_path = path.with_name(path.name + ".tmp")
+        temporary_path.write_text(self.to_prometheus() + extra)
+        os.replace(temporary_path, path)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["statement_started"].pop()
+
+    invocation = current_invocation.get()
+    if invocation is not None:
+        invocation.nb_statements += 1
+        invocation.db_time += time.perf_counter() - started
+
+
+class CountingCursor(sqlite3.Cursor):
+    """sqlite3 cursor counting the rows fetched by the running command."""
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        _count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _count_rows(len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors count the rows fetched."""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+def _count_rows(nb_rows: int):
+    invocation = current_invocation.get()
+    if invocation is not None:
+        invocation.nb_rows += nb_rows
+
+
+command_metrics = CommandMetricsRegistry()
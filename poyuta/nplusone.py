@@ -0,0 +1,167 @@
+"""
+N+1 query detector, for development and tests.
+
+Counts the SQL statements of each command invocation by shape, i.e. with
+their literal values and IN lists normalized, and reports the shapes that
+ran more than a threshold number of times, with the code that ran them:
+usually a query inside a loop which could be a single query.
+
+The bot enables it when N_PLUS_ONE_THRESHOLD is set, with N_PLUS_ONE_RAISE=1
+to raise instead of printing a warning. In tests:
+
+    detector = NPlusOneDetector(threshold=5, raise_error=True)
+    detector.install(engine)
+    with detector.scope("leaderboard"):
+        await leaderboard.callback(ctx)
+"""
+
+# Standard library imports
+import re
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PACKAGE_PATH = Path(__file__).resolve().parent
+
+# modules listening to the statements, never the code that ran them
+LISTENER_MODULES = {"nplusone.py", "slowqueries.py"}
+
+# literal values, then the lists of placeholders they leave, e.g. IN (?, ?, ?)
+LITERAL_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+class NPlusOneError(Exception):
+    """Raised when a statement shape runs too many times in an invocation."""
+
+
+def normalize_statement(statement: str) -> str:
+    """Shape of a SQL statement: literal values and IN lists replaced by ?."""
+
+    for pattern, replacement in LITERAL_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def find_caller() -> str:
+    """The two innermost frames of the bot's code that ran the statement."""
+
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        path = Path(frame.filename).resolve()
+        if path.parent == PACKAGE_PATH and path.name not in LISTENER_MODULES:
+            frames.append(f"{path.name}:{frame.lineno} in {frame.name}")
+            if len(frames) == 2:
+                break
+    return " <- ".join(frames) or "unknown"
+
+
+class DetectionScope:
+    """Statement shapes run by one command invocation."""
+
+    __slots__ = ("name", "counts", "callers")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = Counter()
+        self.callers: Dict[str, str] = {}
+
+
+class NPlusOneDetector:
+    """Detect statement shapes run more than `threshold` times per invocation.
+
+    Parameters
+    ----------
+    threshold : int
+        Number of times a statement shape may run in one invocation.
+
+    raise_error : bool, optional
+        Whether to raise an `NPlusOneError` rather than print a warning, by
+        default False.
+    """
+
+    def __init__(self, threshold: int, raise_error: bool = False):
+        self.threshold = threshold
+        self.raise_error = raise_error
+
+        self._current_scope: ContextVar[Optional[DetectionScope]] = ContextVar(
+            "n_plus_one_scope", default=None
+        )
+
+    def install(self, engine: Engine):
+        """Count the statements run by the engine."""
+
+        if not event.contains(engine, "before_cursor_execute", self._count):
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def start(self, name: str):
+        """Start counting the statements of an invocation in the current task."""
+
+        self._current_scope.set(DetectionScope(name))
+
+    def finish(self) -> List[str]:
+        """Stop counting, and report the statement shapes run too many times.
+
+        Returns
+        -------
+        List[str]
+            One line per statement shape over the threshold.
+
+        Raises
+        ------
+        NPlusOneError
+            If `raise_error` is set and a shape is over the threshold.
+        """
+
+        scope = self._current_scope.get()
+        if scope is None:
+            return []
+        self._current_scope.set(None)
+
+        problems = [
+            f"{count} x {shape[:200]} (from {scope.callers[shape]})"
+            for shape, count in scope.counts.most_common()
+            if count > self.threshold
+        ]
+        if not problems:
+            return []
+
+        report = f"N+1 queries in {scope.name}:\n" + "\n".join(
+            f"  {problem}" for problem in problems
+        )
+        if self.raise_error:
+            raise NPlusOneError(report)
+        print(report)
+
+        return problems
+
+    @contextmanager
+    def scope(self, name: str):
+        """Count the statements run inside the block, for tests."""
+
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.finish()
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        scope = self._current_scope.get()
+        if scope is None:
+            return
+
+        shape = normalize_statement(statement)
+        scope.counts[shape] += 1
+        if shape not in scope.callers:
+            scope.callers[shape] = find_caller()
@@ -0,0 +1,146 @@
+"""
+Command priorities.
+
+Answers and button clicks are time sensitive: they are critical and run right
+away. Stats, leaderboards and history are analytical: only a few of them run
+at once and the others wait in a bounded queue, so that a burst of them at
+the reset doesn't slow the answers down.
+"""
+
+# Standard library imports
+import asyncio
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Callable, Optional
+
+# Metrics
+from poyuta.metrics import LatencyHistogram
+
+CRITICAL = "critical"
+ANALYTICAL = "analytical"
+
+
+class Slot:
+    """The turn of a running command.
+
+    It ends with the command, or earlier with `release`, e.g. once the
+    command's pages are built and its paginator only waits for clicks.
+    """
+
+    __slots__ = ("_release",)
+
+    def __init__(self, release: Optional[Callable[[], None]] = None):
+        self._release = release
+
+    def release(self):
+        """Let the next command run, at most once."""
+
+        if self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+
+class CommandScheduler:
+    """Run analytical commands with limited concurrency, critical ones at once.
+
+    Parameters
+    ----------
+    concurrency : int, optional
+        Number of analytical commands running at once, by default 2.
+
+    max_queue_size : int, optional
+        Number of analytical commands that can wait for their turn, by
+        default 100. Past that, they are refused.
+
+    Attributes
+    ----------
+    nb_commands : Dict[str, int]
+        Number of commands run, by priority.
+
+    wait_time : LatencyHistogram
+        Time analytical commands spent waiting for their turn. Critical
+        commands never wait.
+
+    queue_size : int
+        Number of analytical commands waiting for their turn.
+
+    peak_queue_size : int
+        Largest number of analytical commands that waited at once.
+
+    nb_running : int
+        Number of analytical commands running.
+
+    nb_refused : int
+        Number of analytical commands refused because the queue was full.
+    """
+
+    def __init__(self, concurrency: int = 2, max_queue_size: int = 100):
+        self.concurrency = concurrency
+        self.max_queue_size = max_queue_size
+
+        self.nb_commands = {CRITICAL: 0, ANALYTICAL: 0}
+        self.wait_time = LatencyHistogram()
+        self.queue_size = 0
+        self.peak_queue_size = 0
+        self.nb_running = 0
+        self.nb_refused = 0
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        """Wait for the turn of a command of some priority.
+
+        Yields
+        ------
+        Slot
+            The command's turn, released when the context exits at the latest.
+
+        Raises
+        ------
+        asyncio.QueueFull
+            If the command is analytical and the queue is full.
+        """
+
+        if priority == CRITICAL:
+            self.nb_commands[CRITICAL] += 1
+            yield Slot()
+            return
+
+        if self.queue_size >= self.max_queue_size:
+            self.nb_refused += 1
+            raise asyncio.QueueFull
+
+        started = perf_counter()
+        self.queue_size += 1
+        self.peak_queue_size = max(self.peak_queue_size, self.queue_size)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_size -= 1
+
+        self.wait_time.add(perf_counter() - started)
+        self.nb_commands[ANALYTICAL] += 1
+        self.nb_running += 1
+
+        def release():
+            self.nb_running -= 1
+            self._semaphore.release()
+
+        slot = Slot(release)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def summary(self) -> str:
+        """Queue state and wait times of each priority."""
+
+        return (
+            f"> Critical: {self.nb_commands[CRITICAL]} run, never queued\n"
+            f"> Analytical: {self.nb_commands[ANALYTICAL]} run, "
+            f"{self.nb_running}/{self.concurrency} running, "
+            f"{self.queue_size} waiting (peak {self.peak_queue_size}, "
+            f"{self.nb_refused} refused)\n"
+            f"> Analytical wait: {self.wait_time.summary()}"
+        )
@@ -0,0 +1,74 @@
+"""
+On-demand profiling of a command.
+
+An admin runs a command through `!profile`, under cProfile, with a
+`ProfiledContext`: every message the command sends goes to the admin only,
+in direct messages, and without buttons, so that paginators don't wait for
+clicks. The command skips its side effects under it: the rate limits, and
+the leaderboards' cooldown and user cache flush.
+
+cProfile follows the event loop's thread only: code run in other threads,
+e.g. with asyncio.to_thread, shows up as the time spent waiting for it, and
+other tasks running while the command awaits show up as well.
+"""
+
+# Standard library imports
+import cProfile
+import pstats
+from typing import List
+
+# Discord
+from discord.ext import commands
+
+
+class ProfiledContext(commands.Context):
+    """Context sending the messages of a command to its author only."""
+
+    async def send(self, content=None, **kwargs):
+        # buttons would keep paginators waiting for clicks until their timeout
+        view = kwargs.pop("view", None)
+        if view is not None:
+            view.stop()
+
+        # a direct message can't reply to a message of the server
+        kwargs.pop("reference", None)
+        kwargs.pop("mention_author", None)
+        kwargs.pop("ephemeral", None)
+
+        return await self.author.send(content, **kwargs)
+
+    async def reply(self, content=None, **kwargs):
+        return await self.send(content, **kwargs)
+
+
+def top_functions(profile: cProfile.Profile, nb_functions: int = 15) -> List[str]:
+    """The functions of a profile with the longest cumulative time.
+
+    Parameters
+    ----------
+    profile : cProfile.Profile
+        Profile of the command, disabled.
+
+    nb_functions : int, optional
+        Number of functions, by default 15.
+
+    Returns
+    -------
+    List[str]
+        One line per function: cumulative and own time in milliseconds,
+        number of calls, and where the function is.
+    """
+
+    stats = pstats.Stats(profile)
+    # (primitive calls, calls, own time, cumulative time, callers) by function
+    functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+
+    lines = [f"{'cumul':>8} {'own':>8} {'calls':>7}  function"]
+    for function, (_, nb_calls, own, cumulative, _) in functions[:nb_functions]:
+        filename, lineno, name = function
+        location = f"{filename.rsplit('/', 1)[-1]}:{lineno}" if lineno else "~"
+        lines.append(
+            f"{cumulative * 1000:>6.1f}ms {own * 1000:>6.1f}ms {nb_calls:>7}"
+            f"  {location}({name})"
+        )
+    return lines
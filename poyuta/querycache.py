@@ -0,0 +1,357 @@
+"""
+Query result cache, invalidated by table versions.
+
+Each table has a version counter, bumped whenever a session writes to it:
+ORM flushes, bulk updates and deletes, and insert, update or delete
+statements run through a session. A cached result is keyed by its query and
+parameters, and remembers the versions of the tables it read, taken before
+the query ran. It is returned as long as none of them changed, so that
+commands re-reading data nothing wrote to since, like the planned quizzes
+between two submissions, don't query the database again.
+
+The versions are bumped again when the writing transaction ends, so that a
+result read while it was still open isn't kept once its changes are visible.
+
+Results are shared between callers, which must not modify them.
+"""
+
+# Standard library imports
+import functools
+import sys
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# Database
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from poyuta.database import SessionFactory
+
+# tables written by a session in its current transaction
+PENDING_TABLES_KEY = "query_cache_pending_tables"
+
+# items of a long list measured to estimate its size
+SIZE_SAMPLE = 32
+
+
+class CacheEntry:
+    """A cached result and the table versions it was read at.
+
+    Attributes
+    ----------
+    value : object
+        The result.
+
+    versions : Tuple[int, ...]
+        Version of each table the query read, in the order they were given.
+
+    size : int
+        Estimated size of the result, in bytes.
+    """
+
+    __slots__ = ("value", "versions", "size")
+
+    def __init__(self, value, versions: Tuple[int, ...], size: int):
+        self.value = value
+        self.versions = versions
+        self.size = size
+
+
+def estimate_size(value, _depth: int = 0) -> int:
+    """Estimate the memory used by a result, its items and their attributes.
+
+    The items of a list are alike records, only a sample of them is measured.
+    """
+
+    size = sys.getsizeof(value)
+    if _depth > 3:
+        return size
+
+    if isinstance(value, list) and len(value) > SIZE_SAMPLE:
+        step = len(value) // SIZE_SAMPLE
+        sample = value[::step][:SIZE_SAMPLE]
+        sample_size = sum(estimate_size(item, _depth + 1) for item in sample)
+        return size + sample_size * len(value) // len(sample)
+
+    if isinstance(value, dict):
+        items = [item for pair in value.items() for item in pair]
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+    elif hasattr(value, "__slots__"):
+        items = [getattr(value, slot, None) for slot in value.__slots__]
+    else:
+        return size
+
+    return size + sum(estimate_size(item, _depth + 1) for item in items)
+
+
+class QueryResultCache:
+    """LRU cache of query results, checked against the tables' versions.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Estimated memory the results may use, by default 32MB. The least
+        recently used results are evicted past it, and a result bigger than
+        it is never cached. 0 disables the cache.
+
+    Attributes
+    ----------
+    hits, misses : Counter
+        Number of results served from the cache, and computed, by query.
+
+    nb_stale : int
+        Number of misses on a result cached before one of its tables changed.
+
+    nb_evictions : int
+        Number of results evicted to stay under `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 32_000_000):
+        self.max_bytes = max_bytes
+        self.size = 0
+
+        self.hits = Counter()
+        self.misses = Counter()
+        self.nb_stale = 0
+        self.nb_evictions = 0
+
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    # --- Invalidation --- #
+
+    def install(self, session_factory: sessionmaker):
+        """Bump the versions of the tables written by the factory's sessions."""
+
+        if event.contains(session_factory, "after_flush", self._after_flush):
+            return
+
+        event.listen(session_factory, "after_flush", self._after_flush)
+        event.listen(session_factory, "after_bulk_update", self._after_bulk)
+        event.listen(session_factory, "after_bulk_delete", self._after_bulk)
+        event.listen(session_factory, "do_orm_execute", self._do_orm_execute)
+        event.listen(session_factory, "after_commit", self._end_transaction)
+        event.listen(session_factory, "after_rollback", self._end_transaction)
+
+    def bump(self, tables: Iterable[str]):
+        """Invalidate the results read from some tables."""
+
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+
+    def version(self, table: str) -> int:
+        return self._versions[table]
+
+    def _written(self, session, tables: Iterable[str]):
+        tables = set(tables)
+        if not tables:
+            return
+        session.info.setdefault(PENDING_TABLES_KEY, set()).update(tables)
+        self.bump(tables)
+
+    def _after_flush(self, session, flush_context):
+        self._written(
+            session,
+            (
+                instance.__table__.name
+                for instance in (*session.new, *session.dirty, *session.deleted)
+            ),
+        )
+
+    def _after_bulk(self, context):
+        self._written(context.session, [context.mapper.local_table.name])
+
+    def _do_orm_execute(self, orm_execute_state):
+        # insert, update and delete statements run as they are, e.g. the
+        # prebuilt ones of poyuta.statements
+        if (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            self._written(
+                orm_execute_state.session, [orm_execute_state.statement.table.name]
+            )
+
+    def _end_transaction(self, session):
+        tables = session.info.pop(PENDING_TABLES_KEY, None)
+        if tables:
+            self.bump(tables)
+
+    # --- Lookups --- #
+
+    def get_or_compute(
+        self,
+        name: str,
+        parameters: Hashable,
+        tables: Tuple[str, ...],
+        compute: Callable,
+    ):
+        """Get a result from the cache, or compute and cache it.
+
+        Parameters
+        ----------
+        name : str
+            Name of the query.
+
+        parameters : Hashable
+            Parameters of the query.
+
+        tables : Tuple[str, ...]
+            Names of the tables the query reads.
+
+        compute : Callable
+            Runs the query, called without arguments on a miss.
+
+        Returns
+        -------
+        object
+            The result, shared with the other callers.
+        """
+
+        if not self.max_bytes:
+            return compute()
+
+        key = (name, parameters)
+        with self._lock:
+            # taken before the query runs, a write during it makes it stale
+            versions = tuple(self._versions[table] for table in tables)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.versions == versions:
+                    self._entries.move_to_end(key)
+                    self.hits[name] += 1
+                    return entry.value
+                self.nb_stale += 1
+                self._remove(key)
+            self.misses[name] += 1
+
+        value = compute()
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, versions, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.nb_evictions += 1
+
+        return value
+
+    def cached(self, *tables: str):
+        """Decorate a query function taking a session, then hashable arguments.
+
+        Parameters
+        ----------
+        *tables : str
+            Names of the tables the function reads.
+        """
+
+        def decorator(function):
+            name = function.__name__
+
+            @functools.wraps(function)
+            def wrapper(session, *args, **kwargs):
+                return self.get_or_compute(
+                    name,
+                    (args, tuple(sorted(kwargs.items()))),
+                    tables,
+                    lambda: function(session, *args, **kwargs),
+                )
+
+            return wrapper
+
+        return decorator
+
+    def clear(self):
+        """Drop every cached result."""
+
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable):
+        self.size -= self._entries.pop(key).size
+
+    # --- Metrics --- #
+
+    @property
+    def nb_entries(self) -> int:
+        return len(self._entries)
+
+    def hit_rate(self, name: Optional[str] = None) -> float:
+        """Share of the lookups served from the cache, of a query or of all."""
+
+        hits = self.hits[name] if name else sum(self.hits.values())
+        misses = self.misses[name] if name else sum(self.misses.values())
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"> {self.nb_entries} result(s), {self.size / 1e6:.1f}MB of "
+            f"{self.max_bytes / 1e6:.0f}MB, hit rate {self.hit_rate():.0%}, "
+            f"{self.nb_stale} stale, {self.nb_evictions} evicted"
+        ]
+        for name in sorted(set(self.hits) | set(self.misses)):
+            lines.append(
+                f"> {name}: {self.hits[name]} hit(s), {self.misses[name]} miss(es), "
+                f"{self.hit_rate(name):.0%}"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text format."""
+
+        lines = []
+        for metric, counter, help_text in (
+            ("poyuta_query_cache_hits_total", self.hits, "Results served cached."),
+            ("poyuta_query_cache_misses_total", self.misses, "Results computed."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, count in sorted(counter.items()):
+                lines.append(f'{metric}{{query="{name}"}} {count}')
+
+        for metric, value, metric_type, help_text in (
+            (
+                "poyuta_query_cache_stale_total",
+                self.nb_stale,
+                "counter",
+                "Cached results found stale.",
+            ),
+            (
+                "poyuta_query_cache_evictions_total",
+                self.nb_evictions,
+                "counter",
+                "Results evicted to stay under the size limit.",
+            ),
+            (
+                "poyuta_query_cache_entries",
+                self.nb_entries,
+                "gauge",
+                "Cached results.",
+            ),
+            (
+                "poyuta_query_cache_bytes",
+                self.size,
+                "gauge",
+                "Estimated size of the cached results.",
+            ),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+query_cache = QueryResultCache()
+query_cache.install(SessionFactory)
@@ -0,0 +1,173 @@
+"""
+Per-user rate limiting of commands.
+
+Each class of commands (answers, stats, leaderboards) has its own
+`RateLimiter`, holding a token bucket per user in memory. A user who runs
+out of tokens is told once, then their commands are ignored until a token
+is back.
+"""
+
+# Standard library imports
+import math
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+# Discord
+from discord.ext import commands
+
+# Utils
+from poyuta.profiling import ProfiledContext
+
+
+class RateLimited(commands.CheckFailure):
+    """Raised when a command is refused by a `RateLimiter`.
+
+    Attributes
+    ----------
+    retry_after : float
+        Seconds until the user gets a token back.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} rate limit reached, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Tokens left to a user, and whether they were told they ran out."""
+
+    __slots__ = ("tokens", "updated", "warned")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.warned = False
+
+
+class RateLimiter:
+    """Token bucket rate limiter, one bucket per user.
+
+    Each user can run `rate` commands in a burst, then gets a token back every
+    `per / rate` seconds. Every check is O(1): buckets are kept in least
+    recently used order, and the ones untouched for `per` seconds, full again,
+    are forgotten.
+
+    Parameters
+    ----------
+    name : str
+        Name of the class of commands limited.
+
+    rate : int
+        Number of commands per period.
+
+    per : float
+        Period, in seconds.
+
+    Attributes
+    ----------
+    nb_refused : int
+        Number of commands refused since the limiter was created.
+    """
+
+    def __init__(self, name: str, rate: int, per: float):
+        self.name = name
+        self.rate = rate
+        self.per = per
+        self.nb_refused = 0
+
+        self._buckets = OrderedDict()
+
+    @classmethod
+    def from_config(cls, name: str, value: str) -> "RateLimiter":
+        """Create a rate limiter from a "<rate>/<seconds>" string, e.g. "5/10"."""
+
+        rate, per = value.split("/")
+        return cls(name, int(rate), float(per))
+
+    def hit(self, user_id: int) -> Tuple[float, bool]:
+        """Take a token from a user's bucket.
+
+        Parameters
+        ----------
+        user_id : int
+            Discord user ID.
+
+        Returns
+        -------
+        Tuple[float, bool]
+            0 if the command is allowed, else the number of seconds until the
+            user gets a token back. And whether the command is the first one
+            refused since the user last ran out of tokens.
+        """
+
+        now = time.monotonic()
+
+        bucket = self._buckets.pop(user_id, None)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, now)
+        else:
+            refill = (now - bucket.updated) * self.rate / self.per
+            bucket.tokens = min(self.rate, bucket.tokens + refill)
+            bucket.updated = now
+
+        # most recently used last
+        self._buckets[user_id] = bucket
+        self._forget_full_buckets(now)
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.warned = False
+            return 0.0, False
+
+        self.nb_refused += 1
+        first_refusal = not bucket.warned
+        bucket.warned = True
+
+        return (1 - bucket.tokens) * self.per / self.rate, first_refusal
+
+    def _forget_full_buckets(self, now: float):
+        while self._buckets:
+            user_id, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < self.per:
+                break
+            del self._buckets[user_id]
+
+
+def rate_limit(limiter: RateLimiter, delete_message: bool = False):
+    """Check limiting how often a user can run the command.
+
+    The first refused command of a user gets a reply, the next ones until
+    they get a token back are ignored silently.
+
+    Parameters
+    ----------
+    limiter : RateLimiter
+        Limiter of the class of commands, shared by all of them.
+
+    delete_message : bool, optional
+        Whether to delete refused messages, for commands whose message must
+        not stay in the channel (answers), by default False.
+    """
+
+    async def predicate(ctx: commands.Context) -> bool:
+        # profiling a command doesn't use its author's tokens
+        if isinstance(ctx, ProfiledContext):
+            return True
+
+        retry_after, first_refusal = limiter.hit(ctx.author.id)
+        if not retry_after:
+            return True
+
+        if delete_message:
+            await ctx.message.delete()
+
+        if first_refusal:
+            await ctx.send(
+                f"{ctx.author.mention} slow down! Try again in {math.ceil(retry_after)}s.",
+                delete_after=max(retry_after, 5),
+            )
+
+        raise RateLimited(limiter.name, retry_after)
+
+    return commands.check(predicate)
@@ -0,0 +1,399 @@
+"""
+Read model of the analytics commands.
+
+The leaderboards, stats, history and queue only read answers and quizzes.
+Loading them as ORM instances puts every row in the session's identity map
+and lets `answer.quiz` or `answer.user` issue one more query per row. Here,
+each query selects only the columns a command shows, and each row becomes a
+small record with `__slots__`, which nothing tracks or lazily loads.
+
+The results are cached by `query_cache` until one of the tables they read
+changes, and shared between callers: don't modify them.
+"""
+
+# Standard library imports
+from datetime import date
+from typing import List, Optional
+
+# Database
+from sqlalchemy import case, func, select
+from sqlalchemy.orm.session import Session
+from poyuta.database import Answer, Quiz, User, UserStartQuizTimestamp
+
+# Cache
+from poyuta.querycache import query_cache
+
+# Results
+from poyuta.results import BONUS_ANSWER
+
+
+class AnswerRecord:
+    """An answer of a user, as listed by `/history` and `!mystats`.
+
+    Attributes
+    ----------
+    quiz_id : int
+        Quiz ID.
+
+    answer : str
+        The seiyuu answer, `BONUS_ANSWER` for a bonus answer.
+
+    bonus_answer : str
+        The bonus answer, if any.
+
+    is_correct : bool
+        Whether the seiyuu answer is correct.
+
+    is_bonus_point : bool
+        Whether the bonus answer is correct.
+
+    answer_time : float
+        Seconds between the start of the quiz and the answer.
+    """
+
+    __slots__ = (
+        "quiz_id",
+        "answer",
+        "bonus_answer",
+        "is_correct",
+        "is_bonus_point",
+        "answer_time",
+    )
+
+    def __init__(
+        self,
+        quiz_id: int,
+        answer: str,
+        bonus_answer: Optional[str],
+        is_correct: bool,
+        is_bonus_point: bool,
+        answer_time: float,
+    ):
+        self.quiz_id = quiz_id
+        self.answer = answer
+        self.bonus_answer = bonus_answer
+        self.is_correct = is_correct
+        self.is_bonus_point = is_bonus_point
+        self.answer_time = answer_time
+
+    def __repr__(self):
+        return f"AnswerRecord(quiz_id={self.quiz_id}, answer={self.answer!r})"
+
+
+class GuessRecord:
+    """A correct seiyuu answer, as ranked by `!topspeed`, `!ct` and `!mystats`.
+
+    Attributes
+    ----------
+    user_id : int
+        Discord user ID.
+
+    quiz_id : int
+        Quiz ID.
+
+    quiz_type_id : int
+        Quiz type ID.
+
+    quiz_date : date
+        Date of the quiz.
+
+    answer : str
+        The answer.
+
+    answer_time : float
+        Seconds between the start of the quiz and the answer.
+    """
+
+    __slots__ = (
+        "user_id",
+        "quiz_id",
+        "quiz_type_id",
+        "quiz_date",
+        "answer",
+        "answer_time",
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        quiz_id: int,
+        quiz_type_id: int,
+        quiz_date: date,
+        answer: str,
+        answer_time: float,
+    ):
+        self.user_id = user_id
+        self.quiz_id = quiz_id
+        self.quiz_type_id = quiz_type_id
+        self.quiz_date = quiz_date
+        self.answer = answer
+        self.answer_time = answer_time
+
+    def __repr__(self):
+        return f"GuessRecord(user_id={self.user_id}, answer_time={self.answer_time})"
+
+
+class PlannedQuizRecord:
+    """A quiz of today or later, as listed by `/queue` and `/plannedquizzes`.
+
+    Attributes
+    ----------
+    date : date
+        Date of the quiz.
+
+    quiz_type_id : int
+        Quiz type ID.
+
+    creator_id : int
+        Discord ID of the user who queued the quiz.
+
+    clip : str
+        Link to the clip.
+
+    answer : str
+        Answers of the quiz, separated by "|".
+
+    bonus_answer : str
+        Bonus answers of the quiz, separated by "|", if any.
+    """
+
+    __slots__ = ("date", "quiz_type_id", "creator_id", "clip", "answer", "bonus_answer")
+
+    def __init__(
+        self,
+        date: date,
+        quiz_type_id: int,
+        creator_id: int,
+        clip: str,
+        answer: str,
+        bonus_answer: Optional[str],
+    ):
+        self.date = date
+        self.quiz_type_id = quiz_type_id
+        self.creator_id = creator_id
+        self.clip = clip
+        self.answer = answer
+        self.bonus_answer = bonus_answer
+
+    def __repr__(self):
+        return f"PlannedQuizRecord(date={self.date}, quiz_type_id={self.quiz_type_id})"
+
+
+class ScoredAnswersRecord:
+    """The correct answers of a user to a quiz, as scored by `!lb` and `!slb`.
+
+    Attributes
+    ----------
+    user_id : int
+        Discord user ID.
+
+    quiz_type_id : int
+        Quiz type ID.
+
+    nb_answers : int
+        Number of correct answers, of the seiyuu or of the bonus character.
+
+    is_bonus : bool
+        Whether they are bonus answers.
+    """
+
+    __slots__ = ("user_id", "quiz_type_id", "nb_answers", "is_bonus")
+
+    def __init__(
+        self, user_id: int, quiz_type_id: int, nb_answers: int, is_bonus: bool
+    ):
+        self.user_id = user_id
+        self.quiz_type_id = quiz_type_id
+        self.nb_answers = nb_answers
+        self.is_bonus = is_bonus
+
+    def __repr__(self):
+        return (
+            f"ScoredAnswersRecord(user_id={self.user_id}, "
+            f"quiz_type_id={self.quiz_type_id}, is_bonus={self.is_bonus})"
+        )
+
+
+GUESS_COLUMNS = (
+    Answer.user_id,
+    Answer.quiz_id,
+    Quiz.id_type,
+    Quiz.date,
+    Answer.answer,
+    Answer.answer_time,
+)
+
+
+@query_cache.cached("users")
+def user_ids(session: Session) -> List[int]:
+    """IDs of every user, in the order they were added."""
+
+    return list(session.execute(select(User.id)).scalars())
+
+
+@query_cache.cached("answers")
+def has_answers(session: Session) -> bool:
+    """Whether anyone ever answered a quiz."""
+
+    return session.execute(select(select(Answer.id).exists())).scalar()
+
+
+@query_cache.cached("answers", "quizzes")
+def user_answers(
+    session: Session,
+    user_id: int,
+    quiz_type_id: int,
+    quiz_date: Optional[date] = None,
+) -> List[AnswerRecord]:
+    """Answers of a user to the quizzes of a type, of a day or all of them.
+
+    Parameters
+    ----------
+    session : Session
+        Database session.
+
+    user_id : int
+        Discord user ID.
+
+    quiz_type_id : int
+        Quiz type ID.
+
+    quiz_date : Optional[date], optional
+        Only the answers to the quiz of that day, by default None for every
+        quiz.
+
+    Returns
+    -------
+    List[AnswerRecord]
+        The answers, in the order they were given.
+    """
+
+    statement = (
+        select(
+            Answer.quiz_id,
+            Answer.answer,
+            Answer.bonus_answer,
+            Answer.is_correct,
+            Answer.is_bonus_point,
+            Answer.answer_time,
+        )
+        .join(Quiz, Answer.quiz_id == Quiz.id)
+        .where(Answer.user_id == user_id, Quiz.id_type == quiz_type_id)
+        .order_by(Answer.id)
+    )
+    if quiz_date is not None:
+        statement = statement.where(Quiz.date == quiz_date)
+
+    return [AnswerRecord(*row) for row in session.execute(statement)]
+
+
+@query_cache.cached("user_start_quiz_timestamp", "quizzes")
+def nb_played_quizzes(session: Session, user_id: int, quiz_type_id: int) -> int:
+    """Number of quizzes of a type a user started."""
+
+    return session.execute(
+        select(func.count(func.distinct(UserStartQuizTimestamp.quiz_id)))
+        .join(Quiz, UserStartQuizTimestamp.quiz_id == Quiz.id)
+        .where(UserStartQuizTimestamp.user_id == user_id, Quiz.id_type == quiz_type_id)
+    ).scalar()
+
+
+@query_cache.cached("answers", "quizzes")
+def fastest_guesses(
+    session: Session,
+    before: date,
+    user_id: Optional[int] = None,
+    quiz_type_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[GuessRecord]:
+    """Correct seiyuu answers to the quizzes before a day, fastest first.
+
+    Parameters
+    ----------
+    session : Session
+        Database session.
+
+    before : date
+        Only the quizzes before that day, usually today's quiz date.
+
+    user_id : Optional[int], optional
+        Only the answers of that user, by default None for everyone.
+
+    quiz_type_id : Optional[int], optional
+        Only the quizzes of that type, by default None for every type.
+
+    limit : Optional[int], optional
+        Maximum number of answers, by default None for all of them.
+
+    Returns
+    -------
+    List[GuessRecord]
+        The answers, fastest first.
+    """
+
+    statement = (
+        select(*GUESS_COLUMNS)
+        .join(Quiz, Answer.quiz_id == Quiz.id)
+        .where(Answer.is_correct, Answer.answer != BONUS_ANSWER, Quiz.date < before)
+        .order_by(Answer.answer_time)
+        .limit(limit)
+    )
+    if user_id is not None:
+        statement = statement.where(Answer.user_id == user_id)
+    if quiz_type_id is not None:
+        statement = statement.where(Quiz.id_type == quiz_type_id)
+
+    return [GuessRecord(*row) for row in session.execute(statement)]
+
+
+@query_cache.cached("answers", "quizzes")
+def scored_answers(session: Session) -> List[ScoredAnswersRecord]:
+    """Correct answers of every user to every quiz, counted by kind.
+
+    The leaderboards score them all from this single query, rather than one
+    query per user and quiz type.
+    """
+
+    is_bonus = case((Answer.is_bonus_point, True), else_=False)
+    statement = (
+        select(Answer.user_id, Quiz.id_type, func.count(Answer.id), is_bonus)
+        .join(Quiz, Answer.quiz_id == Quiz.id)
+        .where(Answer.is_correct | Answer.is_bonus_point)
+        .group_by(Answer.user_id, Answer.quiz_id, Quiz.id_type, is_bonus)
+    )
+
+    return [ScoredAnswersRecord(*row) for row in session.execute(statement)]
+
+
+@query_cache.cached("answers", "quizzes")
+def guesses_of_day(session: Session, quiz_date: date) -> List[GuessRecord]:
+    """Correct seiyuu answers to the quizzes of a day, by type then fastest."""
+
+    statement = (
+        select(*GUESS_COLUMNS)
+        .join(Quiz, Answer.quiz_id == Quiz.id)
+        .where(Answer.is_correct, Answer.answer != BONUS_ANSWER, Quiz.date == quiz_date)
+        .order_by(Quiz.id_type, Answer.answer_time)
+    )
+
+    return [GuessRecord(*row) for row in session.execute(statement)]
+
+
+@query_cache.cached("quizzes")
+def planned_quizzes(session: Session, from_date: date) -> List[PlannedQuizRecord]:
+    """Quizzes of a day and the following ones, by date then type."""
+
+    statement = (
+        select(
+            Quiz.date,
+            Quiz.id_type,
+            Quiz.creator_id,
+            Quiz.clip,
+            Quiz.answer,
+            Quiz.bonus_answer,
+        )
+        .where(Quiz.date >= from_date)
+        .order_by(Quiz.date, Quiz.id_type, Quiz.id)
+    )
+
+    return [PlannedQuizRecord(*row) for row in session.execute(statement)]
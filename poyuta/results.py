@@ -0,0 +1,213 @@
+"""
+Daily quiz results statistics.
+
+The results of a day are computed a few minutes before the reset by
+`compute_quiz_results`, then `merge_late_answers` only adds the answers given
+since then, so that the reset itself barely touches the database.
+"""
+
+# Standard library imports
+import re
+from datetime import date
+from typing import Dict, List
+
+# Database
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.session import Session
+from poyuta.database import BONUS_ANSWER, Quiz, Answer
+from poyuta.statements import ATTEMPT_COUNTS
+
+# Utils
+from poyuta.utils import process_user_input
+
+# number of top guessers shown in the results
+NB_TOP_ANSWERS = 3
+
+
+def compute_quiz_results(
+    session: Session, quiz_date: date, quiz_type_ids: List[int]
+) -> dict:
+    """Compute the results of every quiz of a day.
+
+    Parameters
+    ----------
+    session : Session
+        Database session.
+
+    quiz_date : date
+        Date of the quizzes.
+
+    quiz_type_ids : List[int]
+        IDs of the quiz types to compute the results of.
+
+    Returns
+    -------
+    dict
+        The results payload: the quiz date, the last answer ID taken into
+        account (`watermark`) and the results of each quiz by quiz type ID,
+        None if there was no quiz of that type.
+    """
+
+    watermark = session.query(func.max(Answer.id)).scalar() or 0
+
+    quizzes = {
+        quiz.id_type: quiz
+        for quiz in session.query(Quiz)
+        .options(joinedload(Quiz.creator))
+        .filter(Quiz.date == quiz_date, Quiz.id_type.in_(quiz_type_ids))
+    }
+
+    results = {}
+    for quiz_type_id in quiz_type_ids:
+        quiz = quizzes.get(quiz_type_id)
+        results[quiz_type_id] = (
+            _compute_single_quiz_results(session, quiz, watermark) if quiz else None
+        )
+
+    return {"date": quiz_date, "watermark": watermark, "quizzes": results}
+
+
+def merge_late_answers(session: Session, payload: dict) -> dict:
+    """Add the answers given after a payload was computed to it.
+
+    Parameters
+    ----------
+    session : Session
+        Database session.
+
+    payload : dict
+        Payload returned by `compute_quiz_results`, updated in place.
+
+    Returns
+    -------
+    dict
+        The updated payload.
+    """
+
+    quiz_results = {
+        results["quiz_id"]: results
+        for results in payload["quizzes"].values()
+        if results is not None
+    }
+
+    late_answers = (
+        session.query(Answer)
+        .filter(
+            Answer.id > payload["watermark"],
+            Answer.quiz_id.in_(quiz_results.keys()),
+        )
+        .order_by(Answer.id)
+        .all()
+    )
+
+    if not late_answers:
+        return payload
+
+    for quiz_id, results in quiz_results.items():
+        answers = [answer for answer in late_answers if answer.quiz_id == quiz_id]
+        if answers:
+            _add_answers(session, results, answers)
+
+    payload["watermark"] = late_answers[-1].id
+
+    return payload
+
+
+def _compute_single_quiz_results(session: Session, quiz: Quiz, watermark: int) -> dict:
+    results = {
+        "quiz_id": quiz.id,
+        "clip": quiz.clip,
+        "answer": quiz.answer,
+        "bonus_answer": quiz.bonus_answer,
+        "creator_id": quiz.creator_id,
+        "creator_name": quiz.creator.name,
+        "creator_pfp": quiz.creator.pfp,
+        "nb_seiyuu_attempts": 0,
+        "nb_correct_seiyuu_answers": 0,
+        "nb_bonus_attempts": 0,
+        "nb_correct_bonus_answers": 0,
+        "top_answers": [],
+        "incorrect_answers": {},
+    }
+
+    answers = (
+        session.query(Answer)
+        .filter(Answer.quiz_id == quiz.id, Answer.id <= watermark)
+        .order_by(Answer.id)
+        .all()
+    )
+    _add_answers(session, results, answers)
+
+    return results
+
+
+def _add_answers(session: Session, results: dict, answers: List[Answer]):
+    """Add answers to the results of a quiz."""
+
+    new_top_answers = []
+    for answer in answers:
+        if answer.answer == BONUS_ANSWER:
+            results["nb_bonus_attempts"] += 1
+            results["nb_correct_bonus_answers"] += int(answer.is_bonus_point)
+            continue
+
+        results["nb_seiyuu_attempts"] += 1
+
+        if answer.is_correct:
+            results["nb_correct_seiyuu_answers"] += 1
+            new_top_answers.append(answer)
+        else:
+            _cluster_incorrect_answer(results["incorrect_answers"], answer.answer)
+
+    if not new_top_answers:
+        return
+
+    # only the new answers that may enter the top need their attempts counted
+    new_top_answers = sorted(new_top_answers, key=lambda answer: answer.answer_time)
+    new_top_answers = new_top_answers[:NB_TOP_ANSWERS]
+    nb_attempts = _count_attempts(
+        session,
+        quiz_id=results["quiz_id"],
+        user_ids=[answer.user_id for answer in new_top_answers],
+    )
+
+    top_answers = results["top_answers"] + [
+        (answer.user_id, answer.answer_time, nb_attempts.get(answer.user_id, 0))
+        for answer in new_top_answers
+    ]
+    results["top_answers"] = sorted(top_answers, key=lambda item: item[1])[
+        :NB_TOP_ANSWERS
+    ]
+
+
+def _count_attempts(session: Session, quiz_id: int, user_ids: List[int]) -> Dict:
+    """Count the seiyuu attempts of some users on a quiz, in a single query."""
+
+    rows = session.execute(
+        ATTEMPT_COUNTS, {"quiz_id": quiz_id, "user_ids": user_ids}
+    ).all()
+
+    return dict(rows)
+
+
+def _cluster_incorrect_answer(incorrect_answers: Dict[str, int], answer: str):
+    """Count an incorrect answer with the first similar answer already counted."""
+
+    regex_pattern = process_user_input(
+        input_str=answer, partial_match=False, swap_words=True
+    )
+    for key in incorrect_answers.keys():
+        if re.search(regex_pattern, key, re.IGNORECASE):
+            incorrect_answers[key] += 1
+            break
+    else:
+        incorrect_answers[answer] = 1
+
+
+def get_top_incorrect_answers(results: dict, nb: int = 3) -> List[tuple]:
+    """Get the most common incorrect answers of a quiz, most common first."""
+
+    return sorted(
+        results["incorrect_answers"].items(), key=lambda item: item[1], reverse=True
+    )[:nb]
@@ -0,0 +1,148 @@
+"""
+Slow-query log.
+
+Logs the statements slower than a threshold with their parameters, duration
+and the command that ran them. The first time a statement shape is slow, its
+query plan is logged too, with the tables it scans in full, e.g. a filter on
+`Answer.answer != BONUS_ANSWER` which can't use an index.
+
+The bot enables it when SLOW_QUERY_THRESHOLD_MS is set. The log is rotated
+once it reaches `max_bytes`, keeping `backup_count` older files.
+"""
+
+# Standard library imports
+import logging
+import re
+import sqlite3
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import List, Set, Union
+
+# SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Metrics
+from poyuta.metrics import current_invocation
+from poyuta.nplusone import find_caller, normalize_statement
+
+# statements EXPLAIN QUERY PLAN can describe
+EXPLAINABLE_PATTERN = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+
+# plan steps reading a whole table, not through an index
+FULL_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)")
+
+
+class SlowQueryLog:
+    """Log the statements slower than a threshold, and their query plan.
+
+    Parameters
+    ----------
+    threshold : float
+        Duration in seconds from which a statement is logged.
+
+    path : Union[str, Path]
+        Path of the log file.
+
+    max_bytes : int, optional
+        Size from which the log file is rotated, by default 1MB.
+
+    backup_count : int, optional
+        Number of rotated log files kept, by default 3.
+
+    Attributes
+    ----------
+    nb_slow_queries : int
+        Number of statements logged since the bot started.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        path: Union[str, Path],
+        max_bytes: int = 1_000_000,
+        backup_count: int = 3,
+    ):
+        self.threshold = threshold
+        self.nb_slow_queries = 0
+
+        # statement shapes whose plan was already logged
+        self._explained: Set[str] = set()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+
+        self._logger = logging.getLogger("poyuta.slowqueries")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.handlers = [handler]
+
+    def install(self, engine: Engine):
+        """Time the statements run by the engine."""
+
+        if not event.contains(engine, "after_cursor_execute", self._after_execute):
+            event.listen(engine, "before_cursor_execute", self._before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["slow_query_started"].pop()
+        if duration < self.threshold:
+            return
+
+        self.nb_slow_queries += 1
+        invocation = current_invocation.get()
+        command = invocation.name if invocation else "no command"
+
+        lines = [
+            f"{duration * 1000:.1f}ms in {command} (from {find_caller()})",
+            f"  {' '.join(statement.split())}",
+            f"  parameters: {repr(parameters)[:500]}",
+        ]
+
+        shape = normalize_statement(statement)
+        if shape not in self._explained and EXPLAINABLE_PATTERN.match(statement):
+            self._explained.add(shape)
+            # the first row set of an executemany describes them all
+            first_parameters = parameters[0] if executemany else parameters
+            lines.extend(
+                self._explain(
+                    conn.connection.dbapi_connection, statement, first_parameters
+                )
+            )
+
+        self._logger.info("\n".join(lines))
+
+    def _explain(
+        self, connection: sqlite3.Connection, statement, parameters
+    ) -> List[str]:
+        # a plain cursor, so that the plan's rows aren't counted as the command's
+        cursor = sqlite3.Cursor(connection)
+        try:
+            plan = cursor.execute(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).fetchall()
+        except sqlite3.Error as error:
+            return [f"  query plan unavailable: {error}"]
+        finally:
+            cursor.close()
+
+        lines = ["  query plan:"]
+        full_scans = []
+        for _, _, _, detail in plan:
+            lines.append(f"    {detail}")
+            match = FULL_SCAN_PATTERN.match(detail)
+            if match:
+                full_scans.append(match.group(1))
+
+        if full_scans:
+            lines.append(f"  full table scan of {', '.join(full_scans)}")
+        return lines
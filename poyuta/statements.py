@@ -0,0 +1,162 @@
+"""
+Prebuilt statements of the answer path.
+
+A statement built on each call, with `session.query(...)` or `select(...)`,
+costs its construction and the computation of its cache key before
+SQLAlchemy finds its compiled form. These are built once, with bound
+parameters given at execution, so that a click or a guess goes straight to
+the compiled form. The inserts are built on the tables rather than the
+models, so that SQLAlchemy runs them as they are instead of as ORM bulk
+inserts of their parameters:
+
+    session.execute(HAS_CORRECT_ANSWER, {"user_id": 1, "quiz_id": 2}).scalar()
+"""
+
+# Database
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Integer,
+    String,
+    and_,
+    bindparam,
+    exists,
+    func,
+    select,
+)
+from sqlalchemy.dialects.sqlite import Insert, insert
+from poyuta.database import BONUS_ANSWER, Answer, Quiz, User, UserStartQuizTimestamp
+
+# --- Quizzes --- #
+
+# id, answer and bonus_answer of the quiz of a type and day
+# parameters: quiz_type_id, quiz_date
+QUIZ_OF_DAY = (
+    select(Quiz.id, Quiz.answer, Quiz.bonus_answer)
+    .where(
+        Quiz.id_type == bindparam("quiz_type_id"),
+        Quiz.date == bindparam("quiz_date"),
+    )
+    .limit(1)
+)
+
+# (id_type, id) of the quizzes of a day
+# parameters: quiz_date
+QUIZ_IDS_OF_DAY = select(Quiz.id_type, Quiz.id).where(
+    Quiz.date == bindparam("quiz_date")
+)
+
+# what the quiz button shows
+# parameters: quiz_id
+QUIZ_TO_PLAY = select(Quiz.id, Quiz.clip, Quiz.bonus_answer, Quiz.creator_id).where(
+    Quiz.id == bindparam("quiz_id")
+)
+
+# --- Users --- #
+
+# write a user, without overwriting is_admin: admins are managed in the database
+# executed with a list of {id, name, pfp, is_admin}
+_user_insert = insert(User.__table__)
+UPSERT_USER = _user_insert.on_conflict_do_update(
+    index_elements=[User.id],
+    set_={"name": _user_insert.excluded.name, "pfp": _user_insert.excluded.pfp},
+)
+
+# --- Answers --- #
+
+_user_answer = and_(
+    Answer.user_id == bindparam("user_id"), Answer.quiz_id == bindparam("quiz_id")
+)
+
+# whether a user answered a quiz correctly
+# parameters: user_id, quiz_id
+HAS_CORRECT_ANSWER = select(exists().where(_user_answer, Answer.is_correct))
+
+# whether a user got the bonus point of a quiz
+# parameters: user_id, quiz_id
+HAS_BONUS_POINT = select(exists().where(_user_answer, Answer.is_bonus_point))
+
+# record when a user started a quiz, unless they already did
+# parameters: user_id, quiz_id, timestamp
+START_QUIZ = insert(UserStartQuizTimestamp.__table__).on_conflict_do_nothing(
+    index_elements=[UserStartQuizTimestamp.user_id, UserStartQuizTimestamp.quiz_id]
+)
+
+# seiyuu attempts of some users on a quiz, by user
+# parameters: quiz_id, user_ids
+ATTEMPT_COUNTS = (
+    select(Answer.user_id, func.count(Answer.id))
+    .where(
+        Answer.quiz_id == bindparam("quiz_id"),
+        Answer.user_id.in_(bindparam("user_ids", expanding=True)),
+        Answer.answer != BONUS_ANSWER,
+    )
+    .group_by(Answer.user_id)
+)
+
+
+def _submit_answer(can_answer) -> Insert:
+    """Insert an answer if the user started the quiz and `can_answer`.
+
+    Returns the time of the answer in seconds since the user started the quiz.
+    """
+
+    # converted to UTC first, so that a DST change in between doesn't count
+    answer_duration = func.round(
+        (
+            func.julianday(bindparam("answer_time", type_=DateTime), "utc")
+            - func.julianday(UserStartQuizTimestamp.timestamp, "utc")
+        )
+        * 86400,
+        3,
+    )
+
+    rows = select(
+        bindparam("user_id", type_=Integer),
+        bindparam("quiz_id", type_=Integer),
+        bindparam("answer", type_=String),
+        bindparam("bonus_answer", type_=String),
+        bindparam("is_correct", type_=Boolean),
+        bindparam("is_bonus_point", type_=Boolean),
+        answer_duration,
+    ).where(
+        UserStartQuizTimestamp.user_id == bindparam("user_id"),
+        UserStartQuizTimestamp.quiz_id == bindparam("quiz_id"),
+        can_answer,
+    )
+
+    return (
+        insert(Answer.__table__)
+        .from_select(
+            [
+                Answer.user_id,
+                Answer.quiz_id,
+                Answer.answer,
+                Answer.bonus_answer,
+                Answer.is_correct,
+                Answer.is_bonus_point,
+                Answer.answer_time,
+            ],
+            rows,
+        )
+        .returning(Answer.answer_time)
+    )
+
+
+# store a seiyuu answer if the user started the quiz and hasn't answered it
+# correctly yet
+# parameters: user_id, quiz_id, answer, bonus_answer, is_correct,
+# is_bonus_point, answer_time
+SUBMIT_ANSWER = _submit_answer(
+    ~exists().where(_user_answer, Answer.is_correct),
+)
+
+# store a bonus answer if the user answered the quiz correctly and hasn't got
+# the bonus point yet
+# parameters: same as SUBMIT_ANSWER
+SUBMIT_BONUS_ANSWER = _submit_answer(
+    and_(
+        exists().where(_user_answer, Answer.is_correct),
+        ~exists().where(_user_answer, Answer.is_bonus_point),
+    ),
+)
@@ -3,9 +3,10 @@ Utility functions for the bot.
 """
 
 # Standard library imports
+import hashlib
+import json
 import os
 import re
-import numpy as np
 from datetime import datetime, date, time, timedelta
 
 # Discord.py
@@ -16,11 +17,11 @@ from discord.ext import commands
 from dotenv import dotenv_values
 
 # Database models
-from poyuta.database import Quiz, QuizType, Answer, User
+from poyuta.database import Quiz, Answer, User
+from poyuta.cache import user_cache, reference_data
 
 # Typing helpers
-from sqlalchemy.orm.session import Session
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 # Define a list of replacement rules
 ANIME_REGEX_REPLACE_RULES = [
@@ -198,7 +199,7 @@ def process_user_input(
     return output_str
 
 
-async def is_server_admin(ctx: commands.Context, session: Session):
+async def is_server_admin(ctx: commands.Context):
     """Check if a user is a server admin.
 
     Parameters
@@ -206,27 +207,24 @@ async def is_server_admin(ctx: commands.Context, session: Session):
     ctx : commands.Context
         Context of the command.
 
-    session : Session
-        Database session.
-
     Returns
     -------
     bool
         Whether the user is an admin or not.
     """
-    return is_bot_admin(session, ctx.author) or (
+    return is_bot_admin(ctx.author) or (
         isinstance(ctx.author, Member) and ctx.author.guild_permissions.administrator
     )
 
 
-def is_bot_admin(session: Session, user: User):
+def is_bot_admin(user: User):
     """Check if a user is a bot admin.
 
+    Admins are read from the reference data cache, so an admin added or
+    removed in the database counts after a restart.
+
     Parameters
     ----------
-    session : Session
-        Database session.
-
     user : User
         User to check.
 
@@ -236,12 +234,12 @@ def is_bot_admin(session: Session, user: User):
         Whether the user is a bot admin or not.
     """
 
-    admins = session.query(User).filter(User.is_admin).all()
+    return user.id in reference_data.admin_ids
 
-    return user.id in [admin.id for admin in admins]
 
-
-def get_current_quiz_date(daily_quiz_reset_time: time) -> date:
+def get_current_quiz_date(
+    daily_quiz_reset_time: time, now: Optional[datetime] = None
+) -> date:
     """Get the current quiz date.
     The current quiz date is yesterday if it's before the daily quiz reset time,
     else it's today.
@@ -251,6 +249,9 @@ def get_current_quiz_date(daily_quiz_reset_time: time) -> date:
     daily_quiz_reset_time : time
         Time at which the daily quiz resets. HH:MM:SS format.
 
+    now : Optional[datetime], optional
+        Local time to get the quiz date of, by default the current time.
+
     Returns
     -------
     date
@@ -258,7 +259,8 @@ def get_current_quiz_date(daily_quiz_reset_time: time) -> date:
     """
 
     # get time now
-    now = datetime.now()
+    if now is None:
+        now = datetime.now()
 
     # today's quiz is yesterday date if it's before the daily quiz reset time
     # else it's today's date
@@ -269,6 +271,27 @@ def get_current_quiz_date(daily_quiz_reset_time: time) -> date:
     )
 
 
+def to_database_time(moment: datetime) -> datetime:
+    """Convert an aware datetime to the naive local time stored in the database.
+
+    Used with the `created_at` of Discord messages and interactions, which is
+    derived from their snowflake ID: the time Discord received them, in UTC,
+    whatever the delay before the bot handles them.
+
+    Parameters
+    ----------
+    moment : datetime
+        Timezone aware datetime.
+
+    Returns
+    -------
+    datetime
+        Naive datetime in the local timezone.
+    """
+
+    return moment.astimezone().replace(tzinfo=None)
+
+
 def reconstruct_discord_pfp_url(user_id: int, pfp_hash: str) -> str:
     """Reconstruct the discord pfp url from the user ID and pfp hash.
 
@@ -309,17 +332,13 @@ def extract_hash_from_discord_pfp_url(pfp_url: str) -> str:
 
 
 def get_user(
-    session: Session,
     user: Interaction.user,
     add_if_not_exist: bool = True,
 ):
-    """Get the user from the database from its discord ID.
+    """Get the user from the user cache from its discord ID.
 
     Parameters
     ----------
-    session : Session
-        Database session.
-
     user : Interaction.user
         Discord user.
 
@@ -328,83 +347,89 @@ def get_user(
 
     Returns
     -------
-    User
-        User from the database.
+    CachedUser
+        User from the user cache.
 
     Notes
     -----
-    This function first tries to get the user from the database using their Discord ID. If the user is not found and
-    `add_if_not_exist` is True, a new user is created in the database with the given ID, name, and profile picture hash.
-    If the user is found or added, their profile picture hash is updated if it has changed since the last time they were
-    retrieved from the database.
+    This function first tries to get the user from the user cache using their Discord ID. If the user is not found and
+    `add_if_not_exist` is True, a new user is created with the given ID, name, and profile picture hash.
+    If the user is found or added, their name and profile picture hash are updated if they have changed since the last
+    time they were retrieved.
+    New users and updates are written to the database in batches by `UserCache.flush`.
     """
 
     # extract pfp hash from discord pfp url
     pfp_hash = extract_hash_from_discord_pfp_url(user.avatar.url)
 
-    # try to get the user from the database
-    db_user = session.query(User).filter(User.id == user.id).first()
-
-    # add user if it doesn't exist and add_if_not_exist is True
-    if not db_user and add_if_not_exist:
-        db_user = User(
-            id=user.id,
-            name=user.name,
-            pfp=pfp_hash,
-            is_admin=False,
-        )
-        session.add(db_user)
-        session.commit()
-
-    # update pfp if it changed
-    if db_user.pfp != pfp_hash:
-        db_user.pfp = pfp_hash
-        session.commit()
-
-    return db_user
+    return user_cache.upsert(
+        user_id=user.id,
+        name=user.name,
+        pfp=pfp_hash,
+        add_if_not_exist=add_if_not_exist,
+    )
 
 
-def get_user_from_id(session: Session, user_id: int):
-    """Get the user from the database from its discord ID.
+def get_user_from_id(user_id: int):
+    """Get the user from the user cache from its discord ID.
 
     Parameters
     ----------
-    session : Session
-        Database session.
-
     user_id : int
         Discord user ID.
 
     Returns
     -------
-    User
-        User from the database.
+    CachedUser
+        User from the user cache.
     """
 
-    return session.query(User).filter(User.id == user_id).first()
+    return user_cache.get(user_id)
 
 
-def get_quiz_type_choices(session: Session) -> List[Tuple[int, str]]:
+def get_quiz_type_choices() -> List[Tuple[int, str]]:
     """
     Get the quiz type choices.
 
-    This function queries the database session to get a list of distinct quiz types,
+    This function reads the quiz types from the reference data cache,
     and returns a list of tuples containing the quiz type ID and name.
 
-    Parameters
-    ----------
-    session : Session
-        The database session.
-
     Returns
     -------
     list[tuple[int, str]]
         A list of tuples containing the quiz type ID and name.
     """
 
-    quiz_types = session.query(QuizType).distinct().all()
+    quiz_types = reference_data.quiz_types
 
     return [
         app_commands.Choice(value=quiz_type.id, name=quiz_type.type)
         for quiz_type in quiz_types
     ]
+
+
+def compute_command_tree_fingerprint(tree: app_commands.CommandTree) -> str:
+    """Compute a fingerprint of the application commands of a command tree.
+
+    Two trees have the same fingerprint if they would register the same
+    commands on Discord, so it can tell whether the tree needs to be synced.
+
+    Parameters
+    ----------
+    tree : app_commands.CommandTree
+        The command tree.
+
+    Returns
+    -------
+    str
+        SHA-256 hex digest of the commands payload.
+    """
+
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()